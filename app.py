@@ -1,15 +1,32 @@
+import atexit
+import json
 import os
-from flask import Flask
+import queue
+from flask import Flask, Response, jsonify, request
+
+# Import pooled service clients
+from chimerapulse.core import clients
+from chimerapulse.core.language import text_analysis
 
 # Import helper fxns
 from chimerapulse.helpers import chimerapulse_helper
+from chimerapulse.helpers import jobs
+from chimerapulse.helpers import metrics
 
 # TODO: Move this to a common util
 from chimerapulse.core.speech import language_identification
+from chimerapulse.core.speech import text_to_speech
 
 app = Flask(__name__)
 print(__name__)
 
+# Files named by clients are only read from this directory. Relative paths are resolved against it
+data_dir = os.path.realpath(os.getenv('CHIMERAPULSE_DATA_DIR', os.path.join(os.getcwd(), 'data')))
+
+# Release pooled service connections when the server shuts down
+atexit.register(clients.close_clients)
+atexit.register(text_to_speech.close_synthesizers)
+
 #TODO: Add help for '/' route
 
 @app.route('/health')
@@ -17,6 +34,12 @@ def health():
     return 'Server is up!'
 
 
+@app.route('/metrics')
+def get_metrics():
+    # Latency histograms and volume counters of every service stage, in the Prometheus text format
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/v1/summarization')
 def summarization():
     # TODO: Temp value
@@ -25,5 +48,157 @@ def summarization():
     return chimerapulse_helper.summarization_helper(file_path)
 
 
+"""
+Job fxns
+"""
+def __get_file_path(body):
+    """Resolves a client file path inside the data directory. Paths leading outside of it, including through
+    symlinks, are rejected
+    """
+    file_path = body.get('file_path')
+    if not file_path:
+        raise ValueError('ERROR: file_path was not provided')
+
+    real_path = os.path.realpath(os.path.join(data_dir, file_path))
+    if os.path.commonpath([data_dir, real_path]) != data_dir:
+        raise ValueError(f'ERROR: file_path should be inside the data directory: {file_path}')
+
+    if not os.path.isfile(real_path):
+        raise ValueError(f'ERROR: Cannot find file at: {file_path}')
+
+    return real_path
+
+
+def __read_file(body):
+    with open(__get_file_path(body), 'r') as file:
+        return file.read()
+
+
+# Validates a job request body and returns the helper fxn and arguments that run the job
+job_kinds = {
+    'documentsummarization': lambda body: [
+        chimerapulse_helper.document_summarization_helper,
+        [body['document'] if body.get('document') else __read_file(body)]
+    ],
+    'conversationsummarization': lambda body: [
+        chimerapulse_helper.convosummarization_helper,
+        [body['conversation_items'] if body.get('conversation_items') else json.loads(__read_file(body)),
+         body.get('tasks', 'all')]
+    ],
+    'conversationsummarizationbatch': lambda body: [
+        chimerapulse_helper.convosummarization_batch_helper,
+        [body['conversations'], body.get('tasks', 'all')]
+    ],
+    'diarization': lambda body: [
+        chimerapulse_helper.diarization_helper,
+        [__get_file_path(body), body.get('source_language', 'en-US'), int(body.get('segments', 1))]
+    ],
+    'videotranscription': lambda body: [
+        chimerapulse_helper.videotranscription_helper,
+        [__get_file_path(body), bool(body.get('detect_language', False))]
+    ],
+}
+
+
+@app.route('/v1/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify(jobs.stats())
+
+
+@app.route('/v1/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    """Queues a long operation and returns immediately. Poll the job for its status and result
+    """
+    if kind not in job_kinds:
+        return jsonify({'error': f'Unknown job kind: {kind}', 'kinds': list(job_kinds)}), 404
+
+    try:
+        [fn, args] = job_kinds[kind](request.get_json(silent=True) or {})
+    except (KeyError, TypeError, ValueError, OSError) as error:
+        return jsonify({'error': str(error)}), 400
+
+    try:
+        job_id = jobs.submit(kind, fn, *args)
+    except queue.Full:
+        return jsonify({'error': 'Too many jobs are waiting. Retry later'}), 503
+
+    return jsonify(jobs.get(job_id)), 202, {'Location': f'/v1/jobs/{job_id}'}
+
+
+@app.route('/v1/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+
+    return jsonify(job)
+
+
+@app.route('/v1/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job = jobs.get(job_id, include_result=True)
+    if job is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+
+    if job['status'] not in (jobs.SUCCEEDED, jobs.FAILED):
+        return jsonify(job), 409
+
+    return jsonify(job)
+
+
+"""
+Streaming fxns
+"""
+def __format_event(event, stream_format):
+    """Formats a streamed event as a server-sent event or a JSON line. None is a heartbeat
+    """
+    if stream_format == 'jsonl':
+        return '\n' if event is None else json.dumps(event) + '\n'
+
+    if event is None:
+        return ': heartbeat\n\n'
+
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+@app.route('/v1/stream/diarization', methods=['GET'])
+def stream_diarization():
+    """Streams each utterance of a conversation as soon as it is transcribed, followed by its analysis
+
+    Query args:
+        file_path: Path to conversation audio file, inside the data directory
+        source_language: Source language of audio (default: en-US)
+        actions: Comma separated analysis of each utterance, e.g. sentiment,keyphrases. Empty for transcript only
+        format: 'sse' for server-sent events or 'jsonl' for JSON lines (default: sse)
+    """
+    stream_format = request.args.get('format', 'sse')
+    actions = [action for action in request.args.get('actions', 'sentiment,keyphrases').split(',') if action]
+
+    try:
+        file_path = __get_file_path(request.args)
+        if stream_format not in ('sse', 'jsonl'):
+            raise ValueError(f'ERROR: format should be sse or jsonl: {stream_format}')
+        if actions:
+            actions = text_analysis.validate_actions(actions)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+
+    events = chimerapulse_helper.live_diarization_helper(
+        file_path, request.args.get('source_language', 'en-US'), actions)
+
+    # The server closes the response once the client disconnects, which stops the transcriber
+    def stream():
+        try:
+            for event in events:
+                yield __format_event(event, stream_format)
+        finally:
+            events.close()
+
+    return Response(
+        stream(),
+        mimetype='application/x-ndjson' if stream_format == 'jsonl' else 'text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=80)
@@ -0,0 +1,6 @@
+"""Offline benchmarks of the end-to-end ChimeraPulse pipelines
+
+Example:
+    python -m benchmarks run <args>
+    python -m benchmarks compare <baseline> <current>
+"""
@@ -0,0 +1,9 @@
+"""This file calls the benchmarks command function in benchmarks.run file
+
+Example:
+    python -m benchmarks <command>
+"""
+from benchmarks import run
+
+if __name__ == '__main__':
+    run.benchmarks()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,468 @@
+"""Offline stand-ins for the Azure services called by chimerapulse.core
+
+The fakes replace the service boundary only: client getters of chimerapulse.core.clients and the network-bound
+classes of the speech SDK. Everything between the CLI and the service (batching, caching, chunking, streaming,
+thread pools) runs unchanged. Every fake request sleeps for a configurable latency and is counted per service.
+
+Speech transcription emits one utterance per utterance_seconds of audio, paced at speech_speedup times real time,
+and only once the audio of the utterance has been read, so push streams fed while decoding behave as they would
+against the service.
+
+Example:
+    from benchmarks import fakes
+
+    fakes.install(latency_ms=100)
+    ...
+    requests = fakes.get_counters()
+"""
+import json
+import re
+import threading
+import time
+import wave
+from types import SimpleNamespace
+
+import azure.cognitiveservices.speech as speechsdk
+
+from chimerapulse.core import clients
+from chimerapulse.core.speech import diarization
+from chimerapulse.core.speech import language_identification
+from chimerapulse.core.speech import text_to_speech
+from chimerapulse.core.speech import video_transcription
+
+DEFAULT_LATENCY_MS = 100
+DEFAULT_SPEECH_SPEEDUP = 50
+DEFAULT_UTTERANCE_SECONDS = 5
+
+TICKS_PER_SECOND = 10000000
+DETECTED_LANGUAGE = 'en-US'
+SENTENCE = re.compile(r'[^.!?]+[.!?]?')
+
+# Declare global variables
+config = {
+    'latency': DEFAULT_LATENCY_MS / 1000,
+    'speech_speedup': DEFAULT_SPEECH_SPEEDUP,
+    'utterance_seconds': DEFAULT_UTTERANCE_SECONDS,
+}
+counters = {}
+lock = threading.Lock()
+
+
+"""
+Private fxns
+"""
+def __request(service):
+    """Counts a service request and waits for its latency
+    """
+    with lock:
+        counters[service] = counters.get(service, 0) + 1
+
+    time.sleep(config['latency'])
+
+
+def __get_sentence(index):
+    return f'Utterance {index + 1} of the conversation mentions the Contoso order number {1000 + index}.'
+
+
+def __get_summary(text, max_chars=500):
+    sentences = [sentence.strip() for sentence in SENTENCE.findall(text) if sentence.strip()]
+
+    return ' '.join(sentences[:3])[:max_chars]
+
+
+def __get_words(text):
+    return [word for word in re.findall(r'\w+', text) if len(word) > 5]
+
+
+"""
+Text analytics fxns
+"""
+def __create_document(**attributes):
+    return SimpleNamespace(is_error=False, error=None, **attributes)
+
+
+def __analyze_sentiment(text):
+    return __create_document(
+        kind='SentimentAnalysis',
+        sentiment='neutral',
+        sentences=[SimpleNamespace(text=sentence, sentiment='neutral') for sentence in SENTENCE.findall(text)[:10]])
+
+
+def __extract_key_phrases(text):
+    return __create_document(kind='KeyPhraseExtraction', key_phrases=list(dict.fromkeys(__get_words(text)))[:5])
+
+
+def __recognize_entities(text):
+    return __create_document(
+        kind='EntityRecognition',
+        entities=[SimpleNamespace(text=word, category='Organization', subcategory=None)
+                  for word in __get_words(text)[:3]])
+
+
+def __recognize_linked_entities(text):
+    return __create_document(
+        kind='EntityLinking',
+        entities=[SimpleNamespace(
+            name=word,
+            data_source_entity_id=word,
+            url=f'https://en.wikipedia.org/wiki/{word}',
+            data_source='Wikipedia',
+            matches=[SimpleNamespace(text=word)]
+        ) for word in __get_words(text)[:3]])
+
+
+def __recognize_pii_entities(text):
+    return __create_document(kind='PiiEntityRecognition', redacted_text=text, entities=[])
+
+
+def __summarize(text, kind):
+    if kind == 'AbstractiveSummarization':
+        return __create_document(kind=kind, summaries=[SimpleNamespace(text=__get_summary(text))])
+
+    return __create_document(
+        kind=kind, sentences=[SimpleNamespace(text=sentence) for sentence in SENTENCE.findall(__get_summary(text))])
+
+
+def __get_document_text(document):
+    return document if isinstance(document, str) else document.get('text', '')
+
+
+def __analyze_documents(analyze):
+    def call(documents, **_):
+        __request('textanalytics')
+        return [analyze(__get_document_text(document)) for document in documents]
+
+    return call
+
+
+def __begin_analyze_actions(documents, actions, **_):
+    """Runs every action over every document in one job, results in action order per document
+    """
+    analyzers = {
+        'AnalyzeSentimentAction': __analyze_sentiment,
+        'ExtractKeyPhrasesAction': __extract_key_phrases,
+        'RecognizeEntitiesAction': __recognize_entities,
+        'RecognizeLinkedEntitiesAction': __recognize_linked_entities,
+        'RecognizePiiEntitiesAction': __recognize_pii_entities,
+        'AbstractiveSummaryAction': lambda text: __summarize(text, 'AbstractiveSummarization'),
+        'ExtractiveSummaryAction': lambda text: __summarize(text, 'ExtractiveSummarization'),
+    }
+
+    __request('textanalytics')
+    results = [[analyzers[type(action).__name__](__get_document_text(document)) for action in actions]
+               for document in documents]
+
+    # The job completed by the time it was started, so done callbacks run right away
+    return SimpleNamespace(result=lambda: iter(results), add_done_callback=lambda callback: callback(None))
+
+
+def __create_text_analytics_client():
+    return SimpleNamespace(
+        analyze_sentiment=__analyze_documents(__analyze_sentiment),
+        extract_key_phrases=__analyze_documents(__extract_key_phrases),
+        recognize_entities=__analyze_documents(__recognize_entities),
+        recognize_linked_entities=__analyze_documents(__recognize_linked_entities),
+        recognize_pii_entities=__analyze_documents(__recognize_pii_entities),
+        begin_analyze_actions=__begin_analyze_actions,
+        close=lambda: None)
+
+
+"""
+Conversation analysis fxns
+"""
+def __create_polling_method(result):
+    """Polling method of a job that runs for one latency after it is started. Each status request is a request
+    """
+    started = time.monotonic()
+    state = {'finished': False}
+
+    def update_status():
+        __request('conversations')
+        state['finished'] = time.monotonic() - started >= config['latency']
+
+    return SimpleNamespace(
+        initialize=lambda *_: None,
+        update_status=update_status,
+        finished=lambda: state['finished'],
+        status=lambda: 'succeeded' if state['finished'] else 'running',
+        run=lambda: None,
+        resource=lambda: result)
+
+
+def __begin_conversation_analysis(task, polling=True, **_):
+    __request('conversations')
+
+    conversations = task['analysisInput']['conversations']
+    result = {
+        "tasks": {
+            "items": [{
+                "taskName": conversation_task['taskName'],
+                "status": "succeeded",
+                "results": {
+                    "errors": [],
+                    "conversations": [{
+                        "id": conversation['id'],
+                        "warnings": [],
+                        "summaries": [{
+                            "aspect": aspect,
+                            "text": __get_summary(' '.join(item['text'] for item in conversation['conversationItems']))
+                        } for aspect in conversation_task['parameters']['summaryAspects']]
+                    } for conversation in conversations]
+                }
+            } for conversation_task in task['tasks']]
+        }
+    }
+
+    # A polling method handed over by the caller sends its status requests through the SDK's own polling method
+    if hasattr(polling, 'inner'):
+        polling.inner = __create_polling_method(result)
+
+    return SimpleNamespace(result=lambda: result)
+
+
+def __create_conversation_analysis_client():
+    return SimpleNamespace(begin_conversation_analysis=__begin_conversation_analysis, close=lambda: None)
+
+
+"""
+Translator fxns
+"""
+def __translate(content, to, **_):
+    __request('translator')
+
+    return [SimpleNamespace(translations=[SimpleNamespace(to=language, text=f'[{language}] {element.text}')
+                                          for language in to]) for element in content]
+
+
+def __create_translation_client():
+    return SimpleNamespace(translate=__translate, close=lambda: None)
+
+
+"""
+Speech fxns
+"""
+class PushStream(SimpleNamespace):
+    """Fake push stream. Hashable by identity like the SDK's, as the video decoder tracks streams in sets
+    """
+    __hash__ = object.__hash__
+
+
+def __create_speech_config(*_, **__):
+    speech_config = SimpleNamespace(speech_recognition_language=None, speech_synthesis_voice_name=None)
+    speech_config.set_property = lambda *_: None
+    speech_config.set_speech_synthesis_output_format = lambda *_: None
+
+    return speech_config
+
+
+def __create_push_stream(stream_format=None):
+    stream_format = stream_format or __create_stream_format()
+    condition = threading.Condition()
+    state = {'bytes': 0, 'closed': False}
+
+    def write(data):
+        with condition:
+            state['bytes'] += len(data)
+            condition.notify_all()
+
+    def close():
+        with condition:
+            state['closed'] = True
+            condition.notify_all()
+
+    return PushStream(write=write, close=close, condition=condition, state=state, byte_rate=stream_format.byte_rate)
+
+
+def __create_stream_format(samples_per_second=16000, bits_per_sample=16, channels=1):
+    return SimpleNamespace(byte_rate=samples_per_second * bits_per_sample // 8 * channels)
+
+
+def __create_audio_config(filename=None, stream=None, use_default_microphone=False, **_):
+    duration = None
+    if filename:
+        with wave.open(filename, 'rb') as wav:
+            duration = wav.getnframes() / wav.getframerate()
+
+    return SimpleNamespace(filename=filename, stream=stream, duration=duration)
+
+
+def __wait_audio(audio_config, seconds):
+    """Waits until the audio source holds a number of seconds of audio, or ends
+
+    Return:
+        (float): Seconds of audio available, at most seconds
+    """
+    if audio_config.stream is None:
+        return min(seconds, audio_config.duration or 0)
+
+    stream = audio_config.stream
+    with stream.condition:
+        stream.condition.wait_for(
+            lambda: stream.state['closed'] or stream.state['bytes'] / stream.byte_rate >= seconds)
+
+        return min(seconds, stream.state['bytes'] / stream.byte_rate)
+
+
+def __create_signal():
+    callbacks = []
+
+    return SimpleNamespace(connect=callbacks.append, fire=lambda evt: [callback(evt) for callback in callbacks])
+
+
+def __create_conversation_transcriber(speech_config=None, audio_config=None, **_):
+    stopped = threading.Event()
+    transcriber = SimpleNamespace(
+        transcribed=__create_signal(),
+        session_started=__create_signal(),
+        session_stopped=__create_signal(),
+        canceled=__create_signal())
+
+    def transcribe():
+        utterance_seconds = config['utterance_seconds']
+        start = time.perf_counter()
+        transcriber.session_started.fire(SimpleNamespace(session_id='benchmark'))
+
+        index = 0
+        while not stopped.is_set():
+            available = __wait_audio(audio_config, (index + 1) * utterance_seconds)
+            if available - index * utterance_seconds < 1:
+                break
+
+            # Paced as the service would, faster than real time
+            stopped.wait(max(0, start + available / config['speech_speedup'] - time.perf_counter()))
+            if stopped.is_set():
+                break
+
+            with lock:
+                counters['speech_utterances'] = counters.get('speech_utterances', 0) + 1
+
+            transcriber.transcribed.fire(SimpleNamespace(result=SimpleNamespace(
+                reason=speechsdk.ResultReason.RecognizedSpeech,
+                text=__get_sentence(index),
+                speaker_id=f'Guest-{index % 2 + 1}',
+                offset=int(index * utterance_seconds * TICKS_PER_SECOND),
+                duration=int((available - index * utterance_seconds) * TICKS_PER_SECOND),
+                properties={})))
+            index += 1
+
+        transcriber.session_stopped.fire(SimpleNamespace(session_id='benchmark'))
+
+    def start_transcribing_async():
+        __request('speech_transcription')
+        threading.Thread(target=transcribe, daemon=True).start()
+
+        return SimpleNamespace(get=lambda: None)
+
+    def stop_transcribing_async():
+        stopped.set()
+
+        return SimpleNamespace(get=lambda: None)
+
+    transcriber.start_transcribing_async = start_transcribing_async
+    transcriber.stop_transcribing_async = stop_transcribing_async
+
+    return transcriber
+
+
+def __create_speech_recognizer(speech_config=None, audio_config=None, **_):
+    def recognize_once():
+        __request('speech_recognition')
+        time.sleep(config['utterance_seconds'] / config['speech_speedup'])
+
+        return SimpleNamespace(
+            reason=speechsdk.ResultReason.RecognizedSpeech,
+            text=__get_sentence(0),
+            language=DETECTED_LANGUAGE,
+            offset=0,
+            duration=int(config['utterance_seconds'] * TICKS_PER_SECOND),
+            properties={
+                speechsdk.PropertyId.SpeechServiceResponse_JsonResult: json.dumps({
+                    "PrimaryLanguage": {"Language": DETECTED_LANGUAGE, "Confidence": "High"}
+                })
+            })
+
+    return SimpleNamespace(recognize_once=recognize_once)
+
+
+def __create_speech_synthesizer(speech_config=None, audio_config=None, **_):
+    def speak_async(text):
+        def get():
+            __request('speech_synthesis')
+            # 16 kHz 16-bit audio, about 60 ms per character
+            return SimpleNamespace(
+                reason=speechsdk.ResultReason.SynthesizingAudioCompleted, audio_data=bytes(len(text) * 1920))
+
+        return SimpleNamespace(get=get)
+
+    return SimpleNamespace(speak_text_async=speak_async, speak_ssml_async=speak_async)
+
+
+def __create_connection(speech_synthesizer):
+    return SimpleNamespace(open=lambda for_continuous_recognition: __request('speech_connection'), close=lambda: None)
+
+
+def __create_speech_module():
+    """Speech SDK with its network-bound classes replaced. Enums and event types are the SDK's own
+    """
+    return SimpleNamespace(
+        ResultReason=speechsdk.ResultReason,
+        CancellationReason=speechsdk.CancellationReason,
+        PropertyId=speechsdk.PropertyId,
+        SpeechSynthesisOutputFormat=speechsdk.SpeechSynthesisOutputFormat,
+        SessionEventArgs=speechsdk.SessionEventArgs,
+        SpeechRecognitionEventArgs=speechsdk.SpeechRecognitionEventArgs,
+        SpeechConfig=__create_speech_config,
+        AudioConfig=__create_audio_config,
+        AutoDetectSourceLanguageResult=lambda result: SimpleNamespace(language=result.language),
+        SpeechRecognizer=__create_speech_recognizer,
+        SpeechSynthesizer=__create_speech_synthesizer,
+        Connection=SimpleNamespace(from_speech_synthesizer=__create_connection),
+        languageconfig=SimpleNamespace(AutoDetectSourceLanguageConfig=lambda languages=None, **_: languages),
+        audio=SimpleNamespace(
+            AudioConfig=__create_audio_config,
+            AudioStreamFormat=__create_stream_format,
+            PushAudioInputStream=__create_push_stream),
+        transcription=SimpleNamespace(ConversationTranscriber=__create_conversation_transcriber))
+
+
+"""
+Fake fxns
+"""
+def install(latency_ms=DEFAULT_LATENCY_MS, speech_speedup=DEFAULT_SPEECH_SPEEDUP,
+            utterance_seconds=DEFAULT_UTTERANCE_SECONDS):
+    """Replaces the services called by chimerapulse.core with offline fakes for the rest of the process
+
+    Args:
+        latency_ms (float): Latency of every service request
+        speech_speedup (float): Seconds of audio transcribed per second
+        utterance_seconds (float): Seconds of audio per transcribed utterance
+    """
+    config.update({
+        'latency': latency_ms / 1000,
+        'speech_speedup': speech_speedup,
+        'utterance_seconds': utterance_seconds,
+    })
+
+    text_analytics_client = __create_text_analytics_client()
+    conversation_analysis_client = __create_conversation_analysis_client()
+    translation_client = __create_translation_client()
+    clients.get_text_analytics_client = lambda: text_analytics_client
+    clients.get_conversation_analysis_client = lambda: conversation_analysis_client
+    clients.get_translation_client = lambda: translation_client
+    clients.get_speech_config = __create_speech_config
+
+    speech_module = __create_speech_module()
+    diarization.speechsdk = speech_module
+    language_identification.speechsdk = speech_module
+    video_transcription.speechsdk = speech_module
+    text_to_speech.speech_sdk = speech_module
+
+
+def get_counters():
+    """Retrieves requests sent to each fake service so far
+
+    Return:
+        (dict): Request count keyed by service
+    """
+    with lock:
+        return dict(counters)
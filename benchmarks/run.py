@@ -0,0 +1,350 @@
+"""Offline benchmarks of the end-to-end ChimeraPulse pipelines
+
+Every pipeline is the real 'chi' command, run against the fake services of benchmarks.fakes over generated inputs
+of several sizes. Videos are muxed from the generated audio with ffmpeg, so video demuxing is measured too. Each run
+records end-to-end wall time, the time of each instrumented service stage (see helpers.metrics), requests sent per
+service, peak memory and throughput. Results are saved as JSON so runs before and after a change can be compared.
+
+Wall times are the median of the repeated runs. Peak memory is measured in one extra run, as tracing allocations
+slows the code down.
+
+Example:
+    python -m benchmarks run -o before.json
+    python -m benchmarks run -o after.json --latency-ms 200 -a 60 -a 600
+    python -m benchmarks compare before.json after.json
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import wave
+from array import array
+from unittest import mock
+
+import click
+
+from benchmarks import fakes
+from chimerapulse import commands
+from chimerapulse.core.speech import text_to_speech
+from chimerapulse.helpers import audio_cache
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers import translation_memory
+
+DEFAULT_DOCUMENT_CHARS = [5000, 50000, 250000]
+DEFAULT_AUDIO_SECONDS = [60, 300, 900]
+DEFAULT_REPEAT = 3
+DEFAULT_TARGET_LANGUAGE = 'fil'
+
+SAMPLE_RATE = 16000
+
+
+"""
+Input fxns
+"""
+def __create_document(directory, chars):
+    sentences = []
+    length = 0
+    while length < chars:
+        sentence = (f'Sentence {len(sentences) + 1} of the benchmark document describes how Contoso shipped '
+                    f'order {1000 + len(sentences)} to its customer. ')
+        sentences.append(sentence)
+        length += len(sentence)
+        if len(sentences) % 8 == 0:
+            sentences.append('\n\n')
+
+    filepath = os.path.join(directory, f'document-{chars}.txt')
+    with open(filepath, 'w') as file:
+        file.write(''.join(sentences)[:chars])
+
+    return filepath
+
+
+def __create_audio(directory, seconds):
+    """Writes a 16 kHz mono WAV alternating a tone with silence, so silence detection has something to find
+    """
+    tone = array('h', [8000] * 20 + [-8000] * 20) * (SAMPLE_RATE // 40)
+    silence = array('h', [0]) * SAMPLE_RATE
+
+    samples = array('h')
+    for second in range(seconds):
+        samples.extend(silence if second % 5 == 4 else tone)
+
+    filepath = os.path.join(directory, f'audio-{seconds}.wav')
+    with wave.open(filepath, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+    return filepath
+
+
+def __create_video(directory, seconds):
+    """Muxes the generated audio with a still video track into an MP4, as a recorded call would be
+    """
+    from moviepy.config import get_setting
+
+    audio_file_path = __create_audio(directory, seconds)
+    filepath = os.path.join(directory, f'video-{seconds}.mp4')
+    subprocess.run(
+        [get_setting('FFMPEG_BINARY'), '-loglevel', 'error', '-y', '-f', 'lavfi', '-i', 'color=c=black:s=160x120:r=5',
+         '-i', audio_file_path, '-shortest', '-c:v', 'mpeg4', '-c:a', 'aac', filepath],
+        capture_output=True, check=True)
+
+    return filepath
+
+
+# 'chi' arguments of each pipeline, followed by the input path, and the kind of input it is measured over
+PIPELINES = {
+    'translatespeech': [['translatespeech', '-p'], 'audio'],
+    'convosummarization': [['convosummarization', '-p'], 'audio'],
+    'summarizevideoconvo': [['summarizevideoconvo', '-d', '-p'], 'video'],
+    'docsummarization': [['docsummarization', '-p'], 'document'],
+}
+
+
+"""
+Measurement fxns
+"""
+def __count_requests(before, after):
+    return {service: count - before.get(service, 0) for service, count in after.items()
+            if count - before.get(service, 0)}
+
+
+def __reset():
+    """Releases pooled synthesizers and clears metrics, so every run starts cold and runs don't share state
+    """
+    text_to_speech.close_synthesizers()
+    metrics.reset()
+
+
+def __get_stages():
+    """Reads wall time and calls of every service stage the run went through from its metrics
+
+    Return:
+        ([dict]): Stage, total seconds and calls
+    """
+    return [{
+        "stage": f"{series['labels']['service']}/{series['labels']['stage']}",
+        "seconds": series['sum'],
+        "calls": series['count']
+    } for series in metrics.snapshot().get(f'{metrics.PREFIX}_stage_duration_seconds', [])]
+
+
+def __measure_once(pipeline, file_path):
+    """Runs the 'chi' command of a pipeline once. translatespeech asks for its target language on stdin
+
+    Return:
+        (dict): End-to-end seconds, stages, requests per service and utterances
+    """
+    __reset()
+    before = fakes.get_counters()
+    start = time.perf_counter()
+    with mock.patch('builtins.input', return_value=DEFAULT_TARGET_LANGUAGE):
+        commands.commands.main([*PIPELINES[pipeline][0], file_path], standalone_mode=False)
+    seconds = time.perf_counter() - start
+    requests = __count_requests(before, fakes.get_counters())
+
+    return {
+        "seconds": seconds,
+        "stages": __get_stages(),
+        "requests": requests,
+        "utterances": requests.get('speech_utterances')
+    }
+
+
+def __measure_peak_memory(pipeline, file_path):
+    tracemalloc.start()
+    try:
+        __measure_once(pipeline, file_path)
+        [_, peak] = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def __measure(pipeline, file_path, size, repeat):
+    """Runs a pipeline repeatedly over an input
+
+    Return:
+        (dict): Median wall times, requests, peak memory and throughput
+    """
+    runs = [__measure_once(pipeline, file_path) for _ in range(repeat)]
+    stages = [{
+        "stage": stage['stage'],
+        "seconds": statistics.median(
+            next((other['seconds'] for other in run['stages'] if other['stage'] == stage['stage']), 0)
+            for run in runs),
+        "calls": stage['calls']
+    } for stage in runs[0]['stages']]
+    seconds = statistics.median(run['seconds'] for run in runs)
+
+    [[unit, amount]] = size.items()
+    if runs[0]['utterances'] is not None:
+        size = {**size, "utterances": runs[0]['utterances']}
+
+    return {
+        "pipeline": pipeline,
+        "size": size,
+        "seconds": seconds,
+        "runs": [run['seconds'] for run in runs],
+        "stages": stages,
+        "requests": runs[0]['requests'],
+        "peak_memory_bytes": __measure_peak_memory(pipeline, file_path),
+        "throughput": {
+            f'{unit}_per_second': amount / seconds if seconds else None
+        }
+    }
+
+
+def __get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def __get_result_key(result):
+    return (result['pipeline'], json.dumps({unit: amount for unit, amount in result['size'].items()
+                                            if unit != 'utterances'}, sort_keys=True))
+
+
+"""
+Command fxns
+"""
+@click.group()
+def benchmarks():
+    """Offline benchmarks of the end-to-end pipelines
+    """
+    pass  # pylint: disable=unnecessary-pass
+
+
+@benchmarks.command()
+@click.option('-p', '--pipeline', 'pipelines', multiple=True, type=click.Choice(list(PIPELINES)), help='Pipelines to run. Defaults to all')
+@click.option('-d', '--document-chars', multiple=True, type=int, help='Document sizes in characters')
+@click.option('-a', '--audio-seconds', multiple=True, type=int, help='Audio lengths in seconds')
+@click.option('-n', '--repeat', default=DEFAULT_REPEAT, type=int, help='Runs per pipeline and size')
+@click.option('--latency-ms', default=fakes.DEFAULT_LATENCY_MS, type=float, help='Latency of every service request')
+@click.option('--speech-speedup', default=fakes.DEFAULT_SPEECH_SPEEDUP, type=float, help='Seconds of audio transcribed per second')
+@click.option('--utterance-seconds', default=fakes.DEFAULT_UTTERANCE_SECONDS, type=float, help='Seconds of audio per utterance')
+@click.option('-o', '--output', default='benchmark-results.json', help='Path to results file')
+@click.option('-v', '--verbose', is_flag=True, default=False, help='Show output of the pipelines')
+def run(pipelines, document_chars, audio_seconds, repeat, latency_ms, speech_speedup, utterance_seconds, output, verbose):
+    """Runs pipelines against fake services and saves results as JSON
+
+    Args:
+        pipelines ([str]): Pipelines to run
+        document_chars ([int]): Document sizes
+        audio_seconds ([int]): Audio lengths
+        repeat (int): Runs per pipeline and size
+        latency_ms (float): Latency of every service request
+        speech_speedup (float): Seconds of audio transcribed per second
+        utterance_seconds (float): Seconds of audio per utterance
+        output (str): Path to results file
+        verbose (bool): Show output of the pipelines
+    """
+    fakes.install(latency_ms, speech_speedup, utterance_seconds)
+
+    # Every run pays for its requests
+    cache.configure(enabled=False)
+    audio_cache.configure(enabled=False)
+    translation_memory.configure(enabled=False)
+
+    sizes = {
+        'document': [('document_chars', chars) for chars in document_chars or DEFAULT_DOCUMENT_CHARS],
+        'audio': [('audio_seconds', seconds) for seconds in audio_seconds or DEFAULT_AUDIO_SECONDS],
+        'video': [('audio_seconds', seconds) for seconds in audio_seconds or DEFAULT_AUDIO_SECONDS],
+    }
+    create_input = {
+        'document': __create_document,
+        'audio': __create_audio,
+        'video': __create_video,
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = {}
+        for pipeline in pipelines or list(PIPELINES):
+            kind = PIPELINES[pipeline][1]
+            for unit, amount in sizes[kind]:
+                if (kind, amount) not in inputs:
+                    inputs[(kind, amount)] = create_input[kind](directory, amount)
+
+                try:
+                    with contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO()):
+                        result = __measure(pipeline, inputs[(kind, amount)], {unit: amount}, repeat)
+                except Exception as exception:  # pylint: disable=broad-except
+                    result = {
+                        "pipeline": pipeline,
+                        "size": {unit: amount},
+                        "error": {
+                            "code": type(exception).__name__,
+                            "message": str(exception)
+                        }
+                    }
+
+                results.append(result)
+                if 'error' in result:
+                    print(f"{pipeline} {unit}={amount}: {result['error']['code']}: {result['error']['message']}")
+                else:
+                    print(f"{pipeline} {unit}={amount}: {result['seconds']:.3f}s, "
+                          f"{sum(result['requests'].values())} requests, "
+                          f"{result['peak_memory_bytes'] / 1024 / 1024:.1f} MB peak")
+
+    report = {
+        "metadata": {
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "commit": __get_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": latency_ms,
+            "speech_speedup": speech_speedup,
+            "utterance_seconds": utterance_seconds,
+            "repeat": repeat
+        },
+        "results": results
+    }
+
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(f'Results saved to {output}')
+
+
+@benchmarks.command()
+@click.argument('baseline')
+@click.argument('current')
+def compare(baseline, current):
+    """Compares end-to-end wall time, requests and peak memory of two result files
+
+    Args:
+        baseline (str): Path to results file of the baseline run
+        current (str): Path to results file of the run to compare
+    """
+    reports = []
+    for filepath in [baseline, current]:
+        with open(filepath, 'r') as file:
+            reports.append(json.load(file))
+
+    baseline_results = {__get_result_key(result): result for result in reports[0]['results'] if 'error' not in result}
+
+    for result in reports[1]['results']:
+        previous = baseline_results.get(__get_result_key(result))
+        label = f"{result['pipeline']} {' '.join(f'{unit}={amount}' for unit, amount in result['size'].items())}"
+        if 'error' in result or previous is None:
+            print(f'{label}: not comparable')
+            continue
+
+        change = (result['seconds'] - previous['seconds']) / previous['seconds'] * 100 if previous['seconds'] else 0
+        print(f"{label}: {previous['seconds']:.3f}s -> {result['seconds']:.3f}s ({change:+.1f}%), "
+              f"requests {sum(previous['requests'].values())} -> {sum(result['requests'].values())}, "
+              f"peak {previous['peak_memory_bytes'] / 1024 / 1024:.1f} MB -> "
+              f"{result['peak_memory_bytes'] / 1024 / 1024:.1f} MB")
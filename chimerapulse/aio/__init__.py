@@ -0,0 +1,10 @@
+"""Asyncio API surface for chimerapulse
+
+Mirrors the chimerapulse.core language, translator and speech entry points as coroutines built on the Azure aio
+clients and speech SDK events.
+
+Example:
+    from chimerapulse.aio import language
+
+    result = await language.language_analyzesentiment('The food was great')
+"""
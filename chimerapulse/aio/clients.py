@@ -0,0 +1,158 @@
+"""Registry of authenticated Azure aio clients shared by every chimerapulse.aio module
+
+Async sessions are bound to the event loop that created them, so clients and their pooled aiohttp sessions are
+kept per running loop. Configuration settings are shared with chimerapulse.core.clients. Every attempt of a request
+is paced by the rate limiter of its service, shared with the sync clients, and the characters of text it sends are
+metered, see chimerapulse.core.throttling and chimerapulse.core.metering.
+
+Example:
+    from chimerapulse.aio import clients
+
+    client = clients.get_text_analytics_client()
+    ...
+    await clients.close_clients()
+"""
+import asyncio
+import weakref
+
+from chimerapulse.core import clients as core_clients
+
+# Declare global variables
+loop_sessions = weakref.WeakKeyDictionary()
+loop_registry = weakref.WeakKeyDictionary()
+
+
+"""
+Private fxns
+"""
+def __get_transport(endpoint):
+    """Retrieves pooled transport for an endpoint on the running loop
+
+    Args:
+        endpoint (str): Service endpoint
+
+    Return:
+        (AioHttpTransport): Transport that doesn't own, and won't close, the pooled session
+    """
+    import aiohttp
+    from azure.core.pipeline.transport import AioHttpTransport
+
+    sessions = loop_sessions.setdefault(asyncio.get_running_loop(), {})
+    session = sessions.get(endpoint)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit_per_host=core_clients.get_pool_size())
+        session = aiohttp.ClientSession(connector=connector)
+        sessions[endpoint] = session
+
+    return AioHttpTransport(session=session, session_owner=False)
+
+
+def __get_client(kind, endpoint, factory):
+    """Retrieves client of the running loop, creating it on first use
+
+    Args:
+        kind (str): Client kind
+        endpoint (str): Service endpoint
+        factory (callable): Creates the client given a transport
+
+    Return:
+        (Any): Authenticated aio client
+    """
+    registry = loop_registry.setdefault(asyncio.get_running_loop(), {})
+    key = (kind, endpoint)
+
+    client = registry.get(key)
+    if client is None:
+        client = factory(__get_transport(endpoint))
+        registry[key] = client
+
+    return client
+
+
+"""
+Lifecycle fxns
+"""
+async def close_clients():
+    """Closes every client and session of the running loop. Clients are recreated on next use
+    """
+    loop = asyncio.get_running_loop()
+
+    for client in loop_registry.pop(loop, {}).values():
+        await client.close()
+    for session in loop_sessions.pop(loop, {}).values():
+        await session.close()
+
+
+"""
+Client fxns
+"""
+def get_text_analytics_client():
+    """Retrieves shared Azure AI Language text analytics aio client
+
+    Return:
+        (azure.ai.textanalytics.aio.TextAnalyticsClient): Authenticated client
+    """
+    from azure.core.credentials import AzureKeyCredential
+    from azure.ai.textanalytics.aio import TextAnalyticsClient
+    from chimerapulse.core.metering import MeteringPolicy
+    from chimerapulse.core.throttling import AsyncRateLimitPolicy
+
+    config = core_clients.get_settings()
+
+    return __get_client(
+        'textanalytics',
+        config['language_endpoint'],
+        lambda transport: TextAnalyticsClient(
+            endpoint=config['language_endpoint'],
+            credential=AzureKeyCredential(config['language_key']),
+            api_version=core_clients.LANGUAGE_API_VERSION,
+            transport=transport,
+            per_retry_policies=[AsyncRateLimitPolicy('language'), MeteringPolicy('language')]))
+
+
+def get_conversation_analysis_client():
+    """Retrieves shared Azure AI Language conversation analysis aio client
+
+    Return:
+        (azure.ai.language.conversations.aio.ConversationAnalysisClient): Authenticated client
+    """
+    from azure.core.credentials import AzureKeyCredential
+    from azure.ai.language.conversations.aio import ConversationAnalysisClient
+    from chimerapulse.core.metering import MeteringPolicy
+    from chimerapulse.core.throttling import AsyncRateLimitPolicy
+
+    config = core_clients.get_settings()
+
+    return __get_client(
+        'conversations',
+        config['language_endpoint'],
+        lambda transport: ConversationAnalysisClient(
+            endpoint=config['language_endpoint'],
+            credential=AzureKeyCredential(config['language_key']),
+            api_version=core_clients.LANGUAGE_API_VERSION,
+            transport=transport,
+            per_retry_policies=[AsyncRateLimitPolicy('conversations'), MeteringPolicy('language')]))
+
+
+def get_translation_client():
+    """Retrieves shared Azure AI Translator aio client
+
+    Return:
+        (azure.ai.translation.text.aio.TextTranslationClient): Authenticated client
+    """
+    from azure.ai.translation.text import TranslatorCredential
+    from azure.ai.translation.text.aio import TextTranslationClient
+    from chimerapulse.core.metering import MeteringPolicy
+    from chimerapulse.core.throttling import AsyncRateLimitPolicy
+
+    config = core_clients.get_settings()
+
+    return __get_client(
+        'translator',
+        config['translator_endpoint'],
+        lambda transport: TextTranslationClient(
+            endpoint=config['translator_endpoint'],
+            credential=TranslatorCredential(config['translator_key'], config['translator_region']),
+            api_version=core_clients.TRANSLATOR_API_VERSION,
+            transport=transport,
+            per_retry_policies=[AsyncRateLimitPolicy('translator'), MeteringPolicy('translator')]))
@@ -0,0 +1,367 @@
+"""Coroutines mirroring chimerapulse.core.language capabilities on the Azure AI Language aio clients
+
+Results use the same formatting as the synchronous batch APIs. Errors of a single document are returned as an
+'error' entry instead of raised.
+
+Example:
+    from chimerapulse.aio import language
+
+    sentiment = await language.language_analyzesentiment('The food was great')
+    sentiments = await language.language_analyzesentiment_batch(['Great', 'Awful'])
+"""
+import asyncio
+import json
+
+from azure.ai.textanalytics import AbstractiveSummaryAction, ExtractiveSummaryAction
+
+from chimerapulse.aio import clients
+from chimerapulse.core import clients as core_clients
+from chimerapulse.core.language import document_summarization
+from chimerapulse.core.language import entity_linking
+from chimerapulse.core.language import key_phrases
+from chimerapulse.core.language import limits
+from chimerapulse.core.language import named_entities
+from chimerapulse.core.language import sentiment_analysis
+from chimerapulse.core.language import text_analysis
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers import summarization as summarizationHelper
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+"""
+Private fxns
+"""
+async def __memoize(operation, text, compute, params=None):
+    """Returns cached result of an operation, awaiting compute on a miss. Shares the cache of the sync modules
+    """
+    key = cache.make_key(operation, text, params, core_clients.LANGUAGE_API_VERSION)
+
+    [value] = await cache.get_many_async([key])
+    if value is cache.MISSING:
+        value = await compute()
+        if cache.is_cacheable(value):
+            await cache.put_many_async([(key, value)])
+
+    return value
+
+
+async def __analyze_documents(operation, texts, analyze, format_result, capability, max_concurrency=None):
+    """Analyzes many documents with a text analytics capability, sending batches of uncached documents concurrently
+
+    Args:
+        operation (str): Operation name of the sync counterpart, so both share cached results
+        texts ([str]): Documents to analyze
+        analyze (coroutine fxn): Calls the service with a list of documents
+        format_result (callable): Formats a successful document result
+        capability (str): Capability name in limits.MAX_DOCUMENTS
+        max_concurrency (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Formatted result or error for every document in input order
+    """
+    keys = [cache.make_key(operation, text, api_version=core_clients.LANGUAGE_API_VERSION) for text in texts]
+    cached = await cache.get_many_async(keys)
+    missing = [index for index, value in enumerate(cached) if value is cache.MISSING]
+
+    computed = await __analyze_uncached(
+        [texts[index] for index in missing], analyze, format_result, capability, max_concurrency)
+
+    for index, value in zip(missing, computed):
+        cached[index] = value
+
+    await cache.put_many_async(
+        [(keys[index], value) for index, value in zip(missing, computed) if cache.is_cacheable(value)])
+
+    return cached
+
+
+async def __analyze_uncached(texts, analyze, format_result, capability, max_concurrency):
+    results, batches = batching.split_documents(
+        texts, limits.MAX_DOCUMENTS[capability], limits.MAX_DOCUMENT_CHARS, limits.MAX_REQUEST_CHARS)
+    semaphore = asyncio.Semaphore(max_concurrency or DEFAULT_MAX_CONCURRENCY)
+
+    async def run(batch):
+        async with semaphore:
+            try:
+                return await analyze([text for _, text in batch])
+            except Exception as exception:  # pylint: disable=broad-except
+                return exception
+
+    responses = await asyncio.gather(*[run(batch) for batch in batches])
+
+    return batching.collect_documents(results, batches, responses, format_result)
+
+
+# Actions delegating to the batch coroutine of their capability are timed as that stage, the others as their own
+@metrics.instrument('language', stage='language_pii')
+async def __recognize_pii(client, text):
+    return (await client.recognize_pii_entities(documents=[text]))[0]
+
+
+@metrics.instrument('language', stage='language_extractivesummary')
+async def __summarize_extractive(client, text):
+    poller = await client.begin_analyze_actions(documents=[text], actions=[ExtractiveSummaryAction()])
+
+    return [result async for result in await poller.result()][0][0]
+
+
+async def __run_action(client, action, text):
+    """Runs one action as its own request. Results are served from the cache when available
+
+    Return:
+        (dict): Formatted result or error
+    """
+    if action == 'sentiment':
+        return (await language_analyzesentiment_batch([text]))[0]
+    if action == 'keyphrases':
+        return (await language_keyphrases_batch([text]))[0]
+    if action == 'entities':
+        return (await language_namedentites_batch([text]))[0]
+    if action == 'linkedentities':
+        return (await language_entitylinking_batch([text]))[0]
+
+    async def compute():
+        try:
+            if action == 'pii':
+                document = await __recognize_pii(client, text)
+            else:
+                document = await __summarize_extractive(client, text)
+        except Exception as exception:  # pylint: disable=broad-except
+            return batching.exception_result(exception)
+
+        return text_analysis.format_action_result(action, document)
+
+    return await __memoize(f'language_analyzetext.{action}', text, compute)
+
+
+async def __summarize_document(document):
+    response = {}
+    client = clients.get_text_analytics_client()
+
+    poller = await client.begin_analyze_actions(
+        documents=[document],
+        actions=[
+            AbstractiveSummaryAction(),
+            ExtractiveSummaryAction()
+        ],
+    )
+
+    async for document_result in await poller.result():
+        response.update(document_summarization.format_summaries(document_result))
+
+    return response
+
+
+"""
+Text analytics coroutines
+"""
+async def language_analyzesentiment(text):
+    """Analyzes sentiment of a document
+
+    Args:
+        text (str): Document to analyze
+
+    Return:
+        (dict): Overall and per sentence sentiment, or error
+    """
+    return (await language_analyzesentiment_batch([text]))[0]
+
+
+@metrics.instrument('language')
+async def language_analyzesentiment_batch(texts, max_concurrency=None):
+    """Analyzes sentiment of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_concurrency (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Formatted result or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return await __analyze_documents(
+        'language_analyzesentiment',
+        texts,
+        lambda documents: client.analyze_sentiment(documents=documents),
+        sentiment_analysis.format_result,
+        'sentiment_analysis',
+        max_concurrency)
+
+
+async def language_keyphrases(text):
+    """Extracts key phrases of a document
+
+    Args:
+        text (str): Document to analyze
+
+    Return:
+        (dict): Key phrases, or error
+    """
+    return (await language_keyphrases_batch([text]))[0]
+
+
+@metrics.instrument('language')
+async def language_keyphrases_batch(texts, max_concurrency=None):
+    """Extracts key phrases of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_concurrency (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Formatted result or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return await __analyze_documents(
+        'language_keyphrases',
+        texts,
+        lambda documents: client.extract_key_phrases(documents=documents),
+        key_phrases.format_result,
+        'key_phrases',
+        max_concurrency)
+
+
+async def language_namedentites(text):
+    """Recognizes named entities of a document
+
+    Args:
+        text (str): Document to analyze
+
+    Return:
+        (dict): Named entities, or error
+    """
+    return (await language_namedentites_batch([text]))[0]
+
+
+@metrics.instrument('language')
+async def language_namedentites_batch(texts, max_concurrency=None):
+    """Recognizes named entities of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_concurrency (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Formatted result or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return await __analyze_documents(
+        'language_namedentites',
+        texts,
+        lambda documents: client.recognize_entities(documents=documents),
+        named_entities.format_result,
+        'named_entities',
+        max_concurrency)
+
+
+async def language_entitylinking(text):
+    """Links entities of a document
+
+    Args:
+        text (str): Document to analyze
+
+    Return:
+        (dict): Linked entities, or error
+    """
+    return (await language_entitylinking_batch([text]))[0]
+
+
+@metrics.instrument('language')
+async def language_entitylinking_batch(texts, max_concurrency=None):
+    """Links entities of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_concurrency (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Formatted result or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return await __analyze_documents(
+        'language_entitylinking',
+        texts,
+        lambda documents: client.recognize_linked_entities(documents=documents),
+        entity_linking.format_result,
+        'entity_linking',
+        max_concurrency)
+
+
+async def language_analyzetext(text, actions=None):
+    """Runs several language capabilities over the same text, all requests in flight at the same time
+
+    Args:
+        text (str): Text to analyze
+        actions ([str]): Actions to run. Defaults to sentiment, key phrases, named entities and entity linking
+
+    Return:
+        (dict): Formatted result or error keyed by action
+    """
+    actions = text_analysis.validate_actions(actions)
+    client = clients.get_text_analytics_client()
+
+    results = await asyncio.gather(*[__run_action(client, action, text) for action in actions])
+
+    return dict(zip(actions, results))
+
+
+"""
+Summarization coroutines
+"""
+@metrics.instrument('language')
+async def language_summarizedocument(document):
+    """Summarizes a document
+
+    Args:
+        document (str): Document to summarize
+
+    Return:
+        (dict): Abstractive and extractive summaries
+    """
+    return await __memoize('language_summarizedocument', document, lambda: __summarize_document(document))
+
+
+@metrics.instrument('language')
+async def language_summarizeconversation(tasks, conversation_items):
+    """Summarizes a conversation
+
+    Args:
+        tasks (str|[str]): Summary aspects, or 'all'
+        conversation_items ([dict]): Conversation items
+
+    Return:
+        (dict): Summary text keyed by aspect
+    """
+    client = clients.get_conversation_analysis_client()
+    tasks_obj = summarizationHelper.create_tasks(tasks)
+    conversation_contents = json.dumps(conversation_items)
+
+    async def analyze():
+        poller = await client.begin_conversation_analysis(
+            task={
+                "displayName": "Analyze conversations from xxx",
+                "analysisInput": {
+                    "conversations": [{
+                        "conversationItems": conversation_items,
+                        "modality": "text",
+                        "id": "conversation1",
+                        "language": "en"
+                    }],
+                },
+                "tasks": tasks_obj
+            }
+        )
+
+        return await poller.result()
+
+    result = await __memoize(
+        'language_summarizeconversation', conversation_contents, analyze, params={'tasks': tasks_obj})
+
+    return summarizationHelper.parse_summaries(result).get('conversation1', {})
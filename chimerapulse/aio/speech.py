@@ -0,0 +1,268 @@
+"""Coroutines mirroring chimerapulse.core.speech capabilities on the Azure speech SDK
+
+Speech SDK events are bridged onto the running event loop, so a transcription or synthesis in progress doesn't
+hold a thread of its own. Synthesis shares the synthesizer pool and audio cache of
+chimerapulse.core.speech.text_to_speech. Sessions and syntheses wait for the rate limiter of their service, shared
+with the sync modules, without blocking the event loop.
+
+Example:
+    from chimerapulse.aio import speech
+
+    async for conversation_item in speech.speech_diarization_stream('call.wav'):
+        ...
+"""
+import asyncio
+import threading
+import time
+
+# Import Azure speech SDK
+import azure.cognitiveservices.speech as speechsdk
+
+from chimerapulse.core import clients
+from chimerapulse.core.speech import diarization
+from chimerapulse.core.speech import language_identification
+from chimerapulse.core.speech import text_to_speech
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers import rate_limit
+from chimerapulse.helpers import segmentation
+
+
+"""
+Private fxns
+"""
+async def __wait(result_future):
+    """Waits for a speech SDK ResultFuture without blocking the event loop
+
+    Args:
+        result_future (ResultFuture): Speech SDK future
+
+    Return:
+        (Any): Future result
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, result_future.get)
+
+
+def __resolve(loop, future, result=None, exception=None):
+    """Resolves an asyncio future from a speech SDK callback thread
+    """
+    def resolve():
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    loop.call_soon_threadsafe(resolve)
+
+
+async def __speak(synthesizer, text):
+    """Speaks text on a pooled synthesizer. The result is resolved by the synthesizer's events, so no thread waits
+    for the synthesis
+
+    Return:
+        (SpeechSynthesisResult): Synthesis result, completed or canceled
+    """
+    loop = asyncio.get_running_loop()
+    spoken = loop.create_future()
+    speech_synthesizer = synthesizer[0]
+
+    speech_synthesizer.synthesis_completed.connect(lambda evt: __resolve(loop, spoken, evt.result))
+    speech_synthesizer.synthesis_canceled.connect(lambda evt: __resolve(loop, spoken, evt.result))
+    try:
+        speech_synthesizer.speak_text_async(text)
+        return await spoken
+    finally:
+        # The synthesizer goes back to the pool, so its next utterance must not resolve this one
+        speech_synthesizer.synthesis_completed.disconnect_all()
+        speech_synthesizer.synthesis_canceled.disconnect_all()
+
+
+"""
+Speech coroutines
+"""
+@metrics.instrument('speech')
+async def speech_diarization_stream(filepath, source_language='en-US', max_queue=diarization.DEFAULT_QUEUE_SIZE):
+    """Diarizes an audio file with mono channel, yielding each conversation item as soon as it is transcribed
+
+    Args:
+        filepath (str): Path to conversation audio file
+        source_language (str): Source language of audio
+        max_queue (int): Maximum transcribed utterances waiting for the consumer
+
+    Yield:
+        (dict): Conversation item
+    """
+    loop = asyncio.get_running_loop()
+    results = asyncio.Queue(maxsize=max_queue)
+    closed = threading.Event()
+    throttled = threading.Event()
+    stopped = object()
+    # End of the last transcribed utterance, in ticks, the audio the service got through
+    recognized = {'end': 0}
+
+    speech_config = clients.get_speech_config()
+    speech_config.speech_recognition_language = source_language
+    audio_config = speechsdk.audio.AudioConfig(filename=filepath)
+    conversation_transcriber = speechsdk.transcription.ConversationTranscriber(
+        speech_config=speech_config, audio_config=audio_config)
+
+    def put(item):
+        # Blocks the callback thread while the queue is full, pausing the transcriber
+        if not closed.is_set():
+            asyncio.run_coroutine_threadsafe(results.put(item), loop).result()
+
+    def transcribed_cb(evt: speechsdk.SpeechRecognitionEventArgs):
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            recognized['end'] = max(recognized['end'], evt.result.offset + evt.result.duration)
+            put(evt.result)
+
+    def canceled_cb(evt: speechsdk.SessionEventArgs):
+        cancellation_details = evt.cancellation_details
+        if cancellation_details.reason == speechsdk.CancellationReason.Error:
+            if cancellation_details.error_code == speechsdk.CancellationErrorCode.TooManyRequests:
+                throttled.set()
+                rate_limit.throttle('speech')
+            put(ValueError(f'Transcription canceled: {cancellation_details.error_details}'))
+        else:
+            put(stopped)
+
+    conversation_transcriber.transcribed.connect(transcribed_cb)
+    conversation_transcriber.session_stopped.connect(lambda evt: put(stopped))
+    conversation_transcriber.canceled.connect(canceled_cb)
+
+    # The session holds a slot of the speech concurrency limit until it stops
+    await rate_limit.acquire_async('speech')
+    try:
+        await __wait(conversation_transcriber.start_transcribing_async())
+    except BaseException:
+        rate_limit.release('speech', False)
+        raise
+
+    try:
+        item_id = 0
+        while True:
+            result = await results.get()
+            if result is stopped:
+                break
+            if isinstance(result, Exception):
+                raise result
+
+            item_id += 1
+            yield diarization.create_conversation_item(result, item_id)
+    finally:
+        # Unblock a callback waiting for room so the transcriber can stop
+        closed.set()
+        while not results.empty():
+            results.get_nowait()
+
+        try:
+            await __wait(conversation_transcriber.stop_transcribing_async())
+        finally:
+            rate_limit.release('speech', not throttled.is_set())
+            metrics.record_audio('speech', 'transcription', recognized['end'] / segmentation.TICKS_PER_SECOND)
+
+
+async def speech_diarization(filepath, source_language='en-US'):
+    """Diarizes an audio file with mono channel
+
+    Args:
+        filepath (str): Path to conversation audio file
+        source_language (str): Source language of audio
+
+    Return:
+        ([dict]): Conversation items
+    """
+    return [item async for item in speech_diarization_stream(filepath, source_language)]
+
+
+@metrics.instrument('speech')
+async def speech_identifylanguage(audio_file_path, languages=None):
+    """Detects spoken language of an audio file
+
+    Args:
+        audio_file_path (str): Path to audio file
+        languages ([str]): Candidate languages
+
+    Return:
+        [detected_language(str), result(obj)]: Detected language and result object
+    """
+    loop = asyncio.get_running_loop()
+    recognized = loop.create_future()
+
+    auto_detect_source_language_config = speechsdk.languageconfig.AutoDetectSourceLanguageConfig(
+        languages=languages or language_identification.DEFAULT_LANGUAGES)
+    speech_recognizer = speechsdk.SpeechRecognizer(
+        speech_config=clients.get_speech_config(),
+        auto_detect_source_language_config=auto_detect_source_language_config,
+        audio_config=speechsdk.audio.AudioConfig(filename=audio_file_path))
+
+    def canceled_cb(evt: speechsdk.SpeechRecognitionCanceledEventArgs):
+        if evt.result.cancellation_details.error_code == speechsdk.CancellationErrorCode.TooManyRequests:
+            rate_limit.throttle('speech')
+        error_details = evt.result.cancellation_details.error_details
+        __resolve(loop, recognized, exception=ValueError(f'Recognition canceled: {error_details}'))
+
+    speech_recognizer.recognized.connect(lambda evt: __resolve(loop, recognized, evt.result))
+    speech_recognizer.canceled.connect(canceled_cb)
+
+    await rate_limit.acquire_async('speech')
+    succeeded = False
+    try:
+        speech_recognizer.recognize_once_async()
+        result = await recognized
+        succeeded = True
+    finally:
+        # Recognition lasts as long as the speech, so its duration isn't a congestion signal
+        rate_limit.release('speech', succeeded)
+
+    # Single-shot recognition stops at the end of the first utterance
+    metrics.record_audio(
+        'speech', 'language_identification', (result.offset + result.duration) / segmentation.TICKS_PER_SECOND)
+
+    if not result.text:
+        raise ValueError('Result empty. Check if audio contains speech.')
+
+    return [speechsdk.AutoDetectSourceLanguageResult(result).language, result]
+
+
+@metrics.instrument('speech')
+async def synthesizeText(targetLanguage, translatedObjText):
+    """Synthesizes text with the voice of the target language on the default speaker, on a pooled synthesizer.
+    Cached prompts are played locally without calling the speech service
+
+    Args:
+        targetLanguage (str): Target language
+        translatedObjText (str): Text to synthesize
+
+    Return:
+        (SpeechSynthesisResult): Synthesis result, or None if a cached prompt was played
+    """
+    audio_file_path = text_to_speech.get_cached_audio_file(targetLanguage, translatedObjText)
+    if audio_file_path is not None:
+        from playsound import playsound
+
+        playsound(audio_file_path, block=False)
+        return None
+
+    synthesizer = text_to_speech.get_synthesizer(targetLanguage)
+    metrics.record_characters('speech', 'synthesis', len(translatedObjText))
+    await rate_limit.acquire_async('speech_synthesis')
+    start = time.perf_counter()
+    succeeded = False
+    try:
+        result = await __speak(synthesizer, translatedObjText)
+
+        if text_to_speech.is_throttled(result):
+            rate_limit.throttle('speech_synthesis')
+        else:
+            succeeded = True
+    finally:
+        # Synthesis time grows with the text, so it is only compared with texts of similar length
+        rate_limit.release(
+            'speech_synthesis', succeeded, time.perf_counter() - start, len(translatedObjText).bit_length())
+        text_to_speech.release_synthesizer(targetLanguage, synthesizer)
+
+    text_to_speech.cache_audio(targetLanguage, translatedObjText, result)
+
+    return result
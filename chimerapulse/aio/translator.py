@@ -0,0 +1,50 @@
+"""Coroutines mirroring chimerapulse.core.translator capabilities on the Azure AI Translator aio client
+
+Example:
+    from chimerapulse.aio import speech, translator
+
+    translation = await translator.translator_translatetext('en', 'fil', 'Hello, goodmorning')
+    await speech.synthesizeText('fil', translation)
+"""
+from azure.ai.translation.text.models import InputTextItem
+
+from chimerapulse.aio import clients
+from chimerapulse.core import clients as core_clients
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import metrics
+
+
+@metrics.instrument('translator')
+async def translator_translatetext(source_language, target_language, content):
+    """Translate content from source to target language
+
+    Args:
+        source_language (str): Source language
+        target_language (str): Language to translate to
+        content (str): Text to be translated
+
+    Return:
+        (str): Translated text
+    """
+    key = cache.make_key(
+        'translator_translatetext',
+        content,
+        {'from': source_language, 'to': target_language},
+        core_clients.TRANSLATOR_API_VERSION)
+
+    [translatedobj] = await cache.get_many_async([key])
+    if translatedobj is cache.MISSING:
+        client = clients.get_translation_client()
+
+        response = await client.translate(
+            content=[InputTextItem(text=content)], to=[target_language], from_parameter=source_language)
+
+        # Only one translation object per utterance
+        translation = response[0].translations[0]
+        translatedobj = {
+            "to": translation.to,
+            "text": translation.text
+        }
+        await cache.put_many_async([(key, translatedobj)])
+
+    return translatedobj['text']
@@ -4,26 +4,26 @@ Example:
     python -m <module_dir_path> <args>
     chi <module> <args>
 """
+import json
+from concurrent.futures import ThreadPoolExecutor
+
 import click
 
 # Import ChimeraPulse modules
 from chimerapulse.core.language import conversation_summarization
 # from chimerapulse.core.language import document_summarization
-from chimerapulse.core.language import key_phrases
-from chimerapulse.core.language import named_entities
-from chimerapulse.core.language import sentiment_analysis
-from chimerapulse.core.language import entity_linking
+from chimerapulse.core.language import text_analysis
 from chimerapulse.core.speech import diarization
 from chimerapulse.core.speech import language_identification
+from chimerapulse.core.speech import text_to_speech
 from chimerapulse.core.speech import video_transcription
 from chimerapulse.core.translator import text_translator
 
 # Import helper fxns
 # from chimerapulse.helpers import summarization as summarizationHelper
+from chimerapulse.helpers import batch as batchHelper
 from chimerapulse.helpers import chimerapulse_helper
 
-# TODO: create fxn to run post call processing per chunk of transcription received
-
 
 @click.command()
 @click.option('-p', '--file-path', callback=language_identification.get_audio_file_path, flag_value='flag', is_flag=False, default=None, help='Path to audio file')
@@ -36,27 +36,24 @@ def translatespeech(file_path: str):
         "hi = Hindi\n"
         "ko = Korean\n"
         "ms = Malaysia\n").lower()
+
+    # Open the synthesizer connection while the language is identified and the text translated
+    text_to_speech.warm_synthesizers([targetLanguage])
     
     print('\n')
       
     # Identify language from list and transcribe audio
     [source_language, result] = language_identification.speech_identifylanguage(file_path)
 
-    # Translate text
-    text_translator.translator_translatetext(source_language, targetLanguage, result.text)
-    
-    # Analyze Sentiment
-    print(sentiment_analysis.language_analyzesentiment(result.text))
-    
-    # Extract Key Phrases
-    print(key_phrases.language_keyphrases(result.text))
-    
-    # Named Entity Recognition
-    print(named_entities.language_namedentites(result.text))
-    
-    # Entity Linking
-    print(entity_linking.language_entitylinking(result.text))
-    
+    # Analyze sentiment, key phrases, named entities and linked entities in the background while translating
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        analysis = executor.submit(text_analysis.language_analyzetext, result.text)
+
+        # Translate text
+        text_translator.translator_translatetext(source_language, targetLanguage, result.text)
+
+    print(json.dumps(analysis.result(), indent=2))
+
     print('\n')
 
     print('--fin--')
@@ -66,14 +63,19 @@ def translatespeech(file_path: str):
 # TODO: change callback validation. See translatespeech fxn
 @click.command()
 @click.option('-p', '--file-path', callback=language_identification.get_audio_file_path, flag_value='flag', is_flag=False, default=None, help='Path to audio file')
-def convosummarization(file_path):
+@click.option('-r', '--rolling', flag_value=True, is_flag=True, default=False, help='Summarize while transcribing')
+def convosummarization(file_path, rolling):
     """Diarize audio with mono channel and summarize conversation
 
     Args:
         file_path (str): Path to conversation audio file
+        rolling (bool): Summarize while transcribing
     """
-    diarization_result = diarization.speech_diarization(file_path)
-    conversation_summarization.language_summarizeconversation('all', diarization_result)
+    if rolling:
+        chimerapulse_helper.rolling_convosummarization_helper(diarization.speech_diarization_stream(file_path))
+    else:
+        diarization_result = diarization.speech_diarization(file_path)
+        conversation_summarization.language_summarizeconversation('all', diarization_result, verbose=True)
 
     print('--fin--')
 
@@ -97,14 +99,65 @@ def docsummarization(file_path):
 @click.command()
 @click.option('-p', '--file-path', callback=video_transcription.get_video_file_path, flag_value='flag', is_flag=False, default=None, help='Path to video file')
 @click.option('-d', '--detect-language', flag_value=True, is_flag=True, default=False, help='Detect language')
-def summarizevideoconvo(file_path, detect_language):
+@click.option('-r', '--rolling', flag_value=True, is_flag=True, default=False, help='Summarize while transcribing')
+def summarizevideoconvo(file_path, detect_language, rolling):
     """Video convo summarization
 
     Args:
         file_path (str): Path to conversation audio file
+        rolling (bool): Summarize while transcribing
+    """
+    [conversation_items, _] = video_transcription.speech_videotranscription(file_path, detect_language)
+    if rolling:
+        chimerapulse_helper.rolling_convosummarization_helper(conversation_items)
+    else:
+        conversation_summarization.language_summarizeconversation(
+            'all', json.dumps(list(conversation_items)), verbose=True)
+
+    print('--fin--')
+
+
+@click.command()
+@click.argument('sources', nargs=-1)
+@click.option('-P', '--pipeline', required=True, type=click.Choice(list(batchHelper.PIPELINES)), help='Pipeline run over each input')
+@click.option('-m', '--manifest', default=None, help='Path to file listing one input per line')
+@click.option('-o', '--output-dir', default='batch-results', help='Directory of result files and checkpoint')
+@click.option('-j', '--jobs', default=None, type=int, help='Inputs processed at the same time. Defaults to the number of CPUs')
+@click.option('-c', '--checkpoint', default=None, help='Path to checkpoint file. Defaults to checkpoint.jsonl in the output directory')
+@click.option('-t', '--target-language', default=None, help='Target language of translatespeech')
+@click.option('-d', '--detect-language', flag_value=True, is_flag=True, default=False, help='Detect language of summarizevideoconvo')
+def batch(sources, pipeline, manifest, output_dir, jobs, checkpoint, target_language, detect_language):
+    """Runs a pipeline over many files in parallel. Rerunning the same command resumes an interrupted run
+
+    Args:
+        sources ([str]): Files, directories or glob patterns
+        pipeline (str): Pipeline name
+        manifest (str): Path to file listing one input per line
+        output_dir (str): Directory of result files and checkpoint
+        jobs (int): Inputs processed at the same time
+        checkpoint (str): Path to checkpoint file
+        target_language (str): Target language of translatespeech
+        detect_language (bool): Detect language of summarizevideoconvo
     """
-    [audio_filepath, source_language] = video_transcription.speech_videotranscription(file_path, detect_language)
-    diarization_result = diarization.speech_diarization(audio_filepath, source_language)
-    conversation_summarization.language_summarizeconversation('all', diarization_result)
+    if pipeline == 'translatespeech' and not target_language:
+        raise ValueError('ERROR: -t/--target-language is required by the translatespeech pipeline. Exiting...')
+
+    inputs = batchHelper.collect_inputs(sources, pipeline, manifest)
+    if not inputs:
+        raise ValueError('ERROR: No input files were provided. Exiting...')
+
+    options = {
+        'target_language': target_language,
+        'detect_language': detect_language,
+    }
+
+    counts = {}
+    for count, record in enumerate(batchHelper.run_batch(pipeline, inputs, output_dir, jobs, options, checkpoint), start=1):
+        counts[record['status']] = counts.get(record['status'], 0) + 1
+        print(f"[{count}/{len(inputs)}] {record['status']}: {record['input']}")
+        if 'error' in record:
+            print(f"    {record['error']['code']}: {record['error']['message']}")
+
+    print(', '.join(f'{status}: {total}' for status, total in counts.items()))
 
     print('--fin--')
@@ -12,25 +12,47 @@ Example:
     chi <module> <args>
     chimerapulse <module> <args>
 """    
+import sys
+
 import click
 
-from chimerapulse import chimerapulse
-from chimerapulse.core.language import language
-from chimerapulse.core.speech import speech
-from chimerapulse.core.translator import translator
-
-@click.group()
-def commands():
-    pass
-
-# TODO: Change "main" to more appropriate name
-# ChimeraPulse main commands
-commands.add_command(chimerapulse.translatespeech)
-commands.add_command(chimerapulse.convosummarization)
-commands.add_command(chimerapulse.docsummarization)
-commands.add_command(chimerapulse.summarizevideoconvo)
-
-# ChimeraPulse core capabilities
-commands.add_command(language.language)
-commands.add_command(speech.speech)
-commands.add_command(translator.translator)
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers.lazy_group import LazyGroup
+
+
+def __close_pools():
+    """Releases pooled service connections of the modules the invoked command loaded
+    """
+    clients = sys.modules.get('chimerapulse.core.clients')
+    if clients is not None:
+        clients.close_clients()
+
+    text_to_speech = sys.modules.get('chimerapulse.core.speech.text_to_speech')
+    if text_to_speech is not None:
+        text_to_speech.close_synthesizers()
+
+
+# Commands are imported only when invoked, so startup doesn't load every service SDK
+@click.group(cls=LazyGroup, lazy_commands={
+    # TODO: Change "main" to more appropriate name
+    # ChimeraPulse main commands
+    'translatespeech': ['chimerapulse.chimerapulse:translatespeech', 'Identify, translate and synthesize speech of an audio file'],
+    'convosummarization': ['chimerapulse.chimerapulse:convosummarization', 'Diarize audio with mono channel and summarize conversation'],
+    'docsummarization': ['chimerapulse.chimerapulse:docsummarization', 'Document summarization'],
+    'summarizevideoconvo': ['chimerapulse.chimerapulse:summarizevideoconvo', 'Video convo summarization'],
+    'batch': ['chimerapulse.chimerapulse:batch', 'Runs a pipeline over many files in parallel'],
+
+    # ChimeraPulse core capabilities
+    'language': ['chimerapulse.core.language.language:language', 'Azure Language Service capabilities'],
+    'speech': ['chimerapulse.core.speech.speech:speech', 'Azure Speech Service capabilities'],
+    'translator': ['chimerapulse.core.translator.translator:translator', 'Azure Translator capabilities'],
+})
+@click.option('--metrics', 'metrics_path', default=None,
+              help='Write latency and volume metrics of service calls to this file once the command finishes. JSON if it ends with .json, otherwise Prometheus text format')
+@click.pass_context
+def commands(ctx, metrics_path):
+    # Release pooled service connections once the invoked command finishes
+    ctx.call_on_close(__close_pools)
+
+    if metrics_path:
+        ctx.call_on_close(lambda: metrics.dump(metrics_path))
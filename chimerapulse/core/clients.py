@@ -0,0 +1,252 @@
+"""Process-wide registry of authenticated Azure clients shared by every chimerapulse.core module
+
+Clients are created once per service endpoint and reused across calls. Every HTTP based client draws from a
+pooled, keep-alive requests session owned by the registry, so repeated calls don't pay for new TLS handshakes
+or pipeline construction. Every attempt of a request is paced by the rate limiter of its service, see
+chimerapulse.helpers.rate_limit, and the characters of text it sends are metered, see chimerapulse.core.metering.
+
+Reference:
+    Azure Core transports: https://learn.microsoft.com/en-us/python/api/azure-core/azure.core.pipeline.transport
+
+Configuration:
+    CHIMERAPULSE_POOL_SIZE: Maximum number of keep-alive connections per endpoint (default: 10)
+
+Example:
+    from chimerapulse.core import clients
+
+    client = clients.get_text_analytics_client()
+    ...
+    clients.close_clients()
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+DEFAULT_POOL_SIZE = 10
+
+# Service API versions. Pinned so cached results can't outlive a service contract change
+LANGUAGE_API_VERSION = '2023-04-01'
+TRANSLATOR_API_VERSION = '3.0'
+
+# Declare global variables
+pool_size = None
+settings = None
+sessions = {}
+registry = {}
+lock = threading.RLock()
+
+
+"""
+Private fxns
+"""
+def __get_transport(endpoint):
+    """Retrieves pooled transport for an endpoint. One keep-alive session is shared by every client of the endpoint
+
+    Args:
+        endpoint (str): Service endpoint
+
+    Return:
+        (RequestsTransport): Transport that doesn't own, and won't close, the pooled session
+    """
+    import requests
+    from azure.core.pipeline.transport import RequestsTransport
+
+    session = sessions.get(endpoint)
+    if session is None:
+        size = get_pool_size()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        sessions[endpoint] = session
+
+    return RequestsTransport(session=session, session_owner=False)
+
+
+def __get_client(kind, endpoint, factory):
+    """Retrieves client from registry, creating it on first use
+
+    Args:
+        kind (str): Client kind
+        endpoint (str): Service endpoint
+        factory (callable): Creates the client given a transport
+
+    Return:
+        (Any): Authenticated client
+    """
+    key = (kind, endpoint)
+    client = registry.get(key)
+    if client is not None:
+        return client
+
+    with lock:
+        client = registry.get(key)
+        if client is None:
+            client = factory(__get_transport(endpoint))
+            registry[key] = client
+
+    return client
+
+
+"""
+Configuration fxns
+"""
+def get_settings():
+    """Reads service configuration settings from env vars once per process
+
+    Return:
+        (dict): Configuration settings
+    """
+    global settings
+
+    if settings is None:
+        # Load env vars
+        load_dotenv()
+
+        settings = {
+            'language_endpoint': os.getenv('TRANSLATOR_SERVICE_ENDPOINT'),
+            'language_key': os.getenv('TRANSLATOR_SERVICE_KEY'),
+            'translator_endpoint': os.getenv('TRANSLATOR_SERVICE_ENDPOINT'),
+            'translator_key': os.getenv('TRANSLATOR_SERVICE_KEY'),
+            'translator_region': os.getenv('TRANSLATOR_SERVICE_REGION'),
+            'speech_key': os.getenv('SPEECH_SERVICE_KEY'),
+            'speech_region': os.getenv('SPEECH_SERVICE_REGION'),
+        }
+
+    return settings
+
+
+def get_pool_size():
+    """Retrieves maximum number of keep-alive connections per endpoint
+
+    Return:
+        (int): Pool size
+    """
+    global pool_size
+
+    if pool_size is None:
+        pool_size = int(os.getenv('CHIMERAPULSE_POOL_SIZE', DEFAULT_POOL_SIZE))
+
+    return pool_size
+
+
+"""
+Lifecycle fxns
+"""
+def configure(size=None):
+    """Configures the registry. Must be called before the first client is created to take effect
+
+    Args:
+        size (int): Maximum number of keep-alive connections per endpoint
+    """
+    global pool_size
+
+    with lock:
+        pool_size = size
+
+
+def close_clients():
+    """Closes every pooled client and connection. Clients are recreated on next use
+    """
+    global settings
+
+    with lock:
+        for client in registry.values():
+            client.close()
+        for session in sessions.values():
+            session.close()
+
+        registry.clear()
+        sessions.clear()
+        settings = None
+
+
+"""
+Client fxns
+"""
+def get_text_analytics_client():
+    """Retrieves shared Azure AI Language text analytics client
+
+    Return:
+        (TextAnalyticsClient): Authenticated client
+    """
+    from azure.core.credentials import AzureKeyCredential
+    from azure.ai.textanalytics import TextAnalyticsClient
+    from chimerapulse.core.metering import MeteringPolicy
+    from chimerapulse.core.throttling import RateLimitPolicy
+
+    config = get_settings()
+
+    return __get_client(
+        'textanalytics',
+        config['language_endpoint'],
+        lambda transport: TextAnalyticsClient(
+            endpoint=config['language_endpoint'],
+            credential=AzureKeyCredential(config['language_key']),
+            api_version=LANGUAGE_API_VERSION,
+            transport=transport,
+            per_retry_policies=[RateLimitPolicy('language'), MeteringPolicy('language')]))
+
+
+def get_conversation_analysis_client():
+    """Retrieves shared Azure AI Language conversation analysis client
+
+    Return:
+        (ConversationAnalysisClient): Authenticated client
+    """
+    from azure.core.credentials import AzureKeyCredential
+    from azure.ai.language.conversations import ConversationAnalysisClient
+    from chimerapulse.core.metering import MeteringPolicy
+    from chimerapulse.core.throttling import RateLimitPolicy
+
+    config = get_settings()
+
+    return __get_client(
+        'conversations',
+        config['language_endpoint'],
+        lambda transport: ConversationAnalysisClient(
+            endpoint=config['language_endpoint'],
+            credential=AzureKeyCredential(config['language_key']),
+            api_version=LANGUAGE_API_VERSION,
+            transport=transport,
+            per_retry_policies=[RateLimitPolicy('conversations'), MeteringPolicy('language')]))
+
+
+def get_translation_client():
+    """Retrieves shared Azure AI Translator client
+
+    Return:
+        (TextTranslationClient): Authenticated client
+    """
+    from azure.ai.translation.text import TextTranslationClient, TranslatorCredential
+    from chimerapulse.core.metering import MeteringPolicy
+    from chimerapulse.core.throttling import RateLimitPolicy
+
+    config = get_settings()
+
+    return __get_client(
+        'translator',
+        config['translator_endpoint'],
+        lambda transport: TextTranslationClient(
+            endpoint=config['translator_endpoint'],
+            credential=TranslatorCredential(config['translator_key'], config['translator_region']),
+            api_version=TRANSLATOR_API_VERSION,
+            transport=transport,
+            per_retry_policies=[RateLimitPolicy('translator'), MeteringPolicy('translator')]))
+
+
+def get_speech_config():
+    """Creates speech config from cached settings.
+
+    SpeechConfig is mutated per call (recognition language, voice name) so a new object is returned every time.
+    It holds no connection, so it is cheap to create.
+
+    Return:
+        (SpeechConfig): Speech client configuration
+    """
+    import azure.cognitiveservices.speech as speechsdk
+
+    config = get_settings()
+
+    return speechsdk.SpeechConfig(config['speech_key'], config['speech_region'])
@@ -6,40 +6,34 @@ List of supported languages for conversation summarization:
 Example:
     python -m chimerapulse.core.language summarizeconversation -p <args>
     chi language summarizeconversation -p
+
+    for summary in conversation_summarization.language_summarizeconversation_rolling('all', conversation_items):
+        ...
+
+    summaries = conversation_summarization.language_summarizeconversation_batch('all', [conversation_items, ...])
 """
 import ast
 import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
-
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.language.conversations import ConversationAnalysisClient
 
 # Import helper fxns
+from chimerapulse.core import clients
+from chimerapulse.core import polling
+from chimerapulse.core.language import limits
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import lro
+from chimerapulse.helpers import metrics
 from chimerapulse.helpers import summarization as summarizationHelper
 
-# Load env vars
-load_dotenv()
-
-
-def __authenticate_client():
-    """Authenticate service
-
-    Returns:
-        (TextTranslationClient): Authenticated client
-    """
-    # Get Configuration Settings
-    languageendpoint = os.getenv('TRANSLATOR_SERVICE_ENDPOINT')
-    languagekey = os.getenv('TRANSLATOR_SERVICE_KEY')
-
-    credential = AzureKeyCredential(languagekey)
-    conversational_analysis_client = ConversationAnalysisClient(
-            endpoint=languageendpoint, 
-            credential=credential)
-    return conversational_analysis_client
+# Conversation items collected before a rolling summary is requested
+DEFAULT_WINDOW_ITEMS = 20
 
 
 """
@@ -90,46 +84,288 @@ def summarizeconversation(tasks, conversation_items, conversation_file_path):
     """
     task_document_contents = get_conversation_file_path(conversation_items, conversation_file_path)
     # language_summarizeconversation(tasks, json.loads(task_document_contents))
-    language_summarizeconversation(tasks, task_document_contents)
+    language_summarizeconversation(tasks, task_document_contents, verbose=True)
+
+
+def __start_conversations(tasks_obj, conversations):
+    """Starts one analysis job over many conversations, polled on the shared loop. Conversations are identified by
+    their position, starting at conversation1
+
+    Args:
+        tasks_obj ([dict]): Summarization tasks
+        conversations ([[dict]]): Conversation items of each conversation
+
+    Return:
+        (Future): Resolves to the job result
+    """
+    client = clients.get_conversation_analysis_client()
+
+    return polling.track(lambda polling_method: client.begin_conversation_analysis(
+        task = {
+            "displayName": "Analyze conversations from xxx",
+            "analysisInput": {
+                "conversations": [{
+                    "conversationItems": conversation_items,
+                    "modality": "text",
+                    "id": f"conversation{position}",
+                    "language": "en"
+                } for position, conversation_items in enumerate(conversations, start=1)],
+            },
+            "tasks": tasks_obj
+        },
+        polling=polling_method
+    ))
+
+
+def __analyze_conversations(tasks_obj, conversations):
+    return __start_conversations(tasks_obj, conversations).result()
+
+
+def __analyze_conversation(tasks_obj, task_document_contents):
+    return __analyze_conversations(tasks_obj, [json.loads(task_document_contents)])
+
+
+def __count_conversation_chars(conversation_items):
+    return sum(len(conversation_item.get('text') or '') for conversation_item in conversation_items)
+
+
+def __summarize_conversations(tasks_obj, contents, max_workers):
+    """Summarizes many conversations, packed into as few jobs as the service limits allow
+
+    Args:
+        tasks_obj ([dict]): Summarization tasks
+        contents ([str]): Conversation items of each conversation as JSON
+        max_workers (int): Maximum jobs started at the same time
+
+    Return:
+        ([dict]): Summary text keyed by aspect, or error, for every conversation in input order
+    """
+    results = [None] * len(contents)
+    pending = []
+
+    for index, content in enumerate(contents):
+        conversation_items = json.loads(content)
+        if __count_conversation_chars(conversation_items) > limits.MAX_SUMMARIZATION_CONVERSATION_CHARS:
+            results[index] = batching.error_result(
+                'InvalidDocument',
+                f'Conversation exceeds the limit of {limits.MAX_SUMMARIZATION_CONVERSATION_CHARS} characters.')
+        else:
+            pending.append((index, conversation_items))
+
+    batches = batching.split_batches(
+        pending,
+        limits.MAX_SUMMARIZATION_CONVERSATIONS,
+        limits.MAX_SUMMARIZATION_CONVERSATION_CHARS,
+        __count_conversation_chars)
+    # Jobs are all started before waiting on any, and polled together on the shared loop
+    started = batching.dispatch(lambda conversations: __start_conversations(tasks_obj, conversations),
+                                batches, max_workers)
+    responses = [response if isinstance(response, Exception) else lro.results([response])[0] for response in started]
+
+    for batch, response in zip(batches, responses):
+        if isinstance(response, Exception):
+            for index, _ in batch:
+                results[index] = batching.exception_result(response)
+            continue
+
+        summaries = summarizationHelper.parse_summaries(
+            response, [f'conversation{position}' for position in range(1, len(batch) + 1)])
+        for position, (index, _) in enumerate(batch, start=1):
+            results[index] = summaries.get(f'conversation{position}') or \
+                batching.error_result('MissingResult', 'Conversation is missing from the job result.')
+
+    return results
+
+
+def __summarize_conversation(tasks_obj, task_document_contents):
+    return cache.memoize(
+        'language_summarizeconversation',
+        task_document_contents,
+        lambda: __analyze_conversation(tasks_obj, task_document_contents),
+        params={'tasks': tasks_obj},
+        api_version=clients.LANGUAGE_API_VERSION)
+
+
+def __read_items(conversation_items, events, stopped):
+    """Reads conversation items of a rolling summary on its own thread, so a summary is handed over as soon as it
+    is ready even while no item arrives
+
+    Args:
+        conversation_items (iterable): Conversation items
+        events (queue.Queue): Receives ('item', item) for every item, then ('ended', None) or ('failed', exception)
+        stopped (threading.Event): Set once the rolling summary is closed, stops reading at the next item
+    """
+    try:
+        for conversation_item in conversation_items:
+            if stopped.is_set():
+                return
+            events.put(('item', conversation_item))
+    except Exception as exception:  # pylint: disable=broad-except
+        events.put(('failed', exception))
+        return
+
+    events.put(('ended', None))
 
 
-def language_summarizeconversation(tasks, task_document_contents):
-    client = __authenticate_client()
+def __summarize_window(tasks_obj, summary, window):
+    """Summarizes a window of new conversation items, carrying over the running summary of earlier items
+
+    Args:
+        tasks_obj ([dict]): Summarization tasks
+        summary (dict): Running summary text keyed by aspect
+        window ([dict]): New conversation items
+
+    Return:
+        (dict): Updated summary text keyed by aspect
+    """
+    conversation_items = list(window)
+
+    # Earlier items are represented by the running summary, narrative first as it covers the whole conversation
+    if summary:
+        conversation_items.insert(0, {
+            "text": summary.get('narrative') or ' '.join(summary.values()),
+            "id": "0",
+            "role": "Generic",
+            "participantId": "Summary"
+        })
+
+    result = __summarize_conversation(tasks_obj, json.dumps(conversation_items))
+    window_summary = summarizationHelper.parse_summaries(result).get("conversation1", {})
+    if "error" in window_summary:
+        raise ValueError(f'ERROR: Conversation summarization failed: {window_summary["error"]}')
+
+    return {**summary, **window_summary}
+
+
+@metrics.instrument('language')
+def language_summarizeconversation(tasks, task_document_contents, verbose=False):
+    """Summarizes a conversation
+
+    Args:
+        tasks (str): Summarization tasks
+        task_document_contents (str): Conversation items as JSON
+        verbose (bool): Print the status and summaries of every task, e.g. for the CLI
+
+    Return:
+        (dict): Summary text keyed by aspect, or error
+    """
     tasks_obj = summarizationHelper.create_tasks(tasks)
 
-    with client:
-        poller = client.begin_conversation_analysis(
-            task = {
-                "displayName": "Analyze conversations from xxx",
-                "analysisInput": {
-                    "conversations": [{
-                        "conversationItems": json.loads(task_document_contents),
-                        "modality": "text",
-                        "id": "conversation1",
-                        "language": "en"
-                    }],
-                },
-                "tasks": tasks_obj
-            }
-        )
-
-        # view result
-        result = poller.result()
-        task_results = result["tasks"]["items"]
-        for task in task_results:
-            print(f"\n{task['taskName']} status: {task['status']}")
-            task_result = task["results"]
-            if task_result["errors"]:
-                print("... errors occurred ...")
-                for error in task_result["errors"]:
-                    print(error)
+    result = __summarize_conversation(tasks_obj, task_document_contents)
+    if verbose:
+        __print_tasks(result)
+
+    return summarizationHelper.parse_summaries(result).get("conversation1", {})
+
+
+def __print_tasks(result):
+    """Prints the status, errors, warnings and summaries of every task of a conversation analysis
+    """
+    for error in result.get("errors") or []:
+        print(error)
+
+    task_results = (result.get("tasks") or {}).get("items") or []
+    for task in task_results:
+        print(f"\n{task['taskName']} status: {task['status']}")
+        task_result = task.get("results")
+        if not task_result:
+            print("... no results ...")
+        elif task_result["errors"]:
+            print("... errors occurred ...")
+            for error in task_result["errors"]:
+                print(error)
+        else:
+            conversation_result = task_result["conversations"][0]
+            if conversation_result["warnings"]:
+                print("... view warnings ...")
+                for warning in conversation_result["warnings"]:
+                    print(warning)
             else:
-                conversation_result = task_result["conversations"][0]
-                if conversation_result["warnings"]:
-                    print("... view warnings ...")
-                    for warning in conversation_result["warnings"]:
-                        print(warning)
+                summaries = conversation_result["summaries"]
+                for summary in summaries:
+                    print(f"{summary['aspect']}: {summary['text']}")
+
+
+@metrics.instrument('language')
+def language_summarizeconversation_rolling(tasks, conversation_items, window_items=DEFAULT_WINDOW_ITEMS):
+    """Summarizes a conversation incrementally while its items are still arriving
+
+    Items are consumed as they arrive, e.g. from diarization.speech_diarization_stream. Once a window of new items
+    is collected it is summarized in the background together with the running summary, while the next window keeps
+    collecting. Items arriving while a summary is in flight join the next window, so the summary never falls
+    behind by more than one request. Items are read on their own thread, so each summary is yielded as soon as it
+    is ready, during a silence or after the last item too.
+
+    Args:
+        tasks (str|[str]): Summary aspects
+        conversation_items (iterable): Conversation items
+        window_items (int): Conversation items collected before a summary is requested
+
+    Yield:
+        (dict): Current summary text keyed by aspect, each time it is updated. The last one covers the whole conversation
+    """
+    tasks_obj = summarizationHelper.create_tasks(tasks)
+    summary = {}
+    window = []
+    pending = None
+    ended = False
+
+    # Conversation items and finished summaries, in the order they happen
+    events = queue.Queue()
+    stopped = threading.Event()
+    threading.Thread(target=__read_items, args=(conversation_items, events, stopped),
+                     name='chimerapulse-rolling-summary', daemon=True).start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while not ended or pending is not None:
+                [kind, value] = events.get()
+                update = None
+
+                if kind == 'item':
+                    window.append(value)
+                elif kind == 'summary':
+                    summary = update = value.result()
+                    pending = None
+                elif kind == 'failed':
+                    raise value
                 else:
-                    summaries = conversation_result["summaries"]
-                    for summary in summaries:
-                        print(f"{summary['aspect']}: {summary['text']}")
+                    ended = True
+
+                # Once the conversation ended, the items after the last window are summarized whatever their count
+                if pending is None and window and (ended or len(window) >= window_items):
+                    pending = executor.submit(__summarize_window, tasks_obj, summary, window)
+                    pending.add_done_callback(lambda future: events.put(('summary', future)))
+                    window = []
+
+                if update is not None:
+                    yield update
+    finally:
+        stopped.set()
+
+
+@metrics.instrument('language')
+def language_summarizeconversation_batch(tasks, conversations, grouped=True, max_workers=None):
+    """Summarizes many conversations using as few analysis jobs as the service limits allow
+
+    Conversations are packed into jobs of up to limits.MAX_SUMMARIZATION_CONVERSATIONS conversations, and every
+    aspect is requested in a single task unless grouped is unset. Per-conversation errors are returned instead of
+    raised.
+
+    Args:
+        tasks (str|[str]): Summary aspects
+        conversations ([[dict]]): Conversation items of each conversation
+        grouped (bool): Request every aspect in a single task
+        max_workers (int): Maximum jobs started at the same time
+
+    Return:
+        ([dict]): Summary text keyed by aspect, or error, for every conversation in input order
+    """
+    tasks_obj = summarizationHelper.create_tasks(tasks, grouped)
+
+    return cache.memoize_many(
+        'language_summarizeconversation_batch',
+        [json.dumps(conversation_items) for conversation_items in conversations],
+        lambda missing: __summarize_conversations(tasks_obj, missing, max_workers),
+        params={'tasks': tasks_obj},
+        api_version=clients.LANGUAGE_API_VERSION)
@@ -11,31 +11,113 @@ import os
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
 
-from azure.core.credentials import AzureKeyCredential
-from azure.ai.textanalytics import AbstractiveSummaryAction, ExtractiveSummaryAction, TextAnalyticsClient
+from azure.ai.textanalytics import AbstractiveSummaryAction, ExtractiveSummaryAction
 
+from chimerapulse.core import clients
+from chimerapulse.core.language import limits
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import chunking
+from chimerapulse.helpers import lro
+from chimerapulse.helpers import metrics
 
-# Load env vars
-load_dotenv()
+# Chunked summarization defaults
+DEFAULT_CHUNK_CHARS = 25000
+DEFAULT_MAX_REQUESTS = 20
 
 
-def __authenticate_client():
-    """Authenticate service
+"""
+Private fxns
+"""
+def __start_summaries(client, documents, actions):
+    """Starts a single analysis job summarizing documents. Its poller polls at the shared polling interval
+
+    Return:
+        (Future): Resolves to summaries of every document in order
+    """
+    poller = client.begin_analyze_actions(
+        documents=documents, actions=actions, polling_interval=lro.get_polling_interval())
+
+    return lro.watch(poller, lambda document_results: [
+        format_summaries(document_result) for document_result in document_results])
+
+
+def __summarize_documents(client, documents, actions):
+    """Summarizes documents in a single analysis job
+
+    Return:
+        ([dict]): Summaries of every document in order
+    """
+    return __start_summaries(client, documents, actions).result()
+
+
+def __reserve_requests(budget, count):
+    """Takes requests from the request budget of a chunked summarization
+
+    Args:
+        budget (dict): Remaining requests
+        count (int): Requests needed
+    """
+    if count > budget['remaining']:
+        raise ValueError(f'ERROR: Summarizing document needs more than {budget["limit"]} requests. '
+                         'Increase max_requests or max_chunk_chars. Exiting...')
+
+    budget['remaining'] -= count
+
+
+def __map_chunks(client, chunks, actions, budget, max_workers):
+    """Summarizes chunks concurrently, packing as many chunks per request as the service limits allow
+
+    Return:
+        ([dict]): Summaries of every chunk in order
+    """
+    batches = batching.split_batches(
+        list(enumerate(chunks)), limits.MAX_SUMMARIZATION_DOCUMENTS, limits.MAX_SUMMARIZATION_REQUEST_CHARS)
+    __reserve_requests(budget, len(batches))
+
+    # Jobs are all started before waiting on any, so no thread is blocked per job
+    started = batching.dispatch(
+        lambda documents: __start_summaries(client, documents, [action() for action in actions]),
+        batches,
+        max_workers)
+    responses = [response if isinstance(response, Exception) else lro.results([response])[0] for response in started]
+
+    summaries = []
+    for response in responses:
+        if isinstance(response, Exception):
+            raise response
+        summaries.extend(response)
+
+    return __check_summaries(summaries)
+
+
+def __check_summaries(summaries):
+    """Raises if the service rejected a document, so a chunk is never left out of the merged summary
+
+    Return:
+        ([dict]): Summaries
+    """
+    for position, summary in enumerate(summaries, start=1):
+        if 'error' in summary:
+            raise ValueError(f'ERROR: Summarizing part {position} of the document failed: '
+                             f'{summary["error"]["code"]}: {summary["error"]["message"]}. Exiting...')
 
-    Returns:
-        (TextTranslationClient): Authenticated client
+    return summaries
+
+
+def __condense(client, text, key, action, max_chunk_chars, budget, max_workers):
+    """Re-summarizes joined chunk summaries until they fit in a single chunk
+
+    Return:
+        (str): Condensed summaries
     """
-    # Get Configuration Settings
-    languageendpoint = os.getenv('TRANSLATOR_SERVICE_ENDPOINT')
-    languagekey = os.getenv('TRANSLATOR_SERVICE_KEY')
+    while len(text) > max_chunk_chars:
+        chunks = chunking.split_text(text, max_chunk_chars)
+        summaries = __map_chunks(client, chunks, [action], budget, max_workers)
+        text = '\n\n'.join(summary.get(key, '') for summary in summaries)
 
-    credential = AzureKeyCredential(languagekey)
-    text_analytics_client = TextAnalyticsClient(
-            endpoint=languageendpoint, 
-            credential=credential)
-    return text_analytics_client
+    return text
 
 
 """
@@ -76,21 +158,79 @@ def get_document_file_path(document, document_file_path):
 @click.command()
 @click.option('-d', '--document', default=None, help='Document context')
 @click.option('-p', '--document-file-path', flag_value='flag', is_flag=False, default=None, help='Path to document file')
-def summarizedocument(document, document_file_path):
+@click.option('-c', '--chunked', is_flag=True, default=False, help='Summarize chunks in parallel and merge them into one summary')
+def summarizedocument(document, document_file_path, chunked):
     """Main command function called when calling document summarization as a package
 
     Args:
         document (str): Document context
         document_file_path (str): Path to document file
+        chunked (bool): Summarize chunks in parallel and merge them into one summary
     """
     document_contents = get_document_file_path(document, document_file_path)
-    language_summarizedocument(document_contents)
+    if chunked:
+        print(language_summarizedocument_chunked(document_contents))
+    else:
+        language_summarizedocument(document_contents)
     # return language_summarizedocument(document_contents)
 
 
+def format_summaries(document_result):
+    """Formats summarization action results of a document
+
+    Args:
+        document_result ([Any]): Action results of a document
+
+    Return:
+        (dict): Abstractive and extractive summaries, or error if the service rejected the document
+    """
+    response = {}
+
+    for result in document_result:
+        # An action the service rejected for the document holds an error instead of its summaries
+        if result.is_error:
+            return batching.error_result(result.error.code, result.error.message)
+
+        if result.kind == 'AbstractiveSummarization':
+            abstractive_summary = ''
+            # print(f'abstractive_summary: {abstractive_summary}')
+            for summary in result.summaries:
+                # print(f'summary: {summary}')
+                abstractive_summary += summary.text
+
+            response['abstractive_summary'] = abstractive_summary
+
+            # print('Abstractive Summary:\n')
+            # [print(f'{summary.text}\n') for summary in result.summaries]
+        elif result.kind == 'ExtractiveSummarization':
+            extractive_summary = ''
+            for sentence in result.sentences:
+                extractive_summary += sentence.text
+
+            response['extractive_summary'] = extractive_summary
+
+            # print('Extractive Summary:\n')
+            # [print(f'-{sentence.text}') for sentence in result.sentences]
+
+    return response
+
+
+@metrics.instrument('language')
 def language_summarizedocument(document):
+    return __memoize_document(document)
+
+
+def __memoize_document(document):
+    return cache.memoize(
+        'language_summarizedocument',
+        document,
+        lambda: __summarize_document(document),
+        api_version=clients.LANGUAGE_API_VERSION)
+
+
+def __summarize_document(document):
     response = {}
-    client = __authenticate_client()
+    client = clients.get_text_analytics_client()
 
     poller = client.begin_analyze_actions(
         documents=[document],
@@ -98,31 +238,73 @@ def language_summarizedocument(document):
             AbstractiveSummaryAction(),
             ExtractiveSummaryAction()
         ],
+        polling_interval=lro.get_polling_interval(),
     )
 
     document_results = poller.result()
 
-    for document in document_results:
-        for result in document:
-            if result.kind == 'AbstractiveSummarization':
-                abstractive_summary = ''
-                # print(f'abstractive_summary: {abstractive_summary}')
-                for summary in result.summaries:
-                    # print(f'summary: {summary}')
-                    abstractive_summary += summary.text
+    for document_result in document_results:
+        response.update(format_summaries(document_result))
 
-                response['abstractive_summary'] = abstractive_summary
+    return response
 
-                # print('Abstractive Summary:\n')
-                # [print(f'{summary.text}\n') for summary in result.summaries]
-            elif result.kind == 'ExtractiveSummarization':
-                extractive_summary = ''
-                for sentence in result.sentences:
-                    extractive_summary += sentence.text
 
-                response['extractive_summary'] = extractive_summary
+@metrics.instrument('language')
+def language_summarizedocument_chunked(document, max_chunk_chars=DEFAULT_CHUNK_CHARS, max_requests=DEFAULT_MAX_REQUESTS,
+                                       max_workers=None):
+    """Summarizes a document of any length with map-reduce.
 
-                # print('Extractive Summary:\n')
-                # [print(f'-{sentence.text}') for sentence in result.sentences]
+    The document is split on paragraph and sentence boundaries into chunks, the chunks are summarized in parallel
+    (map), then the chunk summaries are merged into a single abstractive and extractive summary (reduce).
 
-    return response
+    Args:
+        document (str): Document to summarize
+        max_chunk_chars (int): Maximum characters per chunk
+        max_requests (int): Maximum service requests allowed for the whole document
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        (dict): Abstractive and extractive summaries
+    """
+    max_chunk_chars = min(max_chunk_chars, limits.MAX_SUMMARIZATION_DOCUMENT_CHARS)
+    if len(document) <= max_chunk_chars:
+        return __memoize_document(document)
+
+    return cache.memoize(
+        'language_summarizedocument_chunked',
+        document,
+        lambda: __summarize_chunks(document, max_chunk_chars, max_requests, max_workers),
+        params={'max_chunk_chars': max_chunk_chars},
+        api_version=clients.LANGUAGE_API_VERSION)
+
+
+def __summarize_chunks(document, max_chunk_chars, max_requests, max_workers):
+    client = clients.get_text_analytics_client()
+    budget = {'limit': max_requests, 'remaining': max_requests}
+
+    # Map
+    chunks = chunking.split_text(document, max_chunk_chars)
+    summaries = __map_chunks(
+        client, chunks, [AbstractiveSummaryAction, ExtractiveSummaryAction], budget, max_workers)
+
+    abstractive_summary = '\n\n'.join(summary.get('abstractive_summary', '') for summary in summaries)
+    extractive_summary = ' '.join(summary.get('extractive_summary', '') for summary in summaries)
+
+    abstractive_summary = __condense(
+        client, abstractive_summary, 'abstractive_summary', AbstractiveSummaryAction, max_chunk_chars, budget,
+        max_workers)
+    extractive_summary = __condense(
+        client, extractive_summary, 'extractive_summary', ExtractiveSummaryAction, max_chunk_chars, budget,
+        max_workers)
+
+    # Reduce. Abstractive summaries are merged from the first document and extractive from the second
+    __reserve_requests(budget, 1)
+    [abstractive, extractive] = __check_summaries(__summarize_documents(
+        client,
+        [abstractive_summary, extractive_summary],
+        [AbstractiveSummaryAction(), ExtractiveSummaryAction()]))
+
+    return {
+        'abstractive_summary': abstractive.get('abstractive_summary', ''),
+        'extractive_summary': extractive.get('extractive_summary', '')
+    }
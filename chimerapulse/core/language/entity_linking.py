@@ -10,13 +10,13 @@ import os
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
 
-from azure.ai.textanalytics import TextAnalyticsClient
-from azure.core.credentials import AzureKeyCredential
-
-# Load env vars
-load_dotenv()
+from chimerapulse.core import clients
+from chimerapulse.core.language import limits
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import hedging
+from chimerapulse.helpers import metrics
 
 # Declare global variables
 links = []
@@ -25,23 +25,6 @@ verbose = False
 """
 Private fxns
 """
-def __authenticate_client():
-    """Authenticate service
-
-    Returns:
-        (TextTranslationClient): Authenticated client
-    """
-    # Get Configuration Settings
-    languageendpoint = os.getenv('TRANSLATOR_SERVICE_ENDPOINT')
-    languagekey = os.getenv('TRANSLATOR_SERVICE_KEY')
-
-    credential = AzureKeyCredential(languagekey)
-    text_analytics_client = TextAnalyticsClient(
-            endpoint=languageendpoint, 
-            credential=credential)
-    return text_analytics_client
-
-
 def __vprint(text):
     global verbose
 
@@ -100,27 +83,69 @@ def language_entitylinking(text):
     global verbose
     global links
     
-    client = __authenticate_client()
-    entitylinking_result = client.recognize_linked_entities(documents=[text])[0]
+    entitylinking_result = language_entitylinking_batch([text])[0]
 
     __vprint("Linked Entities:")
-    for entity in entitylinking_result.entities:
-        __vprint(f'"NAME:" {entity.name}')
-        __vprint(f'"ID:" {entity.data_source_entity_id}')
-        __vprint(f'"URL:" {entity.url}')
-        __vprint(f'"DATA SOURCCE:" {entity.data_source}')
+    for entity in entitylinking_result.get('links', []):
+        __vprint(f'"NAME:" {entity["name"]}')
+        __vprint(f'"ID:" {entity["id"]}')
+        __vprint(f'"URL:" {entity["url"]}')
+        __vprint(f'"DATA SOURCCE:" {entity["data_source"]}')
         __vprint("Matches:")
-        for match in entity.matches:
-            __vprint(f'"TEXT:" {match.text}')
+        for match in entity['matches']:
+            __vprint(f'"TEXT:" {match}')
             __vprint('\n')
         __vprint('\n')
-        links.append({
+        links.append(entity)
+    
+    if not verbose:
+        return links
+
+
+def format_result(document):
+    """Formats an entity linking document result
+
+    Args:
+        document (RecognizeLinkedEntitiesResult): Document result
+
+    Return:
+        (dict): Linked entities
+    """
+    return {
+        "links": [{
             "name": entity.name,
             "id": entity.data_source_entity_id,
             "url": entity.url,
             "data_source": entity.data_source,
-            "matches": match.text
-        })
-    
-    if not verbose:
-        return links
\ No newline at end of file
+            "matches": [match.text for match in entity.matches]
+        } for entity in document.entities]
+    }
+
+
+@metrics.instrument('language')
+def language_entitylinking_batch(texts, max_workers=None):
+    """Links entities of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Linked entities or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return cache.memoize_many(
+        'language_entitylinking',
+        texts,
+        lambda missing: batching.analyze_documents(
+            missing,
+            lambda documents: hedging.hedge(
+                'language_entitylinking', client.recognize_linked_entities, documents=documents,
+                size=sum(len(document) for document in documents)),
+            format_result,
+            limits.MAX_DOCUMENTS['entity_linking'],
+            limits.MAX_DOCUMENT_CHARS,
+            limits.MAX_REQUEST_CHARS,
+            max_workers),
+        api_version=clients.LANGUAGE_API_VERSION)
@@ -10,13 +10,13 @@ import os
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
 
-from azure.ai.textanalytics import TextAnalyticsClient
-from azure.core.credentials import AzureKeyCredential
-
-# Load env vars
-load_dotenv()
+from chimerapulse.core import clients
+from chimerapulse.core.language import limits
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import hedging
+from chimerapulse.helpers import metrics
 
 # Declare global variables
 phrases = []
@@ -25,23 +25,6 @@ verbose = False
 """
 Private fxns
 """
-def __authenticate_client():
-    """Authenticate service
-
-    Returns:
-        (TextTranslationClient): Authenticated client
-    """
-    # Get Configuration Settings
-    languageendpoint = os.getenv('TRANSLATOR_SERVICE_ENDPOINT')
-    languagekey = os.getenv('TRANSLATOR_SERVICE_KEY')
-
-    credential = AzureKeyCredential(languagekey)
-    text_analytics_client = TextAnalyticsClient(
-            endpoint=languageendpoint, 
-            credential=credential)
-    return text_analytics_client
-
-
 def __vprint(text):
     global verbose
 
@@ -100,18 +83,60 @@ def language_keyphrases(text):
     global verbose
     global phrases
     
-    client = __authenticate_client()
-    keyphrase_result = client.extract_key_phrases(documents=[text])[0]
+    keyphrase_result = language_keyphrases_batch([text])[0]
 
     __vprint("Key Phrases:")
-    for phrase in keyphrase_result.key_phrases:
-        __vprint(phrase)
-        
-        phrases.append({
-            "key_phrase": phrase
-        })
+    for phrase in keyphrase_result.get('key_phrases', []):
+        __vprint(phrase['key_phrase'])
+
+        phrases.append(phrase)
     
     __vprint('\n')
     
     if not verbose:
-        return phrases
\ No newline at end of file
+        return phrases
+
+
+def format_result(document):
+    """Formats a key phrase extraction document result
+
+    Args:
+        document (ExtractKeyPhrasesResult): Document result
+
+    Return:
+        (dict): Key phrases
+    """
+    return {
+        "key_phrases": [{
+            "key_phrase": phrase
+        } for phrase in document.key_phrases]
+    }
+
+
+@metrics.instrument('language')
+def language_keyphrases_batch(texts, max_workers=None):
+    """Extracts key phrases of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Key phrases or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return cache.memoize_many(
+        'language_keyphrases',
+        texts,
+        lambda missing: batching.analyze_documents(
+            missing,
+            lambda documents: hedging.hedge(
+                'language_keyphrases', client.extract_key_phrases, documents=documents,
+                size=sum(len(document) for document in documents)),
+            format_result,
+            limits.MAX_DOCUMENTS['key_phrases'],
+            limits.MAX_DOCUMENT_CHARS,
+            limits.MAX_REQUEST_CHARS,
+            max_workers),
+        api_version=clients.LANGUAGE_API_VERSION)
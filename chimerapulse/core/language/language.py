@@ -10,23 +10,19 @@ Example:
 """
 import click
 
-from chimerapulse.core.language import document_summarization
-from chimerapulse.core.language import conversation_summarization
-from chimerapulse.core.language import sentiment_analysis
-from chimerapulse.core.language import key_phrases
-from chimerapulse.core.language import named_entities
-from chimerapulse.core.language import entity_linking
+from chimerapulse.helpers.lazy_group import LazyGroup
 
 
-@click.group()
+@click.group(cls=LazyGroup, lazy_commands={
+    'summarizedocument': ['chimerapulse.core.language.document_summarization:summarizedocument', 'Summarize a document'],
+    'summarizeconversation': ['chimerapulse.core.language.conversation_summarization:summarizeconversation', 'Summarize a conversation'],
+    'analyzesentiment': ['chimerapulse.core.language.sentiment_analysis:analyzesentiment', 'Analyze sentiment'],
+    'keyphrases': ['chimerapulse.core.language.key_phrases:keyphrases', 'Extract key phrases'],
+    'namedentites': ['chimerapulse.core.language.named_entities:namedentites', 'Recognize named entities'],
+    'entitylinking': ['chimerapulse.core.language.entity_linking:entitylinking', 'Recognize linked entities'],
+    'analyzetext': ['chimerapulse.core.language.text_analysis:analyzetext', 'Run several language capabilities over the same text'],
+})
 def language():
     """Collection of CLI submodule commands available for running Azure Language Service capabilities
     """
     pass
-
-language.add_command(document_summarization.summarizedocument)
-language.add_command(conversation_summarization.summarizeconversation)
-language.add_command(sentiment_analysis.analyzesentiment)
-language.add_command(key_phrases.keyphrases)
-language.add_command(named_entities.namedentites)
-language.add_command(entity_linking.entitylinking)
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""Service limits for Azure AI Language synchronous requests
+
+Reference:
+    https://learn.microsoft.com/en-us/azure/ai-services/language-service/concepts/data-limits
+"""
+# Maximum characters of a single document
+MAX_DOCUMENT_CHARS = 5120
+
+# Maximum characters of all documents in a single request
+MAX_REQUEST_CHARS = 125000
+
+# Maximum documents per request for each capability
+MAX_DOCUMENTS = {
+    'sentiment_analysis': 10,
+    'key_phrases': 10,
+    'named_entities': 5,
+    'entity_linking': 5,
+}
+
+# Summarization runs as an analysis job with its own limits
+MAX_SUMMARIZATION_DOCUMENT_CHARS = 125000
+MAX_SUMMARIZATION_REQUEST_CHARS = 125000
+MAX_SUMMARIZATION_DOCUMENTS = 25
+
+# Conversations per conversation summarization job, and characters of all their items
+MAX_SUMMARIZATION_CONVERSATIONS = 25
+MAX_SUMMARIZATION_CONVERSATION_CHARS = 125000
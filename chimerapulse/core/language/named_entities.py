@@ -10,13 +10,13 @@ import os
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
 
-from azure.ai.textanalytics import TextAnalyticsClient
-from azure.core.credentials import AzureKeyCredential
-
-# Load env vars
-load_dotenv()
+from chimerapulse.core import clients
+from chimerapulse.core.language import limits
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import hedging
+from chimerapulse.helpers import metrics
 
 # Declare global variables
 entities = []
@@ -25,23 +25,6 @@ verbose = False
 """
 Private fxns
 """
-def __authenticate_client():
-    """Authenticate service
-
-    Returns:
-        (TextTranslationClient): Authenticated client
-    """
-    # Get Configuration Settings
-    languageendpoint = os.getenv('TRANSLATOR_SERVICE_ENDPOINT')
-    languagekey = os.getenv('TRANSLATOR_SERVICE_KEY')
-
-    credential = AzureKeyCredential(languagekey)
-    text_analytics_client = TextAnalyticsClient(
-            endpoint=languageendpoint, 
-            credential=credential)
-    return text_analytics_client
-
-
 def __vprint(text):
     global verbose
 
@@ -100,28 +83,73 @@ def language_namedentites(text):
     global verbose
     global entities
     
-    client = __authenticate_client()
-    namedentities_result = client.recognize_entities(documents=[text])[0]
-    
-    # Currently a bug in Azure API. Using a set to work around duplicate value issue
-    entity_set = set()
+    namedentities_result = language_namedentites_batch([text])[0]
 
-    # Duplicate text with different categories will be skipped with this solution.
+    # Duplicate text with different categories are skipped by format_result.
     # The first category will be the one that is printed.
     __vprint("Named Entities:")
-    for entity in namedentities_result.entities:
-        # Check if current entity already exists in the set
-        if not(entity.text in entity_set):
-            __vprint(f'"Text:" {entity.text}')
-            __vprint(f'"Category:" {entity.category}')
-            __vprint(f'"Subcategory:" {entity.subcategory}')
-            __vprint('\n')
-            entities.append({
+    for entity in namedentities_result.get('entities', []):
+        __vprint(f'"Text:" {entity["text"]}')
+        __vprint(f'"Category:" {entity["category"]}')
+        __vprint(f'"Subcategory:" {entity["subcategory"]}')
+        __vprint('\n')
+        entities.append(entity)
+
+    if not verbose:
+        return entities
+
+
+def format_result(document):
+    """Formats a named entity recognition document result. Duplicate entity text keeps the first category.
+
+    Args:
+        document (RecognizeEntitiesResult): Document result
+
+    Return:
+        (dict): Named entities
+    """
+    # Currently a bug in Azure API. Using a set to work around duplicate value issue
+    entity_set = set()
+    document_entities = []
+
+    for entity in document.entities:
+        if entity.text not in entity_set:
+            document_entities.append({
                 "text": entity.text,
                 "category": entity.category,
                 "subcategory": entity.subcategory
             })
         entity_set.add(entity.text)
-        
-    if not verbose:
-        return entities
\ No newline at end of file
+
+    return {
+        "entities": document_entities
+    }
+
+
+@metrics.instrument('language')
+def language_namedentites_batch(texts, max_workers=None):
+    """Recognizes named entities of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Named entities or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return cache.memoize_many(
+        'language_namedentites',
+        texts,
+        lambda missing: batching.analyze_documents(
+            missing,
+            lambda documents: hedging.hedge(
+                'language_namedentities', client.recognize_entities, documents=documents,
+                size=sum(len(document) for document in documents)),
+            format_result,
+            limits.MAX_DOCUMENTS['named_entities'],
+            limits.MAX_DOCUMENT_CHARS,
+            limits.MAX_REQUEST_CHARS,
+            max_workers),
+        api_version=clients.LANGUAGE_API_VERSION)
@@ -10,13 +10,13 @@ import os
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
 
-from azure.ai.textanalytics import TextAnalyticsClient
-from azure.core.credentials import AzureKeyCredential
-
-# Load env vars
-load_dotenv()
+from chimerapulse.core import clients
+from chimerapulse.core.language import limits
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import hedging
+from chimerapulse.helpers import metrics
 
 # Declare global variables
 overall_sentiment = ''
@@ -26,23 +26,6 @@ verbose = False
 """
 Private fxns
 """
-def __authenticate_client():
-    """Authenticate service
-
-    Returns:
-        (TextTranslationClient): Authenticated client
-    """
-    # Get Configuration Settings
-    languageendpoint = os.getenv('TRANSLATOR_SERVICE_ENDPOINT')
-    languagekey = os.getenv('TRANSLATOR_SERVICE_KEY')
-
-    credential = AzureKeyCredential(languagekey)
-    text_analytics_client = TextAnalyticsClient(
-            endpoint=languageendpoint, 
-            credential=credential)
-    return text_analytics_client
-
-
 def __vprint(text):
     global verbose
 
@@ -102,26 +85,68 @@ def language_analyzesentiment(text):
     global analysis
     global overall_sentiment
     
-    client = __authenticate_client()
-    sentiment_result = client.analyze_sentiment(documents=[text])
-    doc_result = [doc for doc in sentiment_result if not doc.is_error]
-    
-    for document in doc_result:
-        __vprint("Overall Sentiment: {}".format(document.sentiment))
-        overall_sentiment = 'Overall Sentiment: ' + document.sentiment
-
-        for sentence in document.sentences:
-            __vprint("Sentence: {}".format(sentence.text))
-            __vprint("Sentence sentiment: {}".format(sentence.sentiment))
-            
+    document = language_analyzesentiment_batch([text])[0]
+
+    if 'error' not in document:
+        __vprint("Overall Sentiment: {}".format(document['sentiment']))
+        overall_sentiment = 'Overall Sentiment: ' + document['sentiment']
+
+        for sentence in document['sentences']:
+            __vprint("Sentence: {}".format(sentence['text']))
+            __vprint("Sentence sentiment: {}".format(sentence['sentiment']))
+
             analysis.append({
-                "sentence": [{
-                    "text": sentence.text,
-                    "sentiment": sentence.sentiment
-                }]
+                "sentence": [sentence]
             })
-        
+
         __vprint('\n')
     
     if not verbose:
-        return overall_sentiment, analysis
\ No newline at end of file
+        return overall_sentiment, analysis
+
+
+def format_result(document):
+    """Formats a sentiment analysis document result
+
+    Args:
+        document (AnalyzeSentimentResult): Document result
+
+    Return:
+        (dict): Overall and per sentence sentiment
+    """
+    return {
+        "sentiment": document.sentiment,
+        "sentences": [{
+            "text": sentence.text,
+            "sentiment": sentence.sentiment
+        } for sentence in document.sentences]
+    }
+
+
+@metrics.instrument('language')
+def language_analyzesentiment_batch(texts, max_workers=None):
+    """Analyzes sentiment of many documents using as few requests as the service limits allow
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Sentiment or error for every document in input order
+    """
+    client = clients.get_text_analytics_client()
+
+    return cache.memoize_many(
+        'language_analyzesentiment',
+        texts,
+        lambda missing: batching.analyze_documents(
+            missing,
+            lambda documents: hedging.hedge(
+                'language_analyzesentiment', client.analyze_sentiment, documents=documents,
+                size=sum(len(document) for document in documents)),
+            format_result,
+            limits.MAX_DOCUMENTS['sentiment_analysis'],
+            limits.MAX_DOCUMENT_CHARS,
+            limits.MAX_REQUEST_CHARS,
+            max_workers),
+        api_version=clients.LANGUAGE_API_VERSION)
@@ -0,0 +1,248 @@
+"""Module that runs several Azure AI Language capabilities over the same text in a single stage
+https://learn.microsoft.com/en-us/azure/ai-services/language-service/concepts/use-asynchronously
+
+Modes:
+    concurrent: One synchronous request per action, all in flight at the same time. Lowest latency for short text.
+    job: All actions submitted as a single begin_analyze_actions job. Fewest requests.
+
+Example:
+    python -m chimerapulse.core.language analyzetext -d 'The food was great'
+    chi language analyzetext -a sentiment -a keyphrases --job <args>
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from azure.ai.textanalytics import (
+    AnalyzeSentimentAction,
+    ExtractiveSummaryAction,
+    ExtractKeyPhrasesAction,
+    RecognizeEntitiesAction,
+    RecognizeLinkedEntitiesAction,
+    RecognizePiiEntitiesAction,
+)
+
+from chimerapulse.core import clients
+from chimerapulse.core.language import entity_linking
+from chimerapulse.core.language import key_phrases
+from chimerapulse.core.language import named_entities
+from chimerapulse.core.language import sentiment_analysis
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import hedging
+from chimerapulse.helpers import lro
+from chimerapulse.helpers import metrics
+
+DEFAULT_ACTIONS = ['sentiment', 'keyphrases', 'entities', 'linkedentities']
+ACTIONS = DEFAULT_ACTIONS + ['pii', 'summary']
+
+# Result kind returned by begin_analyze_actions for each action
+ACTION_KINDS = {
+    'SentimentAnalysis': 'sentiment',
+    'KeyPhraseExtraction': 'keyphrases',
+    'EntityRecognition': 'entities',
+    'EntityLinking': 'linkedentities',
+    'PiiEntityRecognition': 'pii',
+    'ExtractiveSummarization': 'summary',
+}
+
+
+"""
+Private fxns
+"""
+def __format_pii(document):
+    return {
+        "redacted_text": document.redacted_text,
+        "entities": [{
+            "text": entity.text,
+            "category": entity.category
+        } for entity in document.entities]
+    }
+
+
+def __format_summary(document):
+    return {
+        "summary": ' '.join(sentence.text for sentence in document.sentences)
+    }
+
+
+def __get_formatters():
+    return {
+        'sentiment': sentiment_analysis.format_result,
+        'keyphrases': key_phrases.format_result,
+        'entities': named_entities.format_result,
+        'linkedentities': entity_linking.format_result,
+        'pii': __format_pii,
+        'summary': __format_summary,
+    }
+
+
+def __get_job_actions():
+    return {
+        'sentiment': AnalyzeSentimentAction,
+        'keyphrases': ExtractKeyPhrasesAction,
+        'entities': RecognizeEntitiesAction,
+        'linkedentities': RecognizeLinkedEntitiesAction,
+        'pii': RecognizePiiEntitiesAction,
+        'summary': ExtractiveSummaryAction,
+    }
+
+
+# Actions delegating to the batch function of their capability are timed as that stage, the others as their own
+@metrics.instrument('language', stage='language_pii')
+def __recognize_pii(client, text):
+    return hedging.hedge('language_pii', client.recognize_pii_entities, documents=[text], size=len(text))[0]
+
+
+@metrics.instrument('language', stage='language_extractivesummary')
+def __summarize_extractive(client, text):
+    poller = client.begin_analyze_actions(
+        documents=[text], actions=[ExtractiveSummaryAction()], polling_interval=lro.get_polling_interval())
+
+    return list(poller.result())[0][0]
+
+
+def __run_action(client, action, text):
+    """Runs one action as its own request. Results are served from the cache when available
+
+    Return:
+        (dict): Formatted result or error
+    """
+    if action == 'sentiment':
+        return sentiment_analysis.language_analyzesentiment_batch([text])[0]
+    if action == 'keyphrases':
+        return key_phrases.language_keyphrases_batch([text])[0]
+    if action == 'entities':
+        return named_entities.language_namedentites_batch([text])[0]
+    if action == 'linkedentities':
+        return entity_linking.language_entitylinking_batch([text])[0]
+
+    def compute():
+        try:
+            if action == 'pii':
+                document = __recognize_pii(client, text)
+            else:
+                document = __summarize_extractive(client, text)
+        except Exception as exception:  # pylint: disable=broad-except
+            return batching.exception_result(exception)
+
+        return format_action_result(action, document)
+
+    return cache.memoize(f'language_analyzetext.{action}', text, compute, api_version=clients.LANGUAGE_API_VERSION)
+
+
+def __analyze_concurrently(client, text, actions):
+    with ThreadPoolExecutor(max_workers=len(actions)) as executor:
+        futures = {action: executor.submit(__run_action, client, action, text) for action in actions}
+
+    return {action: future.result() for action, future in futures.items()}
+
+
+@metrics.instrument('language', stage='language_analyzetext_job')
+def __analyze_as_job(client, text, actions):
+    job_actions = __get_job_actions()
+
+    try:
+        poller = client.begin_analyze_actions(
+            documents=[text],
+            actions=[job_actions[action]() for action in actions],
+            polling_interval=lro.get_polling_interval(),
+        )
+        document_results = list(poller.result())[0]
+    except Exception as exception:  # pylint: disable=broad-except
+        return {action: batching.exception_result(exception) for action in actions}
+
+    response = {}
+    for action, result in zip(actions, document_results):
+        # Errored action results carry no kind; they are returned in action order
+        action = ACTION_KINDS.get(getattr(result, 'kind', None), action)
+        response[action] = format_action_result(action, result)
+
+    return response
+
+
+"""
+Formatting fxns
+"""
+def format_action_result(action, document):
+    """Formats a document result of an action
+
+    Args:
+        action (str): Action
+        document (Any): Document result
+
+    Return:
+        (dict): Formatted result or error
+    """
+    if document.is_error:
+        return batching.error_result(document.error.code, document.error.message)
+
+    return __get_formatters()[action](document)
+
+
+"""
+Validation fxns
+"""
+def validate_actions(actions):
+    """Validates requested actions
+
+    Args:
+        actions ([str]): Requested actions. Defaults to sentiment, key phrases, named entities and entity linking
+
+    Return:
+        ([str]): Actions
+    """
+    if not actions:
+        return list(DEFAULT_ACTIONS)
+
+    for action in actions:
+        if action not in ACTIONS:
+            raise ValueError(f'ERROR: action value not allowed: {action}. Allowed values: {", ".join(ACTIONS)}')
+
+    return list(dict.fromkeys(actions))
+
+
+@click.command()
+@click.option('-d', '--document', help='Text to analyze')
+@click.option('-p', '--document-file-path', flag_value='flag', is_flag=False, default=None, help='Path to document file')
+@click.option('-a', '--action', 'actions', multiple=True, type=click.Choice(ACTIONS), help='Action to run. Repeatable')
+@click.option('-j', '--job', is_flag=True, default=False, help='Submit all actions as a single analysis job')
+def analyzetext(document, document_file_path, actions, job):
+    """Main command function called when running several language capabilities over the same text
+
+    Args:
+        document (str): Text to analyze
+        document_file_path (str): Path to document file
+        actions ([str]): Actions to run
+        job (bool): Submit all actions as a single analysis job
+    """
+    document_contents = sentiment_analysis.get_document_file_path(document, document_file_path)
+    response = language_analyzetext(document_contents, actions, 'job' if job else 'concurrent')
+
+    print(json.dumps(response, indent=2))
+
+
+def language_analyzetext(text, actions=None, mode='concurrent'):
+    """Runs several language capabilities over the same text
+
+    Args:
+        text (str): Text to analyze
+        actions ([str]): Actions to run. Defaults to sentiment, key phrases, named entities and entity linking
+        mode (str): 'concurrent' for one request per action sent at the same time, 'job' for a single analysis job
+
+    Return:
+        (dict): Formatted result or error keyed by action
+    """
+    actions = validate_actions(actions)
+    client = clients.get_text_analytics_client()
+
+    if mode == 'job':
+        return cache.memoize(
+            'language_analyzetext',
+            text,
+            lambda: __analyze_as_job(client, text, actions),
+            params={'actions': actions},
+            api_version=clients.LANGUAGE_API_VERSION)
+
+    return __analyze_concurrently(client, text, actions)
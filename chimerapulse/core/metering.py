@@ -0,0 +1,80 @@
+"""Azure Core pipeline policy recording the characters of text each HTTP request sends to its service
+
+Characters are counted where requests leave the process, so results served from the cache or the translation
+memory are never counted, while retries and hedged requests, which are sent again, are. Every string under a
+'text' key of the JSON body is counted, which covers Language documents, conversation items and Translator
+segments. See chimerapulse.helpers.metrics.
+
+Example:
+    from chimerapulse.core.metering import MeteringPolicy
+
+    client = TextAnalyticsClient(..., per_retry_policies=[MeteringPolicy('language')])
+"""
+import json
+from urllib.parse import urlparse
+
+from azure.core.pipeline.policies import SansIOHTTPPolicy
+
+from chimerapulse.helpers import metrics
+
+
+def count_characters(value):
+    """Counts the characters of every string under a 'text' key of a JSON value
+
+    Args:
+        value (Any): Parsed JSON
+
+    Return:
+        (int): Characters
+    """
+    if isinstance(value, list):
+        return sum(count_characters(item) for item in value)
+    if not isinstance(value, dict):
+        return 0
+
+    return sum(len(item) if key.lower() == 'text' and isinstance(item, str) else count_characters(item)
+               for key, item in value.items())
+
+
+def get_operation(http_request, body):
+    """Names the operation of a request, the task kind of a synchronous Language request or the URL path otherwise
+
+    Args:
+        http_request (HttpRequest): Request
+        body (Any): Parsed JSON body
+
+    Return:
+        (str): Operation
+    """
+    if isinstance(body, dict) and isinstance(body.get('kind'), str):
+        return body['kind']
+
+    return urlparse(http_request.url).path
+
+
+class MeteringPolicy(SansIOHTTPPolicy):
+    """Pipeline policy counting the characters of text sent by each attempt of a request
+    """
+    def __init__(self, service):
+        """
+        Args:
+            service (str): Service label, e.g. 'language', 'conversations' or 'translator'
+        """
+        super().__init__()
+        self.service = service
+
+    def on_request(self, request):
+        http_request = request.http_request
+        content = getattr(http_request, 'body', None) or getattr(http_request, 'content', None)
+        if not content:
+            return
+
+        try:
+            body = json.loads(content)
+        except (TypeError, ValueError):
+            # Streamed or non-JSON bodies carry no text
+            return
+
+        characters = count_characters(body)
+        if characters:
+            metrics.record_characters(self.service, get_operation(http_request, body), characters)
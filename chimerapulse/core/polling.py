@@ -0,0 +1,89 @@
+"""Azure Core polling method that hands a long-running operation over to the shared loop of helpers.lro
+
+An SDK poller starts a thread of its own that sleeps between status requests, unless its polling method reports
+the operation finished. ManagedPolling reports it finished to the poller, so no thread is started, and the shared
+loop requests the status instead, through the SDK's own polling method. The poller's result is only read once the
+loop resolved the operation.
+
+Reference:
+    Azure Core polling: https://learn.microsoft.com/en-us/python/api/azure-core/azure.core.polling
+
+Example:
+    from chimerapulse.core import polling
+
+    future = polling.track(lambda polling_method: client.begin_conversation_analysis(task=task, polling=polling_method))
+    result = future.result()
+"""
+from azure.core.polling import PollingMethod
+from azure.core.polling.base_polling import LROBasePolling
+
+from chimerapulse.helpers import lro
+from chimerapulse.helpers import rate_limit
+
+
+class ManagedPolling(PollingMethod):
+    """Polling method whose status requests are sent by the shared loop instead of the poller's thread
+    """
+    def __init__(self, inner=None):
+        """
+        Args:
+            inner (LROBasePolling): SDK polling method sending the status requests. Defaults to LROBasePolling
+        """
+        # Headers of the last response, read for the Retry-After of the next poll
+        self.headers = {}
+        # Its own delay is never used, the shared loop decides when to poll
+        self.inner = inner or LROBasePolling(timeout=0, raw_response_hook=self.__keep_headers)
+
+    def __keep_headers(self, pipeline_response):
+        self.headers = pipeline_response.http_response.headers
+
+    def initialize(self, client, initial_response, deserialization_callback):
+        self.__keep_headers(initial_response)
+        self.inner.initialize(client, initial_response, deserialization_callback)
+
+    def run(self):
+        # Never started by the poller, see finished()
+        pass
+
+    def finished(self):
+        # Polled by the shared loop, so the poller never starts a polling thread of its own
+        return True
+
+    def status(self):
+        return self.inner.status()
+
+    def resource(self):
+        return self.inner.resource()
+
+    def poll(self):
+        """Requests the status of the operation once
+
+        Return:
+            [finished(bool), retry_after(float)]: Operation finished, and seconds the service asked to wait
+        """
+        if not self.inner.finished():
+            self.inner.update_status()
+
+        if not self.inner.finished():
+            return [False, rate_limit.parse_retry_after(self.headers)]
+
+        # Raises if the operation failed or was canceled, and fetches its final resource if it has one
+        self.inner.run()
+
+        return [True, None]
+
+
+def track(start, inner=None):
+    """Starts a long-running operation and polls it on the shared loop
+
+    Args:
+        start (callable): Calls a begin_* method of a client with the given polling method and returns its poller
+        inner (LROBasePolling): SDK polling method sending the status requests
+
+    Return:
+        (Future): Resolves to the result of the poller
+    """
+    polling_method = ManagedPolling(inner)
+    poller = start(polling_method)
+
+    return lro.track(polling_method.poll, poller.result)
@@ -6,25 +6,45 @@ Reference:
 Example:
     python -m chimerapulse.core.speech diarization <args>
     chi speech diarization -p
+
+    for conversation_item in diarization.speech_diarization_stream('call.wav'):
+        ...
 """
 import ast
 import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog
-import time
 
 import click
-from dotenv import load_dotenv
 
 # Import Azure speech SDK
 import azure.cognitiveservices.speech as speechsdk
 
-# Load env vars
-load_dotenv()
+from chimerapulse.core import clients
+from chimerapulse.core.speech import language_identification
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers import rate_limit
+from chimerapulse.helpers import segmentation
+
+# Maximum transcribed utterances held for a slow consumer before the transcriber is paused
+DEFAULT_QUEUE_SIZE = 64
+
+# How often a cancellable transcription checks whether it was cancelled while no utterance arrives
+CANCEL_POLL_SECONDS = 0.2
+
+# Parallel sessions of segmented diarization, and the audio neighbouring segments share to match speakers
+DEFAULT_SEGMENTS = 4
+DEFAULT_OVERLAP_SECONDS = 10
 
 # Declare global variables
-conversations = []
 verbose = False
+role_map = {
+    'Guest-1': 'Agent',
+    'Guest-2': 'Customer'
+}
 
 
 """
@@ -59,23 +79,34 @@ def get_conversation_file_path(ctx, param, value):
     print(f'Conversation audio file path: {filepath}')
     return filepath
 
+
 """
-Private fxns
+Conversation fxns
 """
-def __authenticate_client():
-    """Authenticates speech client
+def create_conversation_item(result, item_id, speaker_id=None):
+    """Creates conversation summarization item from a transcribed result
+
+    Args:
+        result (ConversationTranscriptionResult): Transcribed result
+        item_id (int): Position of the item in the conversation
+        speaker_id (str): Speaker label replacing the label of the result
 
     Return:
-        (SpeechConfig): Speech client
+        (dict): Conversation item
     """
-    # Get Configuration Settings
-    speechkey = os.getenv('SPEECH_SERVICE_KEY')
-    speechregion = os.getenv('SPEECH_SERVICE_REGION')
+    speaker_id = speaker_id or result.speaker_id
 
-    # Connect to Azure Language Service
-    return speechsdk.SpeechConfig(speechkey, speechregion)
+    return {
+        "text": result.text,
+        "id": str(item_id),
+        "role": role_map.get(speaker_id, 'Generic'),
+        "participantId": speaker_id
+    }
 
 
+"""
+Private fxns
+"""
 def __vprint(text):
     global verbose
 
@@ -107,28 +138,11 @@ def conversation_transcriber_transcribed_cb(evt: speechsdk.SpeechRecognitionEven
     Args:
         evt (speechsdk.SessionEventArgs): Session event args
     """
-    # Access global variables
-    global conversations
-
-    role_map = {
-        'Guest-1': 'Agent',
-        'Guest-2': 'Customer'
-    }
-
     __vprint('TRANSCRIBED:')
     if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
         __vprint('\tText={}'.format(evt.result.text))
         __vprint('\tSpeaker ID={}'.format(evt.result.speaker_id))
 
-        conversation_item = {
-            "text": evt.result.text,
-            "id": str(len(conversations) + 1),
-            "role": role_map[evt.result.speaker_id],
-            "participantId": evt.result.speaker_id
-        }
-
-        conversations.append(conversation_item)
-
     elif evt.result.reason == speechsdk.ResultReason.NoMatch:
         print('\tNOMATCH: Speech could not be TRANSCRIBED: {}'.format(evt.result.no_match_details))
 
@@ -142,58 +156,236 @@ def conversation_transcriber_session_started_cb(evt: speechsdk.SessionEventArgs)
     print('SessionStarted event')
 
 
+def __transcribe(audio_config, source_language, max_queue, cancel=None):
+    """Transcribes a conversation, yielding each result as soon as it is transcribed
+
+    Transcribed utterances are handed over through a bounded queue. When the consumer falls behind and the queue
+    is full, the transcriber's callback blocks until there is room, pausing transcription instead of buffering
+    the whole conversation.
+
+    Args:
+        audio_config (AudioConfig): Speech SDK AudioConfig object
+        source_language (str): Source language of audio
+        max_queue (int): Maximum transcribed utterances waiting for the consumer
+        cancel (threading.Event): Stops the transcriber once set, e.g. when a client disconnects
+
+    Yield:
+        (ConversationTranscriptionResult): Transcribed result
+    """
+    results = queue.Queue(maxsize=max_queue)
+    closed = threading.Event()
+    throttled = threading.Event()
+    stopped = object()
+    # End of the last transcribed utterance, in ticks, the audio the service got through
+    recognized = {'end': 0}
+
+    speech_config = clients.get_speech_config()
+    # TODO: Possible use of languag identification
+    speech_config.speech_recognition_language=source_language
+
+    conversation_transcriber = speechsdk.transcription.ConversationTranscriber(speech_config=speech_config, audio_config=audio_config)
+
+    def transcribed_cb(evt: speechsdk.SpeechRecognitionEventArgs):
+        """callback that hands a transcribed utterance over to the consumer"""
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            recognized['end'] = max(recognized['end'], evt.result.offset + evt.result.duration)
+            if not closed.is_set():
+                results.put(evt.result)
+
+    def stop_cb(evt: speechsdk.SessionEventArgs):
+        """callback that signals the end of the conversation upon receiving an event `evt`"""
+        print('CLOSING on {}'.format(evt))
+        if not closed.is_set():
+            results.put(stopped)
+
+    def canceled_cb(evt: speechsdk.SessionEventArgs):
+        """callback that signals the end of the conversation, or an error, upon cancellation"""
+        # Canceled at the end of the audio is a normal stop, anything else is an error
+        cancellation_details = evt.cancellation_details
+        if cancellation_details.reason == speechsdk.CancellationReason.Error:
+            if cancellation_details.error_code == speechsdk.CancellationErrorCode.TooManyRequests:
+                throttled.set()
+                rate_limit.throttle('speech')
+            if not closed.is_set():
+                results.put(ValueError(f'Transcription canceled: {cancellation_details.error_details}'))
+        else:
+            stop_cb(evt)
+
+    # Connect callbacks to the events fired by the conversation transcriber
+    conversation_transcriber.transcribed.connect(conversation_transcriber_transcribed_cb)
+    conversation_transcriber.session_started.connect(conversation_transcriber_session_started_cb)
+    conversation_transcriber.session_stopped.connect(conversation_transcriber_session_stopped_cb)
+    conversation_transcriber.canceled.connect(conversation_transcriber_recognition_canceled_cb)
+    conversation_transcriber.transcribed.connect(transcribed_cb)
+    # stop transcribing on either session stopped or canceled events
+    conversation_transcriber.session_stopped.connect(stop_cb)
+    conversation_transcriber.canceled.connect(canceled_cb)
+
+    # The session holds a slot of the speech concurrency limit until it stops
+    rate_limit.acquire('speech')
+    try:
+        conversation_transcriber.start_transcribing_async().get()
+    except BaseException:
+        rate_limit.release('speech', False)
+        raise
+
+    try:
+        while cancel is None or not cancel.is_set():
+            try:
+                result = results.get(timeout=CANCEL_POLL_SECONDS if cancel is not None else None)
+            except queue.Empty:
+                continue
+
+            if result is stopped:
+                break
+            if isinstance(result, Exception):
+                raise result
+
+            yield result
+    finally:
+        # Unblock a callback waiting for room so the transcriber can stop
+        closed.set()
+        while not results.empty():
+            results.get_nowait()
+
+        try:
+            conversation_transcriber.stop_transcribing_async().get()
+        finally:
+            rate_limit.release('speech', not throttled.is_set())
+            metrics.record_audio('speech', 'transcription', recognized['end'] / segmentation.TICKS_PER_SECOND)
+
+
+def __transcribe_segment(segment, sample_rate, source_language):
+    """Transcribes a segment of PCM audio in a session of its own
+
+    Return:
+        ([dict]): Utterances with offset relative to the segment
+    """
+    stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=sample_rate, bits_per_sample=16, channels=1)
+    push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+    push_stream.write(segment['frames'])
+    push_stream.close()
+
+    audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
+
+    return [{
+        "offset": result.offset,
+        "duration": result.duration,
+        "speaker_id": result.speaker_id,
+        "result": result
+    } for result in __transcribe(audio_config, source_language, DEFAULT_QUEUE_SIZE)]
+
+
 # TODO: add json flag to return JSON object instead of print to terminal
 @click.command()
 @click.option('-p', '--file-path', required=True, callback=get_conversation_file_path, flag_value='flag', is_flag=False, help='Path to audio file')
 @click.option('-v', '--verbose-print', is_flag=True, flag_value=True, default=False, help='Prints response instead of returning as JSON object')
-@click.option('-l', '--source-language',  default='en-US', help='Source language of audio')
-def diarization(file_path, verbose_print, source_language):
+@click.option('-l', '--source-language',  default='en-US', help='Source language of audio, or auto to detect it')
+@click.option('-s', '--segments', default=1, type=int, help='Transcribe long audio in this many parallel sessions')
+@click.option('-m', '--max-speakers', default=None, type=int, help='Speakers in the conversation, if known')
+def diarization(file_path, verbose_print, source_language, segments, max_speakers):
     """Speech diarization on audio files with mono channel
 
     Args:
         file_path (str): Path to conversation audio file
+        segments (int): Number of parallel sessions
+        max_speakers (int): Speakers in the conversation, if known
     """
     global verbose
 
     verbose = verbose_print
-    speech_diarization(file_path, source_language)
+    speech_diarization(file_path, source_language, segments, max_speakers)
 
 
-# TODO: Return conversation transcription in JSON to be used in conversation summarization
-def speech_diarization(filepath, source_language='en-US'):
-    global verbose
+def speech_diarization_stream(filepath, source_language='en-US', max_queue=DEFAULT_QUEUE_SIZE, cancel=None):
+    """Diarizes an audio file with mono channel, yielding each conversation item as soon as it is transcribed
 
-    speech_config = __authenticate_client()
-    # TODO: Possible use of languag identification
-    speech_config.speech_recognition_language=source_language
+    Args:
+        filepath (str): Path to conversation audio file
+        source_language (str): Source language of audio
+        max_queue (int): Maximum transcribed utterances waiting for the consumer
+        cancel (threading.Event): Stops transcription once set
 
+    Yield:
+        (dict): Conversation item
+    """
     audio_config = speechsdk.audio.AudioConfig(filename=filepath)
-    conversation_transcriber = speechsdk.transcription.ConversationTranscriber(speech_config=speech_config, audio_config=audio_config)
 
-    transcribing_stop = False
+    yield from speech_diarization_audio(audio_config, source_language, max_queue, cancel)
 
-    def stop_cb(evt: speechsdk.SessionEventArgs):
-        """callback that signals to stop continuous recognition upon receiving an event `evt`"""
-        print('CLOSING on {}'.format(evt))
-        nonlocal transcribing_stop
-        transcribing_stop = True
 
-    # Connect callbacks to the events fired by the conversation transcriber
-    conversation_transcriber.transcribed.connect(conversation_transcriber_transcribed_cb)
-    conversation_transcriber.session_started.connect(conversation_transcriber_session_started_cb)
-    conversation_transcriber.session_stopped.connect(conversation_transcriber_session_stopped_cb)
-    conversation_transcriber.canceled.connect(conversation_transcriber_recognition_canceled_cb)
-    # stop transcribing on either session stopped or canceled events
-    conversation_transcriber.session_stopped.connect(stop_cb)
-    conversation_transcriber.canceled.connect(stop_cb)
+@metrics.instrument('speech')
+def speech_diarization_audio(audio_config, source_language='en-US', max_queue=DEFAULT_QUEUE_SIZE, cancel=None):
+    """Diarizes an audio source with mono channel, e.g. a push stream, yielding each conversation item as soon as
+    it is transcribed
 
-    conversation_transcriber.start_transcribing_async()
+    Args:
+        audio_config (AudioConfig): Speech SDK AudioConfig object
+        source_language (str): Source language of audio
+        max_queue (int): Maximum transcribed utterances waiting for the consumer
+        cancel (threading.Event): Stops transcription once set
+
+    Yield:
+        (dict): Conversation item
+    """
+    for item_id, result in enumerate(__transcribe(audio_config, source_language, max_queue, cancel), start=1):
+        yield create_conversation_item(result, item_id)
 
-    # Waits for completion.
-    while not transcribing_stop:
-        time.sleep(.5)
 
-    conversation_transcriber.stop_transcribing_async()
+@metrics.instrument('speech')
+def speech_diarization_segmented(filepath, source_language='en-US', segments=DEFAULT_SEGMENTS,
+                                 overlap_seconds=DEFAULT_OVERLAP_SECONDS, max_speakers=None):
+    """Diarizes a long audio file by transcribing segments in parallel sessions
+
+    The file is split at silence points. Utterances are put back in order with offsets relative to the whole file,
+    and speaker labels of every session are mapped onto one set of labels using the audio segments share.
+
+    Args:
+        filepath (str): Path to 16-bit mono WAV conversation audio file
+        source_language (str): Source language of audio
+        segments (int): Number of parallel sessions
+        overlap_seconds (float): Audio shared by neighbouring segments on each side of a boundary
+        max_speakers (int): Speakers in the conversation, if known. Without it, a speaker not heard in the audio
+            segments share is labelled as a new speaker
+
+    Return:
+        ([dict]): Conversation items
+    """
+    audio = segmentation.read_wav(filepath)
+    split = segmentation.split_segments(audio, segments, overlap_seconds)
+
+    with ThreadPoolExecutor(max_workers=len(split)) as executor:
+        segment_utterances = list(executor.map(
+            lambda segment: __transcribe_segment(segment, audio['sample_rate'], source_language), split))
+
+    utterances = segmentation.stitch_segments(split, segment_utterances, overlap_seconds, max_speakers)
+
+    return [create_conversation_item(utterance['result'], item_id, utterance['speaker_id'])
+            for item_id, utterance in enumerate(utterances, start=1)]
+
+
+def speech_diarization(filepath, source_language='en-US', segments=1, max_speakers=None):
+    """Diarizes an audio file with mono channel
+
+    Args:
+        filepath (str): Path to conversation audio file
+        source_language (str): Source language of audio, or 'auto' to detect it
+        segments (int): Number of parallel sessions. Long files are split into segments if more than 1
+        max_speakers (int): Speakers in the conversation, if known. Used to match speakers across segments
+
+    Return:
+        (str): Conversation items as JSON, None if verbose
+    """
+    global verbose
+
+    # Detected from a leading window of the file, and cached so repeat runs don't detect it again
+    if source_language == 'auto':
+        source_language = language_identification.speech_detectlanguage(filepath)['language']
+
+    if segments > 1:
+        conversations = speech_diarization_segmented(filepath, source_language, segments, max_speakers=max_speakers)
+    else:
+        conversations = list(speech_diarization_stream(filepath, source_language))
 
     if not verbose:
         return json.dumps(conversations)
@@ -10,22 +10,39 @@ Example:
     python -m chimerapulse.core.speech identifylanguage <args>
     chi speech identifylanguage -p
 """
+import hashlib
+import json
 import os
+import wave
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
 
 # Import Azure speech SDK
 import azure.cognitiveservices.speech as speechsdk
 
-# Load env vars
-load_dotenv()
+from chimerapulse.core import clients
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers import rate_limit
+from chimerapulse.helpers import segmentation
+
+# Candidate languages for detection
+DEFAULT_LANGUAGES = ['en-US', 'fr-FR', 'id-ID', 'es-ES']
+
+# Audio analysed by fast detection, regardless of file length
+DEFAULT_WINDOW_SECONDS = 10
+DEFAULT_WINDOWS = 1
 
 
 """
 Private fxns
 """
+def __is_throttled(result):
+    return result.reason == speechsdk.ResultReason.Canceled and \
+        result.cancellation_details.error_code == speechsdk.CancellationErrorCode.TooManyRequests
+
+
 def __identify_language(audio_config, languages):
     """Retrieves and processes language of audio
 
@@ -36,7 +53,7 @@ def __identify_language(audio_config, languages):
     Return:
         [detected_language(str), result(obj)]: Detected language and result object
     """
-    speech_config = __authenticate_client()
+    speech_config = clients.get_speech_config()
     speech_config.set_property(speechsdk.PropertyId.Speech_LogFilename, './chimera_pulse_logs.txt')
     auto_detect_source_language_config = \
         speechsdk.languageconfig.AutoDetectSourceLanguageConfig(languages=languages)
@@ -46,7 +63,22 @@ def __identify_language(audio_config, languages):
         audio_config=audio_config)
 
     print("Speak now...\n")
-    result = speech_recognizer.recognize_once()
+    rate_limit.acquire('speech')
+    succeeded = False
+    try:
+        result = speech_recognizer.recognize_once()
+        if __is_throttled(result):
+            rate_limit.throttle('speech')
+        else:
+            succeeded = True
+    finally:
+        # Recognition lasts as long as the speech, so its duration isn't a congestion signal
+        rate_limit.release('speech', succeeded)
+
+    if succeeded:
+        # Single-shot recognition stops at the end of the first utterance
+        metrics.record_audio(
+            'speech', 'language_identification', (result.offset + result.duration) / segmentation.TICKS_PER_SECOND)
 
     # Throw if not transcribed correctly. Might be an issue with the microphone.
     if not result.text:
@@ -60,18 +92,84 @@ def __identify_language(audio_config, languages):
     return [detected_language, result]
 
 
-def __authenticate_client():
-    """Authenticates speech client
+def __read_windows(audio_file_path, window_seconds, windows):
+    """Reads windows of a WAV file spread evenly from its start to its end
+
+    Return:
+        [sample_format([int]), frames([bytes])]: Samples per second, bits per sample and channels, and PCM of each
+            window
+    """
+    with wave.open(audio_file_path, 'rb') as wav:
+        sample_format = [wav.getframerate(), wav.getsampwidth() * 8, wav.getnchannels()]
+        window_frames = int(wav.getframerate() * window_seconds)
+        last_start = max(0, wav.getnframes() - window_frames)
+
+        frames = []
+        for index in range(windows):
+            wav.setpos(last_start * index // (windows - 1) if windows > 1 else 0)
+            frames.append(wav.readframes(window_frames))
+
+    return [sample_format, frames]
+
+
+def __detect_language(audio_configs, languages):
+    """Identifies language of each audio window and takes the most detected one
+
+    Return:
+        (dict): Detected language, share of windows agreeing with it and the service confidence of the first of them
+    """
+    detections = []
+    for audio_config in audio_configs:
+        try:
+            [detected_language, result] = __identify_language(audio_config, languages)
+        except ValueError:
+            # Window without speech
+            continue
+
+        response = json.loads(result.properties.get(speechsdk.PropertyId.SpeechServiceResponse_JsonResult) or '{}')
+        detections.append([detected_language, response.get('PrimaryLanguage', {}).get('Confidence')])
+
+    if not detections:
+        raise ValueError('Result empty. Check if audio contains speech.')
+
+    detected_languages = [detected_language for [detected_language, _] in detections]
+    language = max(detected_languages, key=detected_languages.count)
+
+    return {
+        "language": language,
+        "confidence": detected_languages.count(language) / len(audio_configs),
+        "confidence_level": next(level for [detected_language, level] in detections if detected_language == language)
+    }
+
+
+"""
+Cache fxns
+"""
+def get_detection_key(frames, sample_format, languages=None, window_seconds=DEFAULT_WINDOW_SECONDS,
+                      windows=DEFAULT_WINDOWS):
+    """Creates cache key of the language detected in audio. Keyed on a hash of the PCM windows language
+    identification reads, so a copy of a recording shares its key, a rewritten file doesn't, and the cost doesn't
+    grow with the length of the file
+
+    Args:
+        frames ([bytes]): PCM of each analysed window
+        sample_format ([int]): Samples per second, bits per sample and channels of the PCM
+        languages ([str]): Candidate languages
+        window_seconds (float): Length of each analysed window
+        windows (int): Number of analysed windows
 
     Return:
-        (SpeechConfig): Speech client
+        (str): Cache key
     """
-    # Get Configuration Settings
-    speechkey = os.getenv('SPEECH_SERVICE_KEY')
-    speechregion = os.getenv('SPEECH_SERVICE_REGION')
+    digest = hashlib.sha256()
+    for window in frames:
+        digest.update(window)
 
-    # Connect to Azure Language Service
-    return speechsdk.SpeechConfig(speechkey, speechregion)
+    return cache.make_key(
+        'speech_detectlanguage',
+        digest.hexdigest(),
+        {'languages': languages or DEFAULT_LANGUAGES, 'format': list(sample_format), 'window_seconds': window_seconds,
+         'windows': windows})
 
 
 """
@@ -113,16 +211,26 @@ def get_audio_file_path(ctx, param, value):
 
 @click.command()
 @click.option('-p', '--audio-file-path', callback=get_audio_file_path, flag_value='flag', is_flag=False, default=None, help='Path to audio file')
-def identifylanguage(audio_file_path: str|None=None):
+@click.option('-f', '--fast', flag_value=True, is_flag=True, default=False, help='Only analyse sampled windows of the audio file')
+@click.option('-w', '--window-seconds', default=DEFAULT_WINDOW_SECONDS, type=float, help='Length of each sampled window')
+@click.option('-n', '--windows', default=DEFAULT_WINDOWS, type=int, help='Number of sampled windows')
+def identifylanguage(audio_file_path: str|None=None, fast=False, window_seconds=DEFAULT_WINDOW_SECONDS, windows=DEFAULT_WINDOWS):
     """Main command function called when calling language identification as a package
 
     Args:
         audio_file_path (str): Path to audio file
+        fast (bool): Only analyse sampled windows of the audio file
+        window_seconds (float): Length of each sampled window
+        windows (int): Number of sampled windows
     """
-    speech_identifylanguage(audio_file_path=audio_file_path)
+    if fast and audio_file_path:
+        print(json.dumps(speech_detectlanguage(audio_file_path, window_seconds=window_seconds, windows=windows)))
+    else:
+        speech_identifylanguage(audio_file_path=audio_file_path)
 
 
 # Named using <module>_<methodname>
+@metrics.instrument('speech')
 def speech_identifylanguage(audio_file_path: str|None=None):
     """Detects spoken language
 
@@ -130,7 +238,7 @@ def speech_identifylanguage(audio_file_path: str|None=None):
         audio_file_path (str): Path to audio file
     """
     # TODO: Will parameterized through CLI
-    languages=['en-US', 'fr-FR', 'id-ID', 'es-ES']
+    languages=DEFAULT_LANGUAGES
 
     if audio_file_path:
         print('Audio file path verified...')
@@ -147,3 +255,58 @@ def speech_identifylanguage(audio_file_path: str|None=None):
     [source_language, result] = __identify_language(audio_config, languages)
 
     return [source_language, result]
+
+
+@metrics.instrument('speech')
+def speech_detectlanguage(audio_file_path, languages=None, window_seconds=DEFAULT_WINDOW_SECONDS, windows=DEFAULT_WINDOWS):
+    """Detects spoken language of a WAV file from sampled windows, so detection time doesn't grow with file length
+
+    The detected language is cached by the audio of the sampled windows, see get_detection_key, so repeat runs and
+    later stages don't detect it again.
+
+    Args:
+        audio_file_path (str): Path to audio file
+        languages ([str]): Candidate languages
+        window_seconds (float): Length of each sampled window
+        windows (int): Number of windows, spread evenly from the start to the end of the file
+
+    Return:
+        (dict): Detected language, its confidence and the service confidence level
+    """
+    languages = languages or DEFAULT_LANGUAGES
+    [sample_format, frames] = __read_windows(audio_file_path, window_seconds, windows)
+    key = get_detection_key(frames, sample_format, languages, window_seconds, windows)
+
+    detection = cache.get(key)
+    if detection is not cache.MISSING:
+        return detection
+
+    [samples_per_second, bits_per_sample, channels] = sample_format
+    stream_format = speechsdk.audio.AudioStreamFormat(
+        samples_per_second=samples_per_second, bits_per_sample=bits_per_sample, channels=channels)
+
+    audio_configs = []
+    for window in frames:
+        push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        push_stream.write(window)
+        push_stream.close()
+        audio_configs.append(speechsdk.audio.AudioConfig(stream=push_stream))
+
+    detection = __detect_language(audio_configs, languages)
+    cache.put(key, detection)
+
+    return detection
+
+
+@metrics.instrument('speech')
+def speech_detectlanguage_audio(audio_config, languages=None):
+    """Detects spoken language of an audio source, e.g. a push stream carrying a leading window of audio
+
+    Args:
+        audio_config (AudioConfig): Speech SDK AudioConfig object
+        languages ([str]): Candidate languages
+
+    Return:
+        (dict): Detected language, its confidence and the service confidence level
+    """
+    return __detect_language([audio_config], languages or DEFAULT_LANGUAGES)
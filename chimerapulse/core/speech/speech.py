@@ -6,18 +6,15 @@ Example:
 """
 import click
 
-from chimerapulse.core.speech import diarization
-from chimerapulse.core.speech import language_identification
-from chimerapulse.core.speech import video_transcription
+from chimerapulse.helpers.lazy_group import LazyGroup
 
 
-@click.group()
+@click.group(cls=LazyGroup, lazy_commands={
+    'diarization': ['chimerapulse.core.speech.diarization:diarization', 'Speech diarization on audio files with mono channel'],
+    'identifylanguage': ['chimerapulse.core.speech.language_identification:identifylanguage', 'Identify spoken language'],
+    'videotranscription': ['chimerapulse.core.speech.video_transcription:videotranscription', 'Transcribe audio extracted from a video'],
+})
 def speech():
     """Collection of CLI submodule commands available for running Azure Speech Service capabilities
     """
     pass  # pylint: disable=unnecessary-pass
-
-
-speech.add_command(diarization.diarization)
-speech.add_command(language_identification.identifylanguage)
-speech.add_command(video_transcription.videotranscription)
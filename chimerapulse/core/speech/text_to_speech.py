@@ -1,51 +1,297 @@
 """This is a helper file for core.translator.text_translator capability
+
+Synthesizers are pooled by voice. A synthesizer is returned to the pool once it finishes speaking, and its service
+connection stays open, so the next utterance in the same voice skips synthesizer setup and the connection handshake.
+Several utterances can be synthesized at the same time, each on a synthesizer of its own.
+
+Synthesized audio is cached on disk by voice, text and output format (see helpers.audio_cache). Cached prompts are
+played or returned without calling the speech service.
+
+Example:
+    from chimerapulse.core.speech import text_to_speech
+
+    text_to_speech.warm_synthesizers(['fil'])
+    ...
+    text_to_speech.synthesizeText('fil', 'Magandang umaga')
+    audio_file_path = text_to_speech.synthesize_audio_file('fil', 'Magandang umaga', 'Audio16Khz32KBitRateMonoMp3')
 """
 import os
+import tempfile
+import threading
+import time
 
 # Import namespaces
 import azure.cognitiveservices.speech as speech_sdk
 
-# Globals
-global speech_config
+from chimerapulse.core import clients
+from chimerapulse.helpers import audio_cache
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers import rate_limit
+
+# Idle synthesizers kept per voice. Synthesizers released beyond it are closed
+DEFAULT_SYNTHESIZERS_PER_VOICE = 4
+
+# Output format of synthesized audio, a speech_sdk.SpeechSynthesisOutputFormat name
+DEFAULT_OUTPUT_FORMAT = 'Riff16Khz16BitMonoPcm'
+
+# Voice used to synthesize each target language
+voices = {
+    "en": "en-US-SaraNeural",
+    "es": "es-ES-ElviraNeural",
+    "fil": "fil-PH-BlessicaNeural",
+    # "fr": "fr-FR-HenriNeural",
+    "fr": "fr-FR-CoralieNeural",
+    "hi": "hi-IN-MadhurNeural",
+    "ko": "ko-KR-SunHiNeural",
+    "ms": "ms-MY-YasminNeural"
+}
+
+# Declare global variables
+synthesizers = {}
+lock = threading.Lock()
+
+
+"""
+Private fxns
+"""
+def __create_synthesizer(voice, output_format, speaker):
+    """Creates synthesizer of a voice and opens its service connection ahead of the first utterance
+
+    Return:
+        [synthesizer(SpeechSynthesizer), connection(Connection)]: Synthesizer and its open connection
+    """
+    speech_config = clients.get_speech_config()
+    speech_config.speech_synthesis_voice_name = voice
+    speech_config.set_speech_synthesis_output_format(getattr(speech_sdk.SpeechSynthesisOutputFormat, output_format))
+
+    # Without an audio config the synthesizer plays on the default speaker, with None it only returns audio data
+    if speaker:
+        speech_synthesizer = speech_sdk.SpeechSynthesizer(speech_config)
+    else:
+        speech_synthesizer = speech_sdk.SpeechSynthesizer(speech_config, audio_config=None)
+
+    connection = speech_sdk.Connection.from_speech_synthesizer(speech_synthesizer)
+    connection.open(True)
+
+    return [speech_synthesizer, connection]
+
+
+def __get_extension(output_format):
+    for prefix, extension in [('Riff', 'wav'), ('Ogg', 'ogg'), ('Webm', 'webm')]:
+        if output_format.startswith(prefix):
+            return extension
+
+    return 'mp3' if output_format.endswith('Mp3') else 'raw'
+
+
+def __synthesize(targetLanguage, text, output_format, ssml, speaker):
+    """Synthesizes text on a pooled synthesizer and caches the audio
+
+    Return:
+        [result(SpeechSynthesisResult), audio_file_path(str)]: Synthesis result and path to cached audio
+    """
+    synthesizer = get_synthesizer(targetLanguage, output_format, speaker)
+    metrics.record_characters('speech', 'synthesis', len(text))
+    rate_limit.acquire('speech_synthesis')
+    start = time.perf_counter()
+    succeeded = False
+    try:
+        speak_async = synthesizer[0].speak_ssml_async if ssml else synthesizer[0].speak_text_async
+        result = speak_async(text).get()
+
+        if is_throttled(result):
+            rate_limit.throttle('speech_synthesis')
+        else:
+            succeeded = True
+    finally:
+        # Synthesis time grows with the text, so it is only compared with texts of similar length
+        rate_limit.release('speech_synthesis', succeeded, time.perf_counter() - start, len(text).bit_length())
+        release_synthesizer(targetLanguage, synthesizer, output_format, speaker)
+
+    return [result, cache_audio(targetLanguage, text, result, output_format)]
+
+
+"""
+Cache fxns
+"""
+def get_cached_audio_file(targetLanguage, text, output_format=DEFAULT_OUTPUT_FORMAT):
+    """Retrieves audio synthesized earlier for text in the target language voice
+
+    Args:
+        targetLanguage (str): Target language
+        text (str): Text, or SSML
+        output_format (str): Output format name
+
+    Return:
+        (str): Path to cached audio file, or None
+    """
+    return audio_cache.get(
+        audio_cache.make_key(voices.get(targetLanguage), text, output_format), __get_extension(output_format))
+
+
+def cache_audio(targetLanguage, text, result, output_format=DEFAULT_OUTPUT_FORMAT):
+    """Caches the audio of a completed synthesis
+
+    Args:
+        targetLanguage (str): Target language
+        text (str): Text, or SSML
+        result (SpeechSynthesisResult): Synthesis result
+        output_format (str): Output format name
+
+    Return:
+        (str): Path to cached audio file, or None if the synthesis didn't complete or caching is disabled
+    """
+    if result.reason != speech_sdk.ResultReason.SynthesizingAudioCompleted:
+        return None
+
+    return audio_cache.put(
+        audio_cache.make_key(voices.get(targetLanguage), text, output_format), result.audio_data,
+        __get_extension(output_format))
 
 
-def __authenticate_client():
-    """Authenticate service
+def is_throttled(result):
+    """Checks whether a synthesis was canceled because the service throttled it
 
-    Returns:
-        (TextTranslationClient): Authenticated client
+    Args:
+        result (SpeechSynthesisResult): Synthesis result
+
+    Return:
+        (bool): Throttled
+    """
+    return result.reason == speech_sdk.ResultReason.Canceled and \
+        result.cancellation_details.error_code == speech_sdk.CancellationErrorCode.TooManyRequests
+
+
+"""
+Pool fxns
+"""
+def get_synthesizer(targetLanguage, output_format=DEFAULT_OUTPUT_FORMAT, speaker=True):
+    """Takes an idle synthesizer of the target language voice from the pool, creating one if none is idle
+
+    Args:
+        targetLanguage (str): Target language
+        output_format (str): Output format name
+        speaker (bool): Play on the default speaker
+
+    Return:
+        [synthesizer(SpeechSynthesizer), connection(Connection)]: Synthesizer and its open connection
+    """
+    voice = voices.get(targetLanguage)
+
+    with lock:
+        idle = synthesizers.get((voice, output_format, speaker))
+        if idle:
+            return idle.pop()
+
+    return __create_synthesizer(voice, output_format, speaker)
+
+
+def release_synthesizer(targetLanguage, synthesizer, output_format=DEFAULT_OUTPUT_FORMAT, speaker=True):
+    """Returns a synthesizer to the pool once it finishes speaking
+
+    Args:
+        targetLanguage (str): Target language
+        synthesizer ([SpeechSynthesizer, Connection]): Synthesizer returned by get_synthesizer
+        output_format (str): Output format name passed to get_synthesizer
+        speaker (bool): Speaker option passed to get_synthesizer
+    """
+    with lock:
+        idle = synthesizers.setdefault((voices.get(targetLanguage), output_format, speaker), [])
+        if len(idle) < DEFAULT_SYNTHESIZERS_PER_VOICE:
+            idle.append(synthesizer)
+            return
+
+    synthesizer[1].close()
+
+
+def warm_synthesizers(targetLanguages, count=1):
+    """Creates synthesizers ahead of time, so the first utterance of each language is synthesized on a warm one
+
+    Args:
+        targetLanguages ([str]): Target languages
+        count (int): Synthesizers per language
     """
-    global speech_config
-    
-    # Get Configuration Settings
-    translatorkey = os.getenv('SPEECH_SERVICE_KEY')
-    translatorregion = os.getenv('SPEECH_SERVICE_REGION')
+    for targetLanguage in targetLanguages:
+        for synthesizer in [get_synthesizer(targetLanguage) for _ in range(count)]:
+            release_synthesizer(targetLanguage, synthesizer)
 
-    # Connect to Speech Config
-    speech_config = speech_sdk.SpeechConfig(translatorkey, translatorregion)
 
+def close_synthesizers():
+    """Closes every pooled synthesizer connection. Synthesizers are recreated on next use
+    """
+    with lock:
+        idle = [synthesizer for pooled in synthesizers.values() for synthesizer in pooled]
+        synthesizers.clear()
 
+    for [_, connection] in idle:
+        connection.close()
+
+
+def synthesize_audio(targetLanguage, text, output_format=DEFAULT_OUTPUT_FORMAT, ssml=False):
+    """Synthesizes text into audio data instead of playing it. Cached audio skips the speech service
+
+    Args:
+        targetLanguage (str): Target language
+        text (str): Text, or SSML if ssml is set
+        output_format (str): Output format, a speech_sdk.SpeechSynthesisOutputFormat name
+        ssml (bool): Text is SSML
+
+    Return:
+        (bytes): Audio
+    """
+    audio_file_path = get_cached_audio_file(targetLanguage, text, output_format)
+    if audio_file_path is not None:
+        with open(audio_file_path, 'rb') as audio_file:
+            return audio_file.read()
+
+    [result, _] = __synthesize(targetLanguage, text, output_format, ssml, speaker=False)
+    if result.reason != speech_sdk.ResultReason.SynthesizingAudioCompleted:
+        raise ValueError(f'Synthesis canceled: {result.cancellation_details.error_details}')
+
+    return result.audio_data
+
+
+def synthesize_audio_file(targetLanguage, text, output_format=DEFAULT_OUTPUT_FORMAT, ssml=False):
+    """Synthesizes text into an audio file instead of playing it. Cached audio skips the speech service
+
+    Args:
+        targetLanguage (str): Target language
+        text (str): Text, or SSML if ssml is set
+        output_format (str): Output format, a speech_sdk.SpeechSynthesisOutputFormat name
+        ssml (bool): Text is SSML
+
+    Return:
+        (str): Path to audio file. The cached file itself, so it must not be modified
+    """
+    audio_file_path = get_cached_audio_file(targetLanguage, text, output_format)
+    if audio_file_path is not None:
+        return audio_file_path
+
+    [result, audio_file_path] = __synthesize(targetLanguage, text, output_format, ssml, speaker=False)
+    if result.reason != speech_sdk.ResultReason.SynthesizingAudioCompleted:
+        raise ValueError(f'Synthesis canceled: {result.cancellation_details.error_details}')
+
+    # Caching disabled
+    if audio_file_path is None:
+        [descriptor, audio_file_path] = tempfile.mkstemp(suffix=f'.{__get_extension(output_format)}')
+        with os.fdopen(descriptor, 'wb') as audio_file:
+            audio_file.write(result.audio_data)
+
+    return audio_file_path
+
+
+@metrics.instrument('speech')
 def synthesizeText(targetLanguage, translatedObjText):
-    global speech_config
-    
-    __authenticate_client()
-    
+    # Cached prompts are played locally without calling the speech service
+    audio_file_path = get_cached_audio_file(targetLanguage, translatedObjText)
+    if audio_file_path is not None:
+        from playsound import playsound
+
+        playsound(audio_file_path)
+        return
+
     print("Synthesizing text...\n")
     # Synthesize translation
-    voices = {
-            "en": "en-US-SaraNeural",
-            "es": "es-ES-ElviraNeural",
-            "fil": "fil-PH-BlessicaNeural",
-            # "fr": "fr-FR-HenriNeural",
-            "fr": "fr-FR-CoralieNeural",
-            "hi": "hi-IN-MadhurNeural",
-            "ko": "ko-KR-SunHiNeural",
-            "ms": "ms-MY-YasminNeural"
-
-    }
-    
-    speech_config.speech_synthesis_voice_name = voices.get(targetLanguage)
-    speech_synthesizer = speech_sdk.SpeechSynthesizer(speech_config)
-    speak = speech_synthesizer.speak_text_async(translatedObjText).get()
+    [speak, _] = __synthesize(targetLanguage, translatedObjText, DEFAULT_OUTPUT_FORMAT, ssml=False, speaker=True)
     if speak.reason != speech_sdk.ResultReason.SynthesizingAudioCompleted:
         print(speak.reason)
@@ -16,23 +16,30 @@ Example:
     chi speech transcribevideo -p
 """
 import os
+import subprocess
+import threading
 from tkinter import filedialog
 
 import click
-from dotenv import load_dotenv
 
 # Import Azure speech SDK
-# import azure.cognitiveservices.speech as speechsdk
+import azure.cognitiveservices.speech as speechsdk
 
 # Import external packages
-# from moviepy import VideoFileClip
-from moviepy.editor import VideoFileClip
+from moviepy.config import get_setting
 
 # Import 'core'
+from chimerapulse.core.speech import diarization
 from chimerapulse.core.speech import language_identification
+from chimerapulse.helpers import cache
 
-# Load env vars
-load_dotenv()
+# Audio format the speech service expects: 16 kHz, 16-bit, mono PCM
+SAMPLE_RATE = 16000
+BITS_PER_SAMPLE = 16
+CHANNELS = 1
+
+# PCM read from ffmpeg per write to the push streams, 100 ms of audio
+CHUNK_BYTES = SAMPLE_RATE * BITS_PER_SAMPLE // 8 * CHANNELS // 10
 
 
 """
@@ -72,6 +79,112 @@ def get_video_file_path(ctx, param, value):
     return filepath
 
 
+"""
+Private fxns
+"""
+def __create_push_stream():
+    stream_format = speechsdk.audio.AudioStreamFormat(
+        samples_per_second=SAMPLE_RATE, bits_per_sample=BITS_PER_SAMPLE, channels=CHANNELS)
+
+    return speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+
+
+def __start_decoder(video_file_path, push_streams, limits=None, window_bytes=0):
+    """Decodes the audio of a video with ffmpeg in the background, writing PCM to push streams as it is decoded
+
+    Args:
+        video_file_path (str): Path to video file
+        push_streams ([PushAudioInputStream]): Streams receiving the audio. Closed once decoding ends
+        limits (dict): Maximum bytes keyed by stream. Streams are closed once they reach their limit
+        window_bytes (int): Leading bytes of audio kept by the decoder, e.g. to key the language detected in them
+
+    Return:
+        (dict): Decoder process, streams detached early because their consumer is done, the leading window of audio
+            and an event set once it is complete or decoding ended, and the error of a failed decoding. The error
+            is set before the streams are closed
+    """
+    limits = limits or {}
+    written = {}
+
+    process = subprocess.Popen(
+        [get_setting('FFMPEG_BINARY'), '-loglevel', 'error', '-i', video_file_path,
+         '-vn', '-ac', str(CHANNELS), '-ar', str(SAMPLE_RATE), '-f', 's16le', 'pipe:1'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    decoder = {
+        "process": process,
+        "detached": set(),
+        "lock": threading.Lock(),
+        "window": bytearray(),
+        "window_ready": threading.Event(),
+        "error": None
+    }
+    if not window_bytes:
+        decoder['window_ready'].set()
+
+    def pump():
+        try:
+            while True:
+                chunk = process.stdout.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                if not decoder['window_ready'].is_set():
+                    decoder['window'].extend(chunk[:window_bytes - len(decoder['window'])])
+                    if len(decoder['window']) >= window_bytes:
+                        decoder['window_ready'].set()
+                with decoder['lock']:
+                    for push_stream in push_streams:
+                        if push_stream not in decoder['detached']:
+                            push_stream.write(chunk)
+                            written[push_stream] = written.get(push_stream, 0) + len(chunk)
+                            if written[push_stream] >= limits.get(push_stream, float('inf')):
+                                decoder['detached'].add(push_stream)
+                                push_stream.close()
+
+            # Known before the streams end, so a consumer reaching the end of the audio can tell a failure apart
+            if process.wait() != 0:
+                decoder['error'] = ValueError(
+                    f'ERROR: Cannot decode audio of {video_file_path}: {process.stderr.read().decode().strip()}')
+        except Exception as exception:  # pylint: disable=broad-except
+            process.kill()
+            decoder['error'] = exception
+        finally:
+            # Consumers waiting for more audio are released whatever happened
+            decoder['window_ready'].set()
+            with decoder['lock']:
+                for push_stream in push_streams:
+                    if push_stream not in decoder['detached']:
+                        decoder['detached'].add(push_stream)
+                        push_stream.close()
+
+    threading.Thread(target=pump, daemon=True).start()
+
+    return decoder
+
+
+def __check_decoder(decoder):
+    """Raises the error of a decoder that failed, so audio cut short isn't taken for the end of the video
+    """
+    if decoder['error'] is not None:
+        raise decoder['error']
+
+
+def __diarize(decoder, audio_config, source_language):
+    """Diarizes decoded audio, raising once the audio ends if the decoder failed
+    """
+    yield from diarization.speech_diarization_audio(audio_config, source_language)
+
+    __check_decoder(decoder)
+
+
+def __detach(decoder, push_stream):
+    """Stops writing to, and closes, a push stream whose consumer is done
+    """
+    with decoder['lock']:
+        if push_stream not in decoder['detached']:
+            decoder['detached'].add(push_stream)
+            push_stream.close()
+
+
 @click.command()
 @click.option('-p', '--video-file-path', callback=get_video_file_path, flag_value='flag', is_flag=False, default=None, help='Path to video file')
 @click.option('-d', '--detect-language', flag_value=True, is_flag=True, default=False, help='Detect language')
@@ -81,24 +194,75 @@ def videotranscription(video_file_path, detect_language):
     Args:
         video_file_path (str): Path to audio file
     """
-    speech_videotranscription(video_file_path, detect_language)
+    [conversation_items, _] = speech_videotranscription(video_file_path, detect_language)
 
+    for conversation_item in conversation_items:
+        print(f"{conversation_item['participantId']}: {conversation_item['text']}")
 
-def speech_videotranscription(video_file_path, detect_language):
-    """
-    """
-    transcribed_audio_file_path = 'temp_transcribed_vid.wav'
-    # video = VideoFileClip("your_video.mp4")
-    video = VideoFileClip(video_file_path)
-    audio = video.audio
-    audio.write_audiofile(transcribed_audio_file_path, ffmpeg_params=['-ac', '1'])
 
-    audio_filepath = f'{os.getcwd()}/{transcribed_audio_file_path}'
+def speech_videotranscription(video_file_path, detect_language, window_seconds=language_identification.DEFAULT_WINDOW_SECONDS):
+    """Streams the audio of a video into the speech SDK while it is decoded. Nothing is written to disk
+
+    The decoded audio is written to a push stream for transcription, and if requested, the leading window of it to
+    a second push stream for language identification at the same time. Audio decoded while the language is
+    identified is held by the transcription stream, so transcription starting afterwards doesn't miss any of it.
+    The detected language is cached by the leading window of audio, see language_identification.get_detection_key.
+    If ffmpeg fails, language identification or the returned conversation items raise its error instead of ending
+    as an empty conversation.
+
+    Args:
+        video_file_path (str): Path to video file
+        detect_language (bool): Detect language
+        window_seconds (float): Length of audio analysed by language identification
+
+    Return:
+        [conversation_items(generator), source_language(str)]: Conversation items, yielded as they are transcribed,
+            and their language
+    """
+    transcription_stream = __create_push_stream()
+    push_streams = [transcription_stream]
+    limits = {}
 
     print(f'detect_language: {detect_language}')
     source_language='en-US'
+    detection = cache.MISSING
+    window_bytes = 0
+    if detect_language:
+        identification_stream = __create_push_stream()
+        push_streams.append(identification_stream)
+        window_bytes = int(window_seconds * SAMPLE_RATE) * BITS_PER_SAMPLE // 8 * CHANNELS
+        limits[identification_stream] = window_bytes
+
+    decoder = __start_decoder(video_file_path, push_streams, limits, window_bytes)
+
     if detect_language:
-        [source_language] = language_identification.speech_identifylanguage(audio_filepath)
-    # TODO: Delete file here
+        # Keyed on the audio language identification reads, once it is decoded
+        decoder['window_ready'].wait()
+        if len(decoder['window']) < window_bytes:
+            __check_decoder(decoder)
+
+        detection_key = language_identification.get_detection_key(
+            [bytes(decoder['window'])], [SAMPLE_RATE, BITS_PER_SAMPLE, CHANNELS], window_seconds=window_seconds,
+            windows=1)
+        detection = cache.get(detection_key)
+        if detection is not cache.MISSING:
+            __detach(decoder, identification_stream)
+
+    if detect_language and detection is cache.MISSING:
+        try:
+            detection = language_identification.speech_detectlanguage_audio(
+                speechsdk.audio.AudioConfig(stream=identification_stream))
+            cache.put(detection_key, detection)
+        except ValueError:
+            # No speech found in audio cut short by a failed decoder
+            __check_decoder(decoder)
+            raise
+        finally:
+            __detach(decoder, identification_stream)
+
+    if detection is not cache.MISSING:
+        source_language = detection['language']
+
+    audio_config = speechsdk.audio.AudioConfig(stream=transcription_stream)
 
-    return [audio_filepath, source_language]
+    return [__diarize(decoder, audio_config, source_language), source_language]
@@ -0,0 +1,125 @@
+"""Azure Core pipeline policies pacing the HTTP calls of a client through the limiter of its service
+
+The policies run after the client's retry policy, so every attempt, retries included, takes a token of the service
+and a slot of its concurrency limit. A throttled response pauses the service for every thread and coroutine of the
+process for its Retry-After, while the retry policy of the client waits the same Retry-After before the next
+attempt. Latency is reported per request class, see classify(), so a large batch isn't taken for congestion next
+to small requests.
+
+Reference:
+    Azure Core policies: https://learn.microsoft.com/en-us/python/api/azure-core/azure.core.pipeline.policies
+
+Example:
+    from chimerapulse.core.throttling import AsyncRateLimitPolicy, RateLimitPolicy
+
+    client = TextAnalyticsClient(..., per_retry_policies=[RateLimitPolicy('language')])
+    aio_client = aio.TextAnalyticsClient(..., per_retry_policies=[AsyncRateLimitPolicy('language')])
+"""
+import json
+import time
+from urllib.parse import urlparse
+
+from azure.core.pipeline.policies import AsyncHTTPPolicy, HTTPPolicy
+
+from chimerapulse.helpers import rate_limit
+
+# Status codes of a throttled or overloaded service
+THROTTLED_STATUS_CODES = [429, 503]
+
+
+def classify(http_request):
+    """Classifies a request by method, operation and size, so its latency is only compared with alike requests
+
+    The operation is the task kind of a synchronous Language request, or the URL path up to 'jobs' for a job, so
+    polls of every job share a class. The size class doubles with the body length.
+
+    Args:
+        http_request (HttpRequest): Request
+
+    Return:
+        (tuple): Method, operation and size class
+    """
+    content = getattr(http_request, 'body', None) or getattr(http_request, 'content', None)
+    try:
+        body = json.loads(content) if content else None
+    except (TypeError, ValueError):
+        body = None
+        content = None
+
+    path = urlparse(http_request.url).path
+    if '/jobs/' in path:
+        path = path[:path.index('/jobs/') + len('/jobs')]
+
+    operation = body['kind'] if isinstance(body, dict) and isinstance(body.get('kind'), str) else path
+
+    return (http_request.method, operation, len(content or '').bit_length())
+
+
+def report(service, response):
+    """Reports a throttled response to the limiter of its service
+
+    Args:
+        service (str): Service name
+        response (PipelineResponse): Response
+
+    Return:
+        (bool): The call completed without throttling
+    """
+    if response.http_response.status_code in THROTTLED_STATUS_CODES:
+        rate_limit.throttle(service, rate_limit.parse_retry_after(response.http_response.headers))
+        return False
+
+    return True
+
+
+class RateLimitPolicy(HTTPPolicy):
+    """Pipeline policy acquiring the limiter of a service around each attempt of a request
+    """
+    def __init__(self, service):
+        """
+        Args:
+            service (str): Service name, a key of rate_limit.SERVICES
+        """
+        super().__init__()
+        self.service = service
+
+    def send(self, request):
+        operation = classify(request.http_request)
+        rate_limit.acquire(self.service)
+        start = time.perf_counter()
+        succeeded = False
+
+        try:
+            response = self.next.send(request)
+            succeeded = report(self.service, response)
+
+            return response
+        finally:
+            rate_limit.release(self.service, succeeded, time.perf_counter() - start, operation)
+
+
+class AsyncRateLimitPolicy(AsyncHTTPPolicy):
+    """Pipeline policy of aio clients acquiring the limiter of a service around each attempt of a request, without
+    blocking the event loop
+    """
+    def __init__(self, service):
+        """
+        Args:
+            service (str): Service name, a key of rate_limit.SERVICES
+        """
+        super().__init__()
+        self.service = service
+
+    async def send(self, request):
+        operation = classify(request.http_request)
+        await rate_limit.acquire_async(self.service)
+        start = time.perf_counter()
+        succeeded = False
+
+        try:
+            response = await self.next.send(request)
+            succeeded = report(self.service, response)
+
+            return response
+        finally:
+            rate_limit.release(self.service, succeeded, time.perf_counter() - start, operation)
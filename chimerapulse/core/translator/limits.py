@@ -0,0 +1,10 @@
+"""Service limits for Azure AI Translator text translation requests
+
+Reference:
+    https://learn.microsoft.com/en-us/azure/ai-services/translator/service-limits
+"""
+# Maximum text elements in a single request
+MAX_ELEMENTS = 1000
+
+# Maximum characters of a single request, counted once per target language
+MAX_REQUEST_CHARS = 50000
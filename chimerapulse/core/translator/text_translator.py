@@ -8,40 +8,53 @@ Reference:
 
 Example:
     chi translator translatetext -s en-US -t fil -c 'Hello, goodmorning'
-"""
-import os
 
+    translations = text_translator.translator_translatetext_batch('en', ['fil', 'es', 'ko'], utterances)
+"""
 import click
-from dotenv import load_dotenv
 
 # Import TextTranslation packages
-from azure.ai.translation.text import TextTranslationClient, TranslatorCredential
 from azure.ai.translation.text.models import InputTextItem
-from azure.core.exceptions import HttpResponseError
 
 # Import helpers
+from chimerapulse.core import clients
 from chimerapulse.core.speech import text_to_speech
+from chimerapulse.core.translator import limits
+from chimerapulse.helpers import batching
+from chimerapulse.helpers import cache
+from chimerapulse.helpers import hedging
+from chimerapulse.helpers import metrics
+from chimerapulse.helpers import translation_memory
+
 
-# Load env vars
-load_dotenv()
+"""
+Private fxns
+"""
+def __get_cache_key(source_language, target_language, content):
+    return cache.make_key(
+        'translator_translatetext',
+        content,
+        {'from': source_language, 'to': target_language},
+        clients.TRANSLATOR_API_VERSION)
 
 
-def __authenticate_client():
-    """Authenticate service
+def __translate(source_language, target_languages, contents):
+    """Calls translator service with many text elements and target languages in one request
 
-    Returns:
-        (TextTranslationClient): Authenticated client
+    Return:
+        ([[dict]]): Target language and translated text of every element, in target language order
     """
-        
-    # Get Configuration Settings
-    translatorendpoint = os.getenv('TRANSLATOR_SERVICE_ENDPOINT')
-    translatorkey = os.getenv('TRANSLATOR_SERVICE_KEY')
-    translatorregion = os.getenv('TRANSLATOR_SERVICE_REGION')
+    text_translator = clients.get_translation_client()
+    input_text_elements = [InputTextItem(text=content) for content in contents]
 
-    # Connect to Azure Translator Service
-    credential = TranslatorCredential(translatorkey, translatorregion)
+    response = hedging.hedge('translator_translate', text_translator.translate,
+                              content=input_text_elements, to=target_languages, from_parameter=source_language,
+                              size=sum(len(content) for content in contents) * len(target_languages))
 
-    return TextTranslationClient(endpoint=translatorendpoint, credential=credential)
+    return [[{
+        "to": translatedobj.to,
+        "text": translatedobj.text
+    } for translatedobj in translation.translations] for translation in response]
 
 
 # TODO: Modify -c to accept path to document
@@ -64,20 +77,92 @@ def translator_translatetext(source_language, target_language, content):
         content (str): Text to be translated
     """
     print(f"Translating from {source_language}")
-    text_translator = __authenticate_client()
 
-    try:
-        input_text_elements = [InputTextItem(text=content)]
+    [[translatedobj]] = translator_translatetext_batch(source_language, [target_language], [content])
+
+    if "error" in translatedobj:
+        print(f"Error Code: {translatedobj['error']['code']}")
+        print(f"Message: {translatedobj['error']['message']}")
+        return
 
-        response = text_translator.translate(content=input_text_elements, to=[target_language], from_parameter=source_language)
-        translation = response[0] if response else None
+    print(f"Content was translated to: '{translatedobj['to']}'.")
+    print(f"Result: {translatedobj['text']}\n")
+    text_to_speech.synthesizeText(target_language, translatedobj['text'])
 
-        # Only one translation object per utterance
-        translatedobj = translation.translations[0]
-        print(f"Content was translated to: '{translatedobj.to}'.")
-        print(f"Result: {translatedobj.text}\n")
-        text_to_speech.synthesizeText(target_language, translatedobj.text)
 
-    except HttpResponseError as exception:
-        print(f"Error Code: {exception.error.code}")
-        print(f"Message: {exception.error.message}")
\ No newline at end of file
+@metrics.instrument('translator')
+def translator_translatetext_batch(source_language, target_languages, contents, max_workers=None):
+    """Translates many text segments into many languages. Segments are packed into requests within the service
+    element and character limits, with every target language in the same request, and requests are sent
+    concurrently. Cached translations are not requested again.
+
+    The translation memory is consulted before the translator. Exact matches are served as translations. Fuzzy
+    matches are attached to a fresh translation as a 'suggestion', or only in 'serve' mode, served with a 'match'
+    entry instead of translating.
+
+    Args:
+        source_language (str): Source language
+        target_languages ([str]): Languages to translate to
+        contents ([str]): Text segments to be translated
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        ([[dict]]): Target language and translated text, or error, of every segment and target language in input order
+    """
+    results = [[None] * len(target_languages) for _ in contents]
+    suggestions = {}
+
+    # Segments grouped by the target languages they are missing from the cache and translation memory, so each
+    # group is one set of requests
+    missing = {}
+    for index, content in enumerate(contents):
+        missing_languages = []
+        for language_index, target_language in enumerate(target_languages):
+            translatedobj = cache.get(__get_cache_key(source_language, target_language, content))
+            if translatedobj is not cache.MISSING:
+                results[index][language_index] = translatedobj
+                continue
+
+            match = translation_memory.lookup(source_language, target_language, content)
+            if match is not None and match['exact']:
+                translatedobj = {"to": target_language, "text": match['text']}
+                results[index][language_index] = translatedobj
+                cache.put(__get_cache_key(source_language, target_language, content), translatedobj)
+            elif match is not None and translation_memory.get_fuzzy_mode() == 'serve':
+                results[index][language_index] = {"to": target_language, "text": match['text'], "match": match}
+            else:
+                if match is not None:
+                    suggestions[(index, language_index)] = match
+                missing_languages.append(language_index)
+
+        if missing_languages:
+            missing.setdefault(tuple(missing_languages), []).append((index, content))
+
+    for language_indexes, pending in missing.items():
+        languages = [target_languages[language_index] for language_index in language_indexes]
+        batches = batching.split_batches(
+            pending, limits.MAX_ELEMENTS, limits.MAX_REQUEST_CHARS, size=lambda content: len(content) * len(languages))
+        responses = batching.dispatch(
+            lambda batch_contents: __translate(source_language, languages, batch_contents), batches, max_workers)
+
+        translated = {language: [] for language in languages}
+        for batch, response in zip(batches, responses):
+            for position, (index, content) in enumerate(batch):
+                for language_position, language_index in enumerate(language_indexes):
+                    if isinstance(response, Exception):
+                        results[index][language_index] = batching.exception_result(response)
+                        continue
+
+                    translatedobj = response[position][language_position]
+                    cache.put(__get_cache_key(source_language, languages[language_position], content), translatedobj)
+                    translated[languages[language_position]].append((content, translatedobj['text']))
+
+                    # Fuzzy match flagged for review next to the translation
+                    if (index, language_index) in suggestions:
+                        translatedobj = {**translatedobj, "suggestion": suggestions[(index, language_index)]}
+                    results[index][language_index] = translatedobj
+
+        for language, segments in translated.items():
+            translation_memory.add_many(source_language, language, segments)
+
+    return results
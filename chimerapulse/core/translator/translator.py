@@ -6,15 +6,14 @@ Example:
 """
 import click
 
-from chimerapulse.core.translator import text_translator
+from chimerapulse.helpers.lazy_group import LazyGroup
 
 
-@click.group()
+@click.group(cls=LazyGroup, lazy_commands={
+    'translatetext': ['chimerapulse.core.translator.text_translator:translatetext', 'Translate text'],
+})
 def translator():
     """
     Method called code module when calling command in cli for running quality checks and sonar scanner
     """
     pass  # pylint: disable=unnecessary-pass
-
-
-translator.add_command(text_translator.translatetext)
@@ -0,0 +1,210 @@
+"""This is a helper file for core.speech.text_to_speech capability that caches synthesized audio on disk
+
+Audio is keyed on a hash of (voice name, text or SSML, output format) and stored as one file per entry. Files are
+evicted least recently used first once the cache grows over its size cap. The size of the cache is kept as a running
+total, seeded once from the directory, so the directory is only walked when the cap is exceeded.
+
+Configuration:
+    CHIMERAPULSE_AUDIO_CACHE: Set to 0 to disable caching (default: 1)
+    CHIMERAPULSE_AUDIO_CACHE_DIR: Directory of the cache (default: ~/.cache/chimerapulse/audio)
+    CHIMERAPULSE_AUDIO_CACHE_MAX_BYTES: Maximum size of the cache (default: 512 MB)
+
+Example:
+    from chimerapulse.helpers import audio_cache
+
+    key = audio_cache.make_key('fil-PH-BlessicaNeural', text, 'Riff16Khz16BitMonoPcm')
+    filepath = audio_cache.get(key, 'wav')
+    if filepath is None:
+        ...
+        filepath = audio_cache.put(key, audio_data, 'wav')
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'chimerapulse', 'audio')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Declare global variables
+config = None
+cache_size = None
+lock = threading.Lock()
+
+
+"""
+Private fxns
+"""
+def __get_config():
+    global config
+
+    if config is None:
+        config = {
+            'enabled': os.getenv('CHIMERAPULSE_AUDIO_CACHE', '1') != '0',
+            'directory': os.getenv('CHIMERAPULSE_AUDIO_CACHE_DIR', DEFAULT_DIRECTORY),
+            'max_bytes': int(os.getenv('CHIMERAPULSE_AUDIO_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+        }
+
+    return config
+
+
+def __scan(directory):
+    """Lists cached files of the directory
+
+    Return:
+        ([[mtime(float), size(int), path(str)]]): Cached files
+    """
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            stat = entry.stat()
+            entries.append([stat.st_mtime, stat.st_size, entry.path])
+
+    return entries
+
+
+def __evict(directory, max_bytes):
+    """Removes least recently used files until the cache fits its size cap. Caller holds the lock
+
+    Return:
+        (int): Size of the cache once evicted. Files written by other processes are counted too
+    """
+    entries = __scan(directory)
+
+    total = sum(size for [_, size, _] in entries)
+    for [_, size, path] in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            pass
+        total -= size
+
+    return total
+
+
+"""
+Cache fxns
+"""
+def configure(enabled=None, directory=None, max_bytes=None):
+    """Overrides env var configuration. Values left as None keep their current setting.
+
+    Args:
+        enabled (bool): Enable caching
+        directory (str): Directory of the cache
+        max_bytes (int): Maximum size of the cache
+    """
+    global cache_size
+
+    with lock:
+        current = __get_config()
+        overrides = {
+            'enabled': enabled,
+            'directory': directory,
+            'max_bytes': max_bytes,
+        }
+        current.update({name: value for name, value in overrides.items() if value is not None})
+
+        # Seeded again from the new directory on next put
+        if directory is not None:
+            cache_size = None
+
+
+def make_key(voice, text, output_format):
+    """Creates cache key
+
+    Args:
+        voice (str): Voice name
+        text (str): Text or SSML
+        output_format (str): Output format name
+
+    Return:
+        (str): Content hash
+    """
+    payload = json.dumps([voice, output_format, text], ensure_ascii=False)
+
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get(key, extension):
+    """Retrieves path of cached audio, marking it as recently used
+
+    Args:
+        key (str): Cache key
+        extension (str): File extension of the audio format
+
+    Return:
+        (str): Path to audio file, or None if not cached
+    """
+    current = __get_config()
+    if not current['enabled']:
+        return None
+
+    filepath = os.path.join(current['directory'], f'{key}.{extension}')
+    try:
+        os.utime(filepath)
+    except FileNotFoundError:
+        return None
+
+    return filepath
+
+
+def put(key, audio_data, extension):
+    """Caches audio
+
+    Args:
+        key (str): Cache key
+        audio_data (bytes): Audio
+        extension (str): File extension of the audio format
+
+    Return:
+        (str): Path to audio file, or None if caching is disabled
+    """
+    current = __get_config()
+    if not current['enabled']:
+        return None
+
+    global cache_size
+
+    os.makedirs(current['directory'], exist_ok=True)
+    filepath = os.path.join(current['directory'], f'{key}.{extension}')
+
+    # Written under a temporary name, unique across threads and processes, so readers never see a partial file
+    [descriptor, temporary_filepath] = tempfile.mkstemp(suffix='.tmp', dir=current['directory'])
+    with os.fdopen(descriptor, 'wb') as file:
+        file.write(audio_data)
+
+    with lock:
+        if cache_size is None:
+            cache_size = sum(size for [_, size, _] in __scan(current['directory']))
+
+        try:
+            replaced_size = os.path.getsize(filepath)
+        except FileNotFoundError:
+            replaced_size = 0
+        os.replace(temporary_filepath, filepath)
+
+        cache_size += len(audio_data) - replaced_size
+        if cache_size > current['max_bytes']:
+            cache_size = __evict(current['directory'], current['max_bytes'])
+
+    return filepath if os.path.isfile(filepath) else None
+
+
+def clear():
+    """Removes every cached file
+    """
+    global cache_size
+
+    current = __get_config()
+    if not os.path.isdir(current['directory']):
+        return
+
+    with lock:
+        for entry in os.scandir(current['directory']):
+            if entry.is_file():
+                os.remove(entry.path)
+        cache_size = 0
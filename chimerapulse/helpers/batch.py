@@ -0,0 +1,275 @@
+"""This is a helper file for the 'batch' command that runs a pipeline over many media files
+
+Inputs are processed by a pool of processes. The result of each input is written to a JSON file of its own in the
+output directory, then the input is recorded in a checkpoint file. A run that crashes or is interrupted resumes
+from the checkpoint, skipping every input that already succeeded. Failed inputs are retried on the next run. An
+input whose result holds an error of a stage, e.g. a translation or summary the service rejected, is failed too.
+The rate limits of every service are divided between the worker processes, so together they stay within them.
+
+Example:
+    from chimerapulse.helpers import batch
+
+    inputs = batch.collect_inputs(['recordings/'], 'convosummarization')
+    for record in batch.run_batch('convosummarization', inputs, 'results'):
+        ...
+"""
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from chimerapulse.helpers import chimerapulse_helper
+from chimerapulse.helpers import rate_limit
+
+CHECKPOINT_FILE_NAME = 'checkpoint.jsonl'
+
+AUDIO_EXTENSIONS = ['.wav']
+VIDEO_EXTENSIONS = ['.mp4', '.mov', '.mkv', '.avi', '.webm']
+DOCUMENT_EXTENSIONS = ['.txt']
+
+# Helper fxn run for each input, its options, and the files picked up from a directory
+PIPELINES = {
+    'convosummarization': {
+        'fn': chimerapulse_helper.convosummarization_pipeline_helper,
+        'options': [],
+        'extensions': AUDIO_EXTENSIONS,
+    },
+    'summarizevideoconvo': {
+        'fn': chimerapulse_helper.summarizevideoconvo_pipeline_helper,
+        'options': ['detect_language'],
+        'extensions': VIDEO_EXTENSIONS,
+    },
+    'translatespeech': {
+        'fn': chimerapulse_helper.translatespeech_pipeline_helper,
+        'options': ['target_language'],
+        'extensions': AUDIO_EXTENSIONS,
+    },
+    'docsummarization': {
+        'fn': chimerapulse_helper.summarization_helper,
+        'options': [],
+        'extensions': DOCUMENT_EXTENSIONS,
+    },
+}
+
+# Input statuses
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+"""
+Private fxns
+"""
+def __read_manifest(manifest_path):
+    """Reads input paths from a manifest, one per line. Blank lines and lines starting with # are ignored.
+    Relative paths are relative to the manifest
+    """
+    base_directory = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r') as manifest:
+        lines = [line.strip() for line in manifest]
+
+    return [os.path.join(base_directory, line) for line in lines if line and not line.startswith('#')]
+
+
+def __get_output_path(output_dir, input_path):
+    """Output file of an input. The hash of the input path keeps inputs with the same name apart
+    """
+    digest = hashlib.sha1(input_path.encode('utf-8')).hexdigest()[:8]
+
+    return os.path.join(output_dir, f'{os.path.basename(input_path)}.{digest}.json')
+
+
+def __find_error(value, path='result'):
+    """Finds an error result of a stage anywhere in a pipeline result, see batching.error_result
+
+    Return:
+        (dict): Code, message and where the error is in the result, or None
+    """
+    if isinstance(value, dict):
+        if isinstance(value.get('error'), dict):
+            return {**value['error'], "path": path}
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return None
+
+    for key, item in items:
+        error = __find_error(item, f'{path}.{key}')
+        if error is not None:
+            return error
+
+    return None
+
+
+def __write_json(filepath, value):
+    # Written under a temporary name so a crash never leaves a partial file
+    temporary_filepath = f'{filepath}.{os.getpid()}.tmp'
+    with open(temporary_filepath, 'w') as file:
+        json.dump(value, file, indent=2, default=str)
+    os.replace(temporary_filepath, filepath)
+
+
+"""
+Batch fxns
+"""
+def collect_inputs(sources, pipeline, manifest_path=None):
+    """Collects input files from directories, glob patterns and a manifest
+
+    Args:
+        sources ([str]): Files, directories or glob patterns. Directories are searched recursively for the file
+            types of the pipeline
+        pipeline (str): Pipeline name
+        manifest_path (str): Path to a file listing one input per line
+
+    Return:
+        ([str]): Absolute paths of input files, without duplicates, in order
+    """
+    if pipeline not in PIPELINES:
+        raise ValueError(f'ERROR: pipeline value not allowed: {pipeline}. Allowed values: {", ".join(PIPELINES)}')
+
+    extensions = PIPELINES[pipeline]['extensions']
+    inputs = []
+
+    for source in sources:
+        if os.path.isdir(source):
+            for directory, directories, filenames in os.walk(source):
+                directories.sort()
+                inputs.extend(os.path.join(directory, filename) for filename in sorted(filenames)
+                              if os.path.splitext(filename)[1].lower() in extensions)
+        elif os.path.isfile(source):
+            inputs.append(source)
+        else:
+            matches = sorted(filepath for filepath in glob.glob(source, recursive=True) if os.path.isfile(filepath))
+            if not matches:
+                raise ValueError(f'ERROR: Cannot find input files at: {source}. Exiting...')
+            inputs.extend(matches)
+
+    if manifest_path:
+        inputs.extend(__read_manifest(manifest_path))
+
+    return list(dict.fromkeys(os.path.abspath(filepath) for filepath in inputs))
+
+
+def load_checkpoint(checkpoint_path, pipeline):
+    """Retrieves inputs a previous run of a pipeline already completed
+
+    Args:
+        checkpoint_path (str): Path to checkpoint file
+        pipeline (str): Pipeline name
+
+    Return:
+        (dict): Output path keyed by input path of succeeded inputs
+    """
+    completed = {}
+    if not os.path.isfile(checkpoint_path):
+        return completed
+
+    with open(checkpoint_path, 'r') as checkpoint:
+        for line in checkpoint:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Line cut short by a crash
+                continue
+
+            if record.get('pipeline') != pipeline:
+                continue
+            if record.get('status') == SUCCEEDED:
+                completed[record['input']] = record['output']
+            else:
+                completed.pop(record['input'], None)
+
+    return completed
+
+
+def process_input(pipeline, input_path, output_dir, options):
+    """Runs a pipeline over one input and writes its result. Runs in a worker process
+
+    Args:
+        pipeline (str): Pipeline name
+        input_path (str): Path to input file
+        output_dir (str): Directory of result files
+        options (dict): Pipeline options
+
+    Return:
+        (dict): Checkpoint record
+    """
+    record = {
+        "input": input_path,
+        "pipeline": pipeline,
+    }
+
+    try:
+        kwargs = {name: options[name] for name in PIPELINES[pipeline]['options'] if name in options}
+        result = PIPELINES[pipeline]['fn'](input_path, **kwargs)
+
+        # Written even if a stage failed, to see what did succeed. Only a succeeded input is skipped next run
+        record['output'] = __get_output_path(output_dir, input_path)
+        __write_json(record['output'], result)
+
+        error = __find_error(result)
+        if error is not None:
+            record['status'] = FAILED
+            record['error'] = error
+        else:
+            record['status'] = SUCCEEDED
+    except Exception as exception:  # pylint: disable=broad-except
+        record['status'] = FAILED
+        record['error'] = {
+            "code": type(exception).__name__,
+            "message": str(exception)
+        }
+
+    return record
+
+
+def run_batch(pipeline, inputs, output_dir, workers=None, options=None, checkpoint_path=None):
+    """Runs a pipeline over many inputs in a pool of processes, resuming from the checkpoint of an earlier run
+
+    Args:
+        pipeline (str): Pipeline name
+        inputs ([str]): Paths to input files
+        output_dir (str): Directory of result files
+        workers (int): Inputs processed at the same time. Defaults to the number of CPUs
+        options (dict): Pipeline options, e.g. target_language of translatespeech
+        checkpoint_path (str): Path to checkpoint file. Defaults to checkpoint.jsonl in the output directory
+
+    Yield:
+        (dict): Record of each input as it completes, skipped inputs first
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = checkpoint_path or os.path.join(output_dir, CHECKPOINT_FILE_NAME)
+    completed = load_checkpoint(checkpoint_path, pipeline)
+
+    remaining = []
+    for input_path in inputs:
+        if input_path in completed and os.path.isfile(completed[input_path]):
+            yield {"input": input_path, "pipeline": pipeline, "status": SKIPPED, "output": completed[input_path]}
+        else:
+            remaining.append(input_path)
+
+    if not remaining:
+        return
+
+    workers = min(workers or os.cpu_count() or 1, len(remaining))
+    # Every worker paces its own calls, so each takes its share of the service quotas
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=rate_limit.divide, initargs=(workers,))
+    try:
+        futures = [executor.submit(process_input, pipeline, input_path, output_dir, options or {})
+                   for input_path in remaining]
+
+        with open(checkpoint_path, 'a') as checkpoint:
+            for future in as_completed(futures):
+                record = future.result()
+
+                # Flushed to disk before moving on, so a crash loses at most the inputs in flight
+                checkpoint.write(json.dumps(record) + '\n')
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+
+                yield record
+    finally:
+        # Inputs not started yet are left for the next run
+        executor.shutdown(wait=True, cancel_futures=True)
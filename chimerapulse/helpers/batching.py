@@ -0,0 +1,176 @@
+"""This is a helper file for capabilities that accept many inputs per service request
+
+Inputs are packed into batches that respect a service's item count and character caps, then the batches are
+dispatched concurrently. Results are always returned in input order.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def split_batches(items, max_items, max_chars=None, size=len):
+    """Packs items into batches of at most max_items items and max_chars total characters. Order is preserved.
+
+    Args:
+        items ([(int, Any)]): Indexed items
+        max_items (int): Maximum items per batch
+        max_chars (int): Maximum total size per batch
+        size (callable): Returns size of an item
+
+    Return:
+        ([[(int, Any)]]): Batches of indexed items
+    """
+    batches = []
+    batch = []
+    batch_chars = 0
+
+    for index, item in items:
+        item_chars = size(item)
+        if batch and (len(batch) >= max_items or (max_chars and batch_chars + item_chars > max_chars)):
+            batches.append(batch)
+            batch = []
+            batch_chars = 0
+
+        batch.append((index, item))
+        batch_chars += item_chars
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def dispatch(fn, batches, max_workers=None):
+    """Calls fn for every batch concurrently
+
+    Args:
+        fn (callable): Called with the list of items of a batch
+        batches ([[(int, Any)]]): Batches of indexed items
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        ([Any]): fn result, or the raised exception, for every batch in batch order
+    """
+    if not batches:
+        return []
+
+    def run(batch):
+        try:
+            return fn([item for _, item in batch])
+        except Exception as exception:  # pylint: disable=broad-except
+            return exception
+
+    workers = min(len(batches), max_workers or DEFAULT_MAX_WORKERS)
+    if workers == 1:
+        return [run(batch) for batch in batches]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, batches))
+
+
+def error_result(code, message):
+    """Creates per-item error result
+
+    Args:
+        code (str): Error code
+        message (str): Error message
+
+    Return:
+        (dict): Error result
+    """
+    return {
+        "error": {
+            "code": code,
+            "message": message
+        }
+    }
+
+
+def exception_result(exception):
+    """Creates per-item error result from an exception raised for a whole batch
+
+    Args:
+        exception (Exception): Raised exception
+
+    Return:
+        (dict): Error result
+    """
+    error = getattr(exception, 'error', None)
+    code = getattr(error, 'code', None) or type(exception).__name__
+    message = getattr(error, 'message', None) or str(exception)
+
+    return error_result(code, message)
+
+
+def split_documents(texts, max_documents, max_document_chars, max_request_chars):
+    """Packs documents into requests within service limits. Oversized documents are rejected without a request.
+
+    Args:
+        texts ([str]): Documents to analyze
+        max_documents (int): Maximum documents per request
+        max_document_chars (int): Maximum characters per document
+        max_request_chars (int): Maximum characters per request
+
+    Return:
+        ([dict], [[(int, str)]]): Results with errors of rejected documents filled in, and batches to send
+    """
+    results = [None] * len(texts)
+    pending = []
+
+    for index, text in enumerate(texts):
+        if len(text) > max_document_chars:
+            results[index] = error_result(
+                'InvalidDocument', f'Document exceeds the limit of {max_document_chars} characters.')
+        else:
+            pending.append((index, text))
+
+    return results, split_batches(pending, max_documents, max_request_chars)
+
+
+def collect_documents(results, batches, responses, format_result):
+    """Maps document results of every batch back to input order
+
+    Args:
+        results ([dict]): Results returned by split_documents
+        batches ([[(int, str)]]): Batches returned by split_documents
+        responses ([Any]): Service response, or raised exception, for every batch
+        format_result (callable): Formats a successful document result
+
+    Return:
+        ([dict]): Formatted result or error for every document in input order
+    """
+    for batch, response in zip(batches, responses):
+        for position, (index, _) in enumerate(batch):
+            if isinstance(response, Exception):
+                results[index] = exception_result(response)
+                continue
+
+            document = response[position]
+            if document.is_error:
+                results[index] = error_result(document.error.code, document.error.message)
+            else:
+                results[index] = format_result(document)
+
+    return results
+
+
+def analyze_documents(texts, analyze, format_result, max_documents, max_document_chars, max_request_chars,
+                      max_workers=None):
+    """Analyzes many documents with a text analytics capability. Per-document errors are returned instead of raised.
+
+    Args:
+        texts ([str]): Documents to analyze
+        analyze (callable): Calls the service with a list of documents and returns document results in order
+        format_result (callable): Formats a successful document result
+        max_documents (int): Maximum documents per request
+        max_document_chars (int): Maximum characters per document
+        max_request_chars (int): Maximum characters per request
+        max_workers (int): Maximum concurrent requests
+
+    Return:
+        ([dict]): Formatted result or error for every document in input order
+    """
+    results, batches = split_documents(texts, max_documents, max_document_chars, max_request_chars)
+    responses = dispatch(analyze, batches, max_workers)
+
+    return collect_documents(results, batches, responses, format_result)
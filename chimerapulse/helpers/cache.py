@@ -0,0 +1,413 @@
+"""This is a helper file that caches service results by content
+
+Results are keyed on a hash of (operation, input text, parameters, API version), so the same input analyzed
+twice only pays the service latency once. An in-memory LRU tier is always used while caching is enabled. An
+optional on-disk tier (SQLite) survives restarts and is bounded by size and TTL. Its size is counted once when it
+is opened, then kept as a running total, so the bound is approximate while several processes share the directory.
+
+Coroutines use the async variants (get_many_async, put_many_async), which hand lookups and stores over to a thread
+while the on-disk tier is enabled, so its file I/O never blocks the event loop.
+
+Configuration:
+    CHIMERAPULSE_CACHE: Set to 0 to disable caching (default: 1)
+    CHIMERAPULSE_CACHE_SIZE: Maximum entries of the in-memory tier (default: 1024)
+    CHIMERAPULSE_CACHE_DIR: Directory of the on-disk tier. Disabled if not set
+    CHIMERAPULSE_CACHE_MAX_BYTES: Maximum size of the on-disk tier (default: 256 MB)
+    CHIMERAPULSE_CACHE_TTL: Seconds before an entry expires. Never expires if not set
+
+Example:
+    from chimerapulse.helpers import cache
+
+    key = cache.make_key('language_keyphrases', text, api_version='2023-04-01')
+    value = cache.get(key)
+    if value is cache.MISSING:
+        ...
+        cache.put(key, value)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DISK_FILE_NAME = 'results.sqlite3'
+
+# Returned by get() when a key is not cached
+MISSING = object()
+
+# Analysis job and task statuses whose results are complete
+SUCCEEDED_STATUSES = ['succeeded']
+
+# Declare global variables
+config = None
+memory = OrderedDict()
+disk = None
+disk_size = 0
+counters = {
+    'memory_hits': 0,
+    'disk_hits': 0,
+    'misses': 0,
+    'memory_evictions': 0,
+    'disk_evictions': 0,
+    'expirations': 0,
+}
+lock = threading.RLock()
+
+
+"""
+Private fxns
+"""
+def __get_config():
+    global config
+
+    if config is None:
+        ttl = os.getenv('CHIMERAPULSE_CACHE_TTL')
+        config = {
+            'enabled': os.getenv('CHIMERAPULSE_CACHE', '1') != '0',
+            'max_entries': int(os.getenv('CHIMERAPULSE_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+            'directory': os.getenv('CHIMERAPULSE_CACHE_DIR'),
+            'max_bytes': int(os.getenv('CHIMERAPULSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            'ttl': float(ttl) if ttl else None,
+        }
+
+    return config
+
+
+def __get_disk():
+    """Opens the on-disk tier on first use
+
+    Return:
+        (sqlite3.Connection): On-disk tier, or None if disabled
+    """
+    global disk
+    global disk_size
+
+    directory = __get_config()['directory']
+    if disk is None and directory:
+        os.makedirs(directory, exist_ok=True)
+        disk = sqlite3.connect(os.path.join(directory, DISK_FILE_NAME), check_same_thread=False)
+        disk.execute('CREATE TABLE IF NOT EXISTS results '
+                     '(key TEXT PRIMARY KEY, value TEXT, size INTEGER, created REAL, accessed REAL)')
+        disk.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        disk.commit()
+        [disk_size] = disk.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()
+
+    return disk
+
+
+def __is_expired(created, now):
+    ttl = __get_config()['ttl']
+
+    return ttl is not None and now - created > ttl
+
+
+def __delete_disk(connection, key, size):
+    global disk_size
+
+    connection.execute('DELETE FROM results WHERE key = ?', (key,))
+    disk_size -= size
+
+
+def __evict_disk(connection):
+    """Removes least recently used entries until the on-disk tier fits its size cap
+    """
+    global disk_size
+
+    max_bytes = __get_config()['max_bytes']
+
+    while disk_size > max_bytes:
+        row = connection.execute('SELECT key, size FROM results ORDER BY accessed LIMIT 1').fetchone()
+        if row is None:
+            disk_size = 0
+            break
+        __delete_disk(connection, row[0], row[1])
+        counters['disk_evictions'] += 1
+
+
+def __put_memory(key, serialized, created):
+    memory[key] = (serialized, created)
+    memory.move_to_end(key)
+
+    while len(memory) > __get_config()['max_entries']:
+        memory.popitem(last=False)
+        counters['memory_evictions'] += 1
+
+
+"""
+Cache fxns
+"""
+def configure(enabled=None, max_entries=None, directory=None, max_bytes=None, ttl=None):
+    """Overrides env var configuration. Values left as None keep their current setting.
+
+    Args:
+        enabled (bool): Enable caching
+        max_entries (int): Maximum entries of the in-memory tier
+        directory (str): Directory of the on-disk tier
+        max_bytes (int): Maximum size of the on-disk tier
+        ttl (float): Seconds before an entry expires
+    """
+    global disk
+
+    with lock:
+        current = __get_config()
+        overrides = {
+            'enabled': enabled,
+            'max_entries': max_entries,
+            'directory': directory,
+            'max_bytes': max_bytes,
+            'ttl': ttl,
+        }
+        current.update({name: value for name, value in overrides.items() if value is not None})
+
+        if directory is not None and disk is not None:
+            disk.close()
+            disk = None
+
+
+def make_key(operation, text, params=None, api_version=None):
+    """Creates cache key
+
+    Args:
+        operation (str): Operation name
+        text (str): Input text
+        params (dict): Parameters that change the result
+        api_version (str): Service API version
+
+    Return:
+        (str): Content hash
+    """
+    payload = json.dumps([operation, api_version, params, text], sort_keys=True, ensure_ascii=False)
+
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get(key):
+    """Retrieves a cached value
+
+    Args:
+        key (str): Cache key
+
+    Return:
+        (Any): Cached value, or MISSING
+    """
+    if not __get_config()['enabled']:
+        return MISSING
+
+    now = time.time()
+
+    with lock:
+        entry = memory.get(key)
+        if entry is not None:
+            if not __is_expired(entry[1], now):
+                memory.move_to_end(key)
+                counters['memory_hits'] += 1
+                return json.loads(entry[0])
+
+            del memory[key]
+            counters['expirations'] += 1
+
+        connection = __get_disk()
+        if connection is not None:
+            row = connection.execute('SELECT value, created, size FROM results WHERE key = ?', (key,)).fetchone()
+            if row is not None and not __is_expired(row[1], now):
+                connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+                connection.commit()
+                __put_memory(key, row[0], row[1])
+                counters['disk_hits'] += 1
+                return json.loads(row[0])
+
+            if row is not None:
+                __delete_disk(connection, key, row[2])
+                connection.commit()
+                counters['expirations'] += 1
+
+        counters['misses'] += 1
+
+    return MISSING
+
+
+def put(key, value):
+    """Caches a JSON serializable value
+
+    Args:
+        key (str): Cache key
+        value (Any): Value
+    """
+    global disk_size
+
+    if not __get_config()['enabled']:
+        return
+
+    serialized = json.dumps(value)
+    now = time.time()
+
+    with lock:
+        __put_memory(key, serialized, now)
+
+        connection = __get_disk()
+        if connection is not None:
+            replaced = connection.execute('SELECT size FROM results WHERE key = ?', (key,)).fetchone()
+            connection.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, serialized, len(serialized), now, now))
+            disk_size += len(serialized) - (replaced[0] if replaced is not None else 0)
+            __evict_disk(connection)
+            connection.commit()
+
+
+async def __run_off_loop(fn):
+    """Runs fn on the default executor of the running loop while the on-disk tier is enabled. The in-memory tier
+    alone does no I/O, so fn runs inline then
+    """
+    if __get_config()['directory'] is None:
+        return fn()
+
+    return await asyncio.get_running_loop().run_in_executor(None, fn)
+
+
+def __is_failed_job(value):
+    """Checks an analysis job result, e.g. of a conversation analysis, for a failed job, a failed task or errors
+    """
+    if value.get('errors') or str(value.get('status', 'succeeded')).lower() not in SUCCEEDED_STATUSES:
+        return True
+
+    for task in value['tasks'].get('items', []):
+        if str(task.get('status')).lower() not in SUCCEEDED_STATUSES or (task.get('results') or {}).get('errors'):
+            return True
+
+    return False
+
+
+def is_cacheable(value):
+    """Errors are never cached so they are retried. This covers errors of a single action of a combined result,
+    and failed tasks or errors of an analysis job result
+
+    Args:
+        value (Any): Result
+
+    Return:
+        (bool): Result can be cached
+    """
+    if not isinstance(value, dict):
+        return True
+
+    if isinstance(value.get('tasks'), dict) and __is_failed_job(value):
+        return False
+
+    return 'error' not in value and not any(isinstance(item, dict) and 'error' in item for item in value.values())
+
+
+def memoize(operation, text, compute, params=None, api_version=None):
+    """Returns cached result of an operation, computing and caching it on a miss
+
+    Args:
+        operation (str): Operation name
+        text (str): Input text
+        compute (callable): Computes the result
+        params (dict): Parameters that change the result
+        api_version (str): Service API version
+
+    Return:
+        (Any): Result
+    """
+    key = make_key(operation, text, params, api_version)
+
+    value = get(key)
+    if value is MISSING:
+        value = compute()
+        if is_cacheable(value):
+            put(key, value)
+
+    return value
+
+
+def memoize_many(operation, texts, compute, params=None, api_version=None):
+    """Returns cached results of an operation over many inputs. Only inputs missing from the cache are computed.
+
+    Args:
+        operation (str): Operation name
+        texts ([str]): Input texts
+        compute (callable): Computes results of a list of texts, in order
+        params (dict): Parameters that change the result
+        api_version (str): Service API version
+
+    Return:
+        ([Any]): Result of every input in order
+    """
+    keys = [make_key(operation, text, params, api_version) for text in texts]
+    results = [get(key) for key in keys]
+    missing = [index for index, result in enumerate(results) if result is MISSING]
+
+    if missing:
+        computed = compute([texts[index] for index in missing])
+        for index, value in zip(missing, computed):
+            results[index] = value
+            if is_cacheable(value):
+                put(keys[index], value)
+
+    return results
+
+
+async def get_many_async(keys):
+    """Retrieves many cached values like get, without blocking the event loop
+
+    Args:
+        keys ([str]): Cache keys
+
+    Return:
+        ([Any]): Value of every key in order, or MISSING
+    """
+    return await __run_off_loop(lambda: [get(key) for key in keys])
+
+
+async def put_many_async(entries):
+    """Caches many values like put, without blocking the event loop
+
+    Args:
+        entries ([(str, Any)]): Cache key and value
+    """
+    await __run_off_loop(lambda: [put(key, value) for key, value in entries])
+
+
+def stats():
+    """Retrieves hit, miss and eviction counters
+
+    Return:
+        (dict): Counters and tier sizes
+    """
+    with lock:
+        response = dict(counters)
+        response['memory_entries'] = len(memory)
+
+        connection = __get_disk()
+        if connection is not None:
+            [response['disk_entries']] = connection.execute('SELECT COUNT(*) FROM results').fetchone()
+            response['disk_bytes'] = disk_size
+
+    lookups = response['memory_hits'] + response['disk_hits'] + response['misses']
+    response['hit_rate'] = (response['memory_hits'] + response['disk_hits']) / lookups if lookups else 0.0
+
+    return response
+
+
+def clear():
+    """Removes every cached entry and resets counters
+    """
+    global disk_size
+
+    with lock:
+        memory.clear()
+
+        connection = __get_disk()
+        if connection is not None:
+            connection.execute('DELETE FROM results')
+            connection.commit()
+            disk_size = 0
+
+        for name in counters:
+            counters[name] = 0
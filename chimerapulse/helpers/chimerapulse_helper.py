@@ -1,9 +1,242 @@
 """This file contains logic for ChimeraPulse entry point(chimerapulse). Business logic is split into this file so it can be called through both CLI and REST API
 """
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from chimerapulse.core.language import conversation_summarization
 from chimerapulse.core.language import document_summarization
+from chimerapulse.core.language import limits
+from chimerapulse.core.language import text_analysis
+from chimerapulse.core.speech import diarization
+from chimerapulse.core.speech import language_identification
+from chimerapulse.core.speech import video_transcription
+from chimerapulse.core.translator import text_translator
+from chimerapulse.helpers import batching
+
+# Utterances analysed at the same time while streaming a live transcript
+DEFAULT_ANALYSIS_WORKERS = 4
+
+# Seconds without an event before a heartbeat is sent, so a disconnected client is noticed during silence
+DEFAULT_HEARTBEAT_SECONDS = 5
 
 
 def summarization_helper(file_path):
     document_contents = document_summarization.get_document_file_path(None, file_path)
+
+    return document_summarization_helper(document_contents)
+
+
+def document_summarization_helper(document_contents):
+    """Summarizes a document
+
+    Args:
+        document_contents (str): Document
+
+    Return:
+        (dict): Document summaries
+    """
+    # Documents over the service limit are summarized in chunks and merged
+    if len(document_contents) > limits.MAX_SUMMARIZATION_DOCUMENT_CHARS:
+        return document_summarization.language_summarizedocument_chunked(document_contents)
+
     return document_summarization.language_summarizedocument(document_contents)
 
+
+def convosummarization_helper(conversation_items, tasks='all'):
+    """Summarizes a conversation
+
+    Args:
+        conversation_items ([dict]): Conversation items
+        tasks (str|[str]): Summary aspects
+
+    Return:
+        (dict): Summary text keyed by aspect
+    """
+    return conversation_summarization.language_summarizeconversation(tasks, json.dumps(conversation_items))
+
+
+def convosummarization_batch_helper(conversations, tasks='all'):
+    """Summarizes many conversations in as few analysis jobs as the service limits allow
+
+    Args:
+        conversations ([[dict]]): Conversation items of each conversation
+        tasks (str|[str]): Summary aspects
+
+    Return:
+        ([dict]): Summary text keyed by aspect, or error, for every conversation in input order
+    """
+    return conversation_summarization.language_summarizeconversation_batch(tasks, conversations)
+
+
+def diarization_helper(file_path, source_language='en-US', segments=1):
+    """Diarizes an audio file with mono channel
+
+    Args:
+        file_path (str): Path to conversation audio file
+        source_language (str): Source language of audio, or 'auto' to detect it
+        segments (int): Number of parallel sessions
+
+    Return:
+        ([dict]): Conversation items
+    """
+    return json.loads(diarization.speech_diarization(file_path, source_language, segments))
+
+
+def videotranscription_helper(file_path, detect_language=False):
+    """Transcribes the audio of a video
+
+    Args:
+        file_path (str): Path to video file
+        detect_language (bool): Detect language
+
+    Return:
+        (dict): Source language and conversation items
+    """
+    [conversation_items, source_language] = video_transcription.speech_videotranscription(file_path, detect_language)
+
+    return {
+        "source_language": source_language,
+        "conversation_items": list(conversation_items)
+    }
+
+
+
+def rolling_convosummarization_helper(conversation_items):
+    """Summarizes a conversation while it is being diarized, printing the summary each time it is updated
+
+    Args:
+        conversation_items (iterable): Conversation items, e.g. from diarization.speech_diarization_stream
+
+    Return:
+        (dict): Summary text keyed by aspect
+    """
+    summary = {}
+    for summary in conversation_summarization.language_summarizeconversation_rolling('all', conversation_items):
+        print('\n... summary updated ...')
+        for aspect, text in summary.items():
+            print(f"{aspect}: {text}")
+
+    return summary
+
+
+def convosummarization_pipeline_helper(file_path):
+    """Diarizes audio with mono channel and summarizes the conversation
+
+    Args:
+        file_path (str): Path to conversation audio file
+
+    Return:
+        (dict): Conversation items and summary
+    """
+    conversation_items = diarization_helper(file_path)
+
+    return {
+        "conversation_items": conversation_items,
+        "summary": convosummarization_helper(conversation_items)
+    }
+
+
+def summarizevideoconvo_pipeline_helper(file_path, detect_language=False):
+    """Transcribes the audio of a video and summarizes the conversation
+
+    Args:
+        file_path (str): Path to video file
+        detect_language (bool): Detect language
+
+    Return:
+        (dict): Source language, conversation items and summary
+    """
+    response = videotranscription_helper(file_path, detect_language)
+    response["summary"] = convosummarization_helper(response["conversation_items"])
+
+    return response
+
+
+def translatespeech_pipeline_helper(file_path, target_language):
+    """Identifies the language of speech, translates it and analyzes the text, without playing the translation
+
+    Args:
+        file_path (str): Path to audio file
+        target_language (str): Language to translate to
+
+    Return:
+        (dict): Source language, transcript, translation and analysis
+    """
+    [source_language, result] = language_identification.speech_identifylanguage(file_path)
+    [[translation]] = text_translator.translator_translatetext_batch(source_language, [target_language], [result.text])
+
+    return {
+        "source_language": source_language,
+        "text": result.text,
+        "translation": translation,
+        "analysis": text_analysis.language_analyzetext(result.text)
+    }
+
+
+def live_diarization_helper(file_path, source_language='en-US', actions=None, cancel=None,
+                            heartbeat_seconds=DEFAULT_HEARTBEAT_SECONDS):
+    """Diarizes an audio file, yielding each utterance as soon as it is transcribed and its analysis as soon as
+    it is done
+
+    Utterances are analysed in the background, so a slow analysis never holds back the transcript. Closing the
+    generator, e.g. when a streaming client disconnects, stops the transcriber.
+
+    Args:
+        file_path (str): Path to conversation audio file
+        source_language (str): Source language of audio
+        actions ([str]): Analysis of each utterance, see text_analysis.ACTIONS. None or empty for transcript only
+        cancel (threading.Event): Stops transcription once set
+        heartbeat_seconds (float): Seconds without an event before None is yielded
+
+    Yield:
+        (dict): 'utterance', 'analysis', 'error' or 'end' event with its data, or None as a heartbeat
+    """
+    cancel = cancel or threading.Event()
+    events = queue.Queue()
+    end = object()
+
+    def publish_analysis(item_id, future):
+        try:
+            analysis = future.result()
+        except Exception as exception:  # pylint: disable=broad-except
+            analysis = batching.exception_result(exception)
+
+        if not cancel.is_set():
+            events.put({"event": "analysis", "data": {"id": item_id, **analysis}})
+
+    def transcribe(executor):
+        try:
+            for conversation_item in diarization.speech_diarization_stream(file_path, source_language, cancel=cancel):
+                events.put({"event": "utterance", "data": conversation_item})
+                if actions:
+                    future = executor.submit(text_analysis.language_analyzetext, conversation_item['text'], actions)
+                    future.add_done_callback(lambda done, item_id=conversation_item['id']: publish_analysis(item_id, done))
+        except Exception as exception:  # pylint: disable=broad-except
+            events.put({"event": "error", "data": batching.exception_result(exception)["error"]})
+        finally:
+            # Analysis still in flight is published before the stream ends, unless the client is gone. Then queued
+            # analysis is dropped instead of being sent to the service for nobody
+            executor.shutdown(wait=not cancel.is_set(), cancel_futures=cancel.is_set())
+            events.put(end)
+
+    actions = text_analysis.validate_actions(actions) if actions else []
+    executor = ThreadPoolExecutor(max_workers=DEFAULT_ANALYSIS_WORKERS)
+    threading.Thread(target=transcribe, args=(executor,), daemon=True).start()
+
+    try:
+        while True:
+            try:
+                event = events.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield None
+                continue
+
+            if event is end:
+                break
+            yield event
+
+        yield {"event": "end", "data": {}}
+    finally:
+        cancel.set()
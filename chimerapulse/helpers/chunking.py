@@ -0,0 +1,88 @@
+"""This is a helper file for capabilities that split text larger than a service limit into chunks
+
+Text is split on paragraph boundaries first, then on sentence boundaries, and only as a last resort on whitespace,
+so every chunk stays readable on its own.
+"""
+import re
+
+PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+"""
+Private fxns
+"""
+def __split_words(text, max_chars):
+    """Splits text on whitespace into pieces of at most max_chars characters
+    """
+    pieces = []
+    piece = ''
+
+    for word in text.split():
+        while len(word) > max_chars:
+            if piece:
+                pieces.append(piece)
+                piece = ''
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+
+        if piece and len(piece) + 1 + len(word) > max_chars:
+            pieces.append(piece)
+            piece = ''
+        piece = f'{piece} {word}' if piece else word
+
+    if piece:
+        pieces.append(piece)
+
+    return pieces
+
+
+def __pack(units, separator, max_chars):
+    """Greedily joins units into chunks of at most max_chars characters
+    """
+    chunks = []
+    chunk = ''
+
+    for unit in units:
+        if chunk and len(chunk) + len(separator) + len(unit) > max_chars:
+            chunks.append(chunk)
+            chunk = ''
+        chunk = f'{chunk}{separator}{unit}' if chunk else unit
+
+    if chunk:
+        chunks.append(chunk)
+
+    return chunks
+
+
+def split_text(text, max_chars):
+    """Splits text into chunks of at most max_chars characters on paragraph and sentence boundaries
+
+    Args:
+        text (str): Text to split
+        max_chars (int): Maximum characters per chunk
+
+    Return:
+        ([str]): Chunks in text order
+    """
+    paragraphs = []
+
+    for paragraph in PARAGRAPH_BOUNDARY.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        if len(paragraph) <= max_chars:
+            paragraphs.append(paragraph)
+            continue
+
+        sentences = []
+        for sentence in SENTENCE_BOUNDARY.split(paragraph):
+            if len(sentence) <= max_chars:
+                sentences.append(sentence)
+            else:
+                sentences.extend(__split_words(sentence, max_chars))
+
+        paragraphs.extend(__pack(sentences, ' ', max_chars))
+
+    return __pack(paragraphs, '\n\n', max_chars)
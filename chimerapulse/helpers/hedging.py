@@ -0,0 +1,258 @@
+"""This is a helper file that cuts tail latency of short synchronous service calls with hedged requests
+
+A hedged call sends its request, and if no response arrived by the 95th percentile latency of the operation, sends
+a duplicate and returns whichever succeeds first. Thresholds are learned from the latency of recent calls of each
+operation and size class, since a batch of many documents is slower than a single one without being late, so no
+hedge is sent until enough calls of the same size were seen. Calls sending more than CHIMERAPULSE_HEDGE_MAX_CHARS
+are never hedged, a duplicate would double a large request. Extra load is capped by a budget: each call earns a
+fraction of a hedge, and a hedge is only sent when a whole one was earned.
+
+Hedging is opt-in. Only use it for idempotent, short calls, e.g. sentiment or translation, not long-running jobs.
+
+Configuration:
+    CHIMERAPULSE_HEDGING: Set to 1 to enable hedging (default: 0)
+    CHIMERAPULSE_HEDGE_PERCENTILE: Latency percentile after which a hedge is sent (default: 95)
+    CHIMERAPULSE_HEDGE_MAX_RATIO: Maximum hedges per call, the cap on extra load (default: 0.05)
+    CHIMERAPULSE_HEDGE_WORKERS: Maximum requests in flight through hedged calls (default: 32)
+    CHIMERAPULSE_HEDGE_MAX_CHARS: Largest call hedged, in characters sent (default: 5120)
+
+Example:
+    from chimerapulse.helpers import hedging
+
+    response = hedging.hedge('language_keyphrases', client.extract_key_phrases, documents=documents,
+                             size=sum(len(document) for document in documents))
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_PERCENTILE = 95
+DEFAULT_MAX_RATIO = 0.05
+DEFAULT_MAX_WORKERS = 32
+# A single Language document at most
+DEFAULT_MAX_CHARS = 5120
+
+# Latencies kept per operation, and seen before a threshold is learned
+WINDOW_SIZE = 500
+MIN_SAMPLES = 20
+# Hedges that can be saved up for a burst of slow calls
+MAX_BUDGET = 10.0
+
+# Declare global variables
+config = None
+executor = None
+operations = {}
+lock = threading.Lock()
+
+
+"""
+Private fxns
+"""
+def __get_config():
+    global config
+
+    if config is None:
+        config = {
+            'enabled': os.getenv('CHIMERAPULSE_HEDGING', '0') == '1',
+            'percentile': float(os.getenv('CHIMERAPULSE_HEDGE_PERCENTILE', DEFAULT_PERCENTILE)),
+            'max_ratio': float(os.getenv('CHIMERAPULSE_HEDGE_MAX_RATIO', DEFAULT_MAX_RATIO)),
+            'max_workers': int(os.getenv('CHIMERAPULSE_HEDGE_WORKERS', DEFAULT_MAX_WORKERS)),
+            'max_chars': int(os.getenv('CHIMERAPULSE_HEDGE_MAX_CHARS', DEFAULT_MAX_CHARS)),
+        }
+
+    return config
+
+
+def __get_executor():
+    global executor
+
+    with lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=__get_config()['max_workers'],
+                                          thread_name_prefix='chimerapulse-hedge')
+
+    return executor
+
+
+def __get_operation_key(operation, size):
+    """Keys an operation by size class, the power of two at or above the characters sent
+    """
+    if size is None:
+        return operation
+
+    return f'{operation}/{2 ** max(0, size - 1).bit_length()}'
+
+
+def __get_operation(operation):
+    with lock:
+        state = operations.get(operation)
+        if state is None:
+            state = operations[operation] = {
+                'latencies': deque(maxlen=WINDOW_SIZE),
+                'budget': 0.0,
+                'counters': {'calls': 0, 'hedged': 0, 'hedge_wins': 0},
+            }
+
+    return state
+
+
+def __get_threshold(latencies):
+    if len(latencies) < MIN_SAMPLES:
+        return None
+
+    ordered = sorted(latencies)
+
+    return ordered[min(len(ordered) - 1, int(len(ordered) * __get_config()['percentile'] / 100))]
+
+
+def __record(state, latency):
+    with lock:
+        state['latencies'].append(latency)
+
+
+def __start(state):
+    """Counts a call and earns its share of a hedge
+
+    Return:
+        (float): Seconds to wait before hedging, or None until enough latencies were seen
+    """
+    with lock:
+        state['counters']['calls'] += 1
+        state['budget'] = min(MAX_BUDGET, state['budget'] + __get_config()['max_ratio'])
+
+        return __get_threshold(state['latencies'])
+
+
+def __take_hedge(state):
+    with lock:
+        if state['budget'] < 1:
+            return False
+
+        state['budget'] -= 1
+        state['counters']['hedged'] += 1
+
+        return True
+
+
+def __submit(state, fn, args, kwargs):
+    """Sends a request in the hedge pool, recording its latency once it succeeds, even if it lost the race
+    """
+    start = time.perf_counter()
+
+    def done(future):
+        if future.exception() is None:
+            __record(state, time.perf_counter() - start)
+
+    future = __get_executor().submit(fn, *args, **kwargs)
+    future.add_done_callback(done)
+
+    return future
+
+
+"""
+Hedging fxns
+"""
+def hedge(operation, fn, *args, size=None, **kwargs):
+    """Calls fn, sending a duplicate call if it is slower than most recent calls of the operation and size class
+
+    Args:
+        operation (str): Operation name thresholds are learned for, e.g. 'language_keyphrases'
+        fn (callable): Idempotent service call
+        *args: Arguments of fn
+        size (int): Characters sent by the call. Calls above the max_chars setting are not hedged
+        **kwargs: Keyword arguments of fn
+
+    Return:
+        (Any): Response of the first call that succeeds. If every call fails, the last exception is raised
+    """
+    settings = __get_config()
+    if not settings['enabled'] or (size is not None and size > settings['max_chars']):
+        return fn(*args, **kwargs)
+
+    state = __get_operation(__get_operation_key(operation, size))
+    threshold = __start(state)
+
+    # Not learned yet, called in place so the latency is measured without the hedge pool
+    if threshold is None:
+        start = time.perf_counter()
+        response = fn(*args, **kwargs)
+        __record(state, time.perf_counter() - start)
+        return response
+
+    primary = __submit(state, fn, args, kwargs)
+    pending = {primary}
+
+    done, _ = wait(pending, timeout=threshold)
+    if not done and __take_hedge(state):
+        pending.add(__submit(state, fn, args, kwargs))
+
+    # The call losing the race can't be recalled, it completes in the background
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is not primary:
+                    with lock:
+                        state['counters']['hedge_wins'] += 1
+                return future.result()
+
+            error = future.exception()
+
+    raise error
+
+
+def stats():
+    """Retrieves learned thresholds and counters of every hedged operation
+
+    Return:
+        (dict): Samples, threshold, calls, hedges sent and hedges that won keyed by operation, and
+            '<operation>/<size class>' for calls sized
+    """
+    response = {}
+
+    with lock:
+        for operation, state in operations.items():
+            response[operation] = {
+                "samples": len(state['latencies']),
+                "threshold_seconds": __get_threshold(state['latencies']),
+                **state['counters'],
+            }
+
+    return response
+
+
+def configure(enabled=None, percentile=None, max_ratio=None, max_chars=None):
+    """Overrides configuration from env vars. Learned thresholds are kept
+
+    Args:
+        enabled (bool): Enable hedging
+        percentile (float): Latency percentile after which a hedge is sent
+        max_ratio (float): Maximum hedges per call
+        max_chars (int): Largest call hedged, in characters sent
+    """
+    current = __get_config()
+
+    with lock:
+        if enabled is not None:
+            current['enabled'] = enabled
+        if percentile is not None:
+            current['percentile'] = percentile
+        if max_ratio is not None:
+            current['max_ratio'] = max_ratio
+        if max_chars is not None:
+            current['max_chars'] = max_chars
+
+
+def close_executor():
+    """Waits for calls in flight and stops the hedge pool. It is recreated on next use
+    """
+    global executor
+
+    with lock:
+        pool, executor = executor, None
+
+    if pool is not None:
+        pool.shutdown(wait=True)
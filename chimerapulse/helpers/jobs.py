@@ -0,0 +1,163 @@
+"""This is a helper file for the REST API that runs long operations as background jobs
+
+Submitted jobs wait in a bounded in-process queue and are run by a fixed pool of worker threads, so a request only
+pays for queueing its job and many long jobs can be in flight without tying up the server's request threads.
+
+Configuration:
+    CHIMERAPULSE_JOB_WORKERS: Jobs run at the same time (default: 4)
+    CHIMERAPULSE_JOB_QUEUE_SIZE: Jobs waiting for a worker before new jobs are rejected (default: 100)
+    CHIMERAPULSE_JOB_RETENTION: Finished jobs kept for polling (default: 1000)
+
+Example:
+    from chimerapulse.helpers import jobs
+
+    job_id = jobs.submit('diarization', diarization.speech_diarization, file_path)
+    ...
+    job = jobs.get(job_id)
+"""
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_RETENTION = 1000
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+# Declare global variables
+pending = None
+workers = []
+registry = OrderedDict()
+lock = threading.Lock()
+
+
+"""
+Private fxns
+"""
+def __run(job):
+    with lock:
+        job['status'] = RUNNING
+        job['started'] = time.time()
+        [fn, args, kwargs] = [job.pop('fn'), job.pop('args'), job.pop('kwargs')]
+
+    try:
+        result = fn(*args, **kwargs)
+        update = {'status': SUCCEEDED, 'result': result}
+    except Exception as exception:  # pylint: disable=broad-except
+        update = {'status': FAILED, 'error': {'code': type(exception).__name__, 'message': str(exception)}}
+
+    with lock:
+        job.update(update)
+        job['finished'] = time.time()
+        __evict()
+
+
+def __work():
+    while True:
+        __run(pending.get())
+        pending.task_done()
+
+
+def __evict():
+    """Removes the oldest finished jobs over the retention limit
+    """
+    retention = int(os.getenv('CHIMERAPULSE_JOB_RETENTION', DEFAULT_RETENTION))
+    finished = [job_id for job_id, job in registry.items() if job['status'] in (SUCCEEDED, FAILED)]
+
+    for job_id in finished[:max(0, len(finished) - retention)]:
+        del registry[job_id]
+
+
+def __start():
+    """Starts the worker pool on first use
+    """
+    global pending
+
+    if pending is None:
+        pending = queue.Queue(maxsize=int(os.getenv('CHIMERAPULSE_JOB_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)))
+        for _ in range(int(os.getenv('CHIMERAPULSE_JOB_WORKERS', DEFAULT_WORKERS))):
+            worker = threading.Thread(target=__work, daemon=True)
+            worker.start()
+            workers.append(worker)
+
+
+"""
+Job fxns
+"""
+def submit(kind, fn, *args, **kwargs):
+    """Queues a job without waiting for it
+
+    Args:
+        kind (str): Job kind
+        fn (callable): Runs the job and returns its JSON serializable result
+        *args: Arguments of fn
+        **kwargs: Keyword arguments of fn
+
+    Return:
+        (str): Job id
+
+    Raises:
+        queue.Full: Too many jobs are waiting for a worker
+    """
+    job = {
+        'id': str(uuid.uuid4()),
+        'kind': kind,
+        'status': QUEUED,
+        'submitted': time.time(),
+        'fn': fn,
+        'args': args,
+        'kwargs': kwargs,
+    }
+
+    with lock:
+        __start()
+        registry[job['id']] = job
+        try:
+            pending.put_nowait(job)
+        except queue.Full:
+            del registry[job['id']]
+            raise
+
+    return job['id']
+
+
+def get(job_id, include_result=False):
+    """Retrieves job status
+
+    Args:
+        job_id (str): Job id
+        include_result (bool): Include result or error of a finished job
+
+    Return:
+        (dict): Job, or None if unknown
+    """
+    with lock:
+        job = registry.get(job_id)
+        if job is None:
+            return None
+
+        hidden = ['fn', 'args', 'kwargs'] if include_result else ['fn', 'args', 'kwargs', 'result']
+        return {name: value for name, value in job.items() if name not in hidden}
+
+
+def stats():
+    """Retrieves job counts by status
+
+    Return:
+        (dict): Job count keyed by status, and number of workers
+    """
+    with lock:
+        response = {status: 0 for status in [QUEUED, RUNNING, SUCCEEDED, FAILED]}
+        for job in registry.values():
+            response[job['status']] += 1
+        response['workers'] = len(workers)
+
+    return response
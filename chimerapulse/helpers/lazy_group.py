@@ -0,0 +1,59 @@
+"""This is a helper file for the CLI entry points that loads subcommands only when they are invoked
+
+A command module pulls in its service SDKs (the speech SDK native library, moviepy, tkinter, ...) when imported.
+Subcommands of a lazy group are registered by import path instead, so 'chi --help' or 'chi language keyphrases'
+only import what that invocation needs. Help text of unloaded subcommands comes from the registration.
+
+Example:
+    @click.group(cls=LazyGroup, lazy_commands={
+        'keyphrases': ['chimerapulse.core.language.key_phrases:keyphrases', 'Extract key phrases'],
+    })
+    def language():
+        ...
+"""
+import importlib
+
+import click
+
+
+class LazyGroup(click.Group):
+    """Click group resolving subcommands from 'module:attribute' import paths on first use
+    """
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        """
+        Args:
+            lazy_commands (dict): [import path, short help] keyed by subcommand name
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            [module_name, attribute] = self.lazy_commands[cmd_name][0].split(':')
+            self.add_command(getattr(importlib.import_module(module_name), attribute), cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        """Lists subcommands in help without importing the ones not loaded yet
+        """
+        names = self.list_commands(ctx)
+        if not names:
+            return
+
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            if name in self.commands:
+                command = self.commands[name]
+                if command.hidden:
+                    continue
+                rows.append((name, command.get_short_help_str(limit)))
+            else:
+                rows.append((name, click.utils.make_default_short_help(self.lazy_commands[name][1], limit)))
+
+        with formatter.section('Commands'):
+            formatter.write_dl(rows)
@@ -0,0 +1,252 @@
+"""This is a helper file that tracks many in-flight long-running operations (LROs) on one shared loop
+
+Analysis jobs are started, then handed over to the loop, which polls each one when it is due and resolves its
+future once it completes. A caller doesn't block a thread per job, so one worker can keep hundreds of jobs in
+flight. Polling is adaptive: an operation is polled fast at first, then less and less often, and never sooner
+than the Retry-After the service asked for.
+
+Operations whose SDK poller can't be driven by the loop (begin_analyze_actions builds its own polling method) are
+watched instead. They poll on their own at the tunable polling interval, and resolve their future when done.
+
+Configuration:
+    CHIMERAPULSE_LRO_INITIAL_DELAY: Seconds before the first poll of an operation (default: 0.25)
+    CHIMERAPULSE_LRO_MAX_DELAY: Maximum seconds between polls of an operation (default: 5)
+    CHIMERAPULSE_LRO_BACKOFF: Multiplier of the delay after each poll (default: 1.5)
+    CHIMERAPULSE_LRO_WORKERS: Maximum status requests in flight (default: 8)
+    CHIMERAPULSE_LRO_POLLING_INTERVAL: Polling interval of watched SDK pollers (default: 1)
+
+Example:
+    from chimerapulse.helpers import lro
+
+    futures = [lro.track(poll, resolve) for [poll, resolve] in operations]
+    results = lro.results(futures)
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_INITIAL_DELAY = 0.25
+DEFAULT_MAX_DELAY = 5.0
+DEFAULT_BACKOFF = 1.5
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_POLLING_INTERVAL = 1.0
+
+# Declare global variables
+config = None
+executor = None
+loop = None
+scheduled = []
+sequence = itertools.count()
+counters = {'tracked': 0, 'watched': 0, 'polls': 0, 'completed': 0, 'failed': 0}
+condition = threading.Condition()
+
+
+"""
+Private fxns
+"""
+def __get_config():
+    global config
+
+    if config is None:
+        config = {
+            'initial_delay': float(os.getenv('CHIMERAPULSE_LRO_INITIAL_DELAY', DEFAULT_INITIAL_DELAY)),
+            'max_delay': float(os.getenv('CHIMERAPULSE_LRO_MAX_DELAY', DEFAULT_MAX_DELAY)),
+            'backoff': float(os.getenv('CHIMERAPULSE_LRO_BACKOFF', DEFAULT_BACKOFF)),
+            'max_workers': int(os.getenv('CHIMERAPULSE_LRO_WORKERS', DEFAULT_MAX_WORKERS)),
+            'polling_interval': float(os.getenv('CHIMERAPULSE_LRO_POLLING_INTERVAL', DEFAULT_POLLING_INTERVAL)),
+        }
+
+    return config
+
+
+def __start_loop():
+    """Starts the loop thread and its status request pool on first use. Caller holds the condition
+    """
+    global executor
+    global loop
+
+    if loop is None:
+        executor = ThreadPoolExecutor(max_workers=__get_config()['max_workers'], thread_name_prefix='chimerapulse-lro')
+        loop = threading.Thread(target=__run, name='chimerapulse-lro-loop', daemon=True)
+        loop.start()
+
+
+def __schedule(operation, delay):
+    with condition:
+        heapq.heappush(scheduled, (time.monotonic() + delay, next(sequence), operation))
+        condition.notify()
+
+
+def __run():
+    """Hands every operation that is due over to the status request pool
+    """
+    while True:
+        with condition:
+            while not scheduled or scheduled[0][0] > time.monotonic():
+                condition.wait(scheduled[0][0] - time.monotonic() if scheduled else None)
+
+            due = []
+            while scheduled and scheduled[0][0] <= time.monotonic():
+                due.append(heapq.heappop(scheduled)[2])
+
+        for operation in due:
+            executor.submit(__poll, operation)
+
+
+def __fail(future, exception):
+    with condition:
+        counters['failed'] += 1
+    if not future.cancelled():
+        future.set_exception(exception)
+
+
+def __settle(future, fn):
+    """Resolves a future with the return value, or the exception, of fn
+    """
+    try:
+        result = fn()
+    except Exception as exception:  # pylint: disable=broad-except
+        __fail(future, exception)
+        return
+
+    with condition:
+        counters['completed'] += 1
+    if not future.cancelled():
+        future.set_result(result)
+
+
+def __poll(operation):
+    future = operation['future']
+    # Dropped by its caller
+    if future.cancelled():
+        return
+
+    with condition:
+        counters['polls'] += 1
+
+    try:
+        [finished, retry_after] = operation['poll']()
+    except Exception as exception:  # pylint: disable=broad-except
+        __fail(future, exception)
+        return
+
+    if finished:
+        __settle(future, operation['resolve'])
+        return
+
+    settings = __get_config()
+    operation['delay'] = min(settings['max_delay'], operation['delay'] * settings['backoff'])
+    __schedule(operation, max(operation['delay'], retry_after or 0))
+
+
+"""
+Operation fxns
+"""
+def track(poll, resolve):
+    """Polls an operation on the shared loop until it finishes
+
+    Args:
+        poll (callable): Requests the status of the operation. Returns [finished(bool), retry_after(float)], where
+            retry_after is the seconds the service asked to wait, or None. Raises if the operation failed
+        resolve (callable): Returns the result of the finished operation
+
+    Return:
+        (Future): Resolves to the result of the operation
+    """
+    future = Future()
+    operation = {
+        'poll': poll,
+        'resolve': resolve,
+        'future': future,
+        'delay': __get_config()['initial_delay'],
+    }
+
+    with condition:
+        __start_loop()
+        counters['tracked'] += 1
+
+    __schedule(operation, operation['delay'])
+
+    return future
+
+
+def watch(poller, resolve=None):
+    """Resolves a future once an SDK poller polling on its own finishes, without blocking a thread on it
+
+    Args:
+        poller (LROPoller): Started poller
+        resolve (callable): Transforms the result of the poller, e.g. reads its pages. Runs once it finished
+
+    Return:
+        (Future): Resolves to the result of the poller
+    """
+    future = Future()
+
+    with condition:
+        counters['watched'] += 1
+
+    # Called once the operation completes, whether it succeeded or not, or right away if it already did
+    poller.add_done_callback(lambda _: __settle(
+        future, lambda: resolve(poller.result()) if resolve is not None else poller.result()))
+
+    return future
+
+
+def results(futures):
+    """Waits for many operations
+
+    Args:
+        futures ([Future]): Futures returned by track or watch
+
+    Return:
+        ([Any]): Result, or the raised exception, of every operation in order
+    """
+    responses = []
+
+    for future in futures:
+        try:
+            responses.append(future.result())
+        except Exception as exception:  # pylint: disable=broad-except
+            responses.append(exception)
+
+    return responses
+
+
+def get_polling_interval():
+    """Retrieves polling interval of SDK pollers that poll on their own
+
+    Return:
+        (float): Seconds between polls
+    """
+    return __get_config()['polling_interval']
+
+
+def stats():
+    """Retrieves operation and poll counters
+
+    Return:
+        (dict): Counters and operations waiting for their next poll
+    """
+    with condition:
+        return {**counters, 'scheduled': len(scheduled)}
+
+
+def configure(initial_delay=None, max_delay=None, backoff=None, polling_interval=None):
+    """Overrides configuration from env vars. Operations in flight use the new delays from their next poll
+
+    Args:
+        initial_delay (float): Seconds before the first poll of an operation
+        max_delay (float): Maximum seconds between polls of an operation
+        backoff (float): Multiplier of the delay after each poll
+        polling_interval (float): Polling interval of watched SDK pollers
+    """
+    current = __get_config()
+
+    with condition:
+        for name, value in [('initial_delay', initial_delay), ('max_delay', max_delay), ('backoff', backoff),
+                            ('polling_interval', polling_interval)]:
+            if value is not None:
+                current[name] = value
@@ -0,0 +1,317 @@
+"""This is a helper file that records latency of every service stage and volume sent to every service
+
+Service stage functions (language_*, speech_*, translator_*, synthesizeText), sync or async, are wrapped with
+instrument(), which records a latency histogram and call and error counters labelled by service and stage. Only
+stages that call a service themselves are instrumented, not the wrappers delegating to them, so no call is timed
+twice.
+
+Volume is recorded where requests leave the process, so cached results are never counted: characters of HTTP
+requests by chimerapulse.core.metering.MeteringPolicy, characters synthesized and seconds of audio recognized by
+the speech modules, through record_characters() and record_audio().
+
+Metrics are kept in process and rendered in the Prometheus text exposition format, served at /metrics by the REST
+API and dumped by the CLI with 'chi --metrics <path> <command>'.
+
+Configuration:
+    CHIMERAPULSE_METRICS: Set to 0 to disable recording (default: 1)
+
+Example:
+    from chimerapulse.helpers import metrics
+
+    @metrics.instrument('language')
+    def language_keyphrases_batch(texts, max_workers=None):
+        ...
+
+    print(metrics.render())
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600]
+
+PREFIX = 'chimerapulse'
+
+# Help text of each metric
+DESCRIPTIONS = {
+    'stage_duration_seconds': ('histogram', 'Wall time of a service stage'),
+    'stage_calls_total': ('counter', 'Calls of a service stage'),
+    'stage_errors_total': ('counter', 'Calls of a service stage that raised, by exception type'),
+    'service_characters_total': ('counter', 'Characters of text sent to a service, by operation'),
+    'service_audio_seconds_total': ('counter', 'Seconds of audio recognized by a service, by operation'),
+}
+
+# Declare global variables
+enabled = None
+histograms = {}
+counters = {}
+lock = threading.Lock()
+
+
+"""
+Private fxns
+"""
+def __is_enabled():
+    global enabled
+
+    if enabled is None:
+        enabled = os.getenv('CHIMERAPULSE_METRICS', '1') != '0'
+
+    return enabled
+
+
+def __format_labels(labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels)
+
+
+def __record_call(labels, start, exception):
+    observe('stage_duration_seconds', labels, time.perf_counter() - start)
+    increment('stage_calls_total', labels)
+    if exception is not None:
+        increment('stage_errors_total', labels + (('error', type(exception).__name__),))
+
+
+"""
+Metric fxns
+"""
+def increment(name, labels, amount=1):
+    """Adds to a counter
+
+    Args:
+        name (str): Metric name, without prefix
+        labels (tuple): (name, value) label pairs
+        amount (float): Amount added
+    """
+    if not __is_enabled():
+        return
+
+    with lock:
+        counters[(name, labels)] = counters.get((name, labels), 0) + amount
+
+
+def observe(name, labels, value):
+    """Records a value in a histogram
+
+    Args:
+        name (str): Metric name, without prefix
+        labels (tuple): (name, value) label pairs
+        value (float): Observed value
+    """
+    if not __is_enabled():
+        return
+
+    with lock:
+        histogram = histograms.get((name, labels))
+        if histogram is None:
+            histogram = histograms[(name, labels)] = {
+                'buckets': [0] * len(DEFAULT_BUCKETS),
+                'sum': 0,
+                'count': 0
+            }
+
+        # Buckets are cumulative, a value counts in every bucket whose bound it does not exceed
+        for index, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                histogram['buckets'][index] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def record_characters(service, operation, characters):
+    """Counts characters of text sent to a service
+
+    Args:
+        service (str): Service label, e.g. 'language', 'speech' or 'translator'
+        operation (str): Operation label, e.g. 'synthesis' or a request path
+        characters (int): Characters sent
+    """
+    increment('service_characters_total', (('service', service), ('operation', operation)), characters)
+
+
+def record_audio(service, operation, seconds):
+    """Counts seconds of audio recognized by a service
+
+    Args:
+        service (str): Service label, e.g. 'speech'
+        operation (str): Operation label, e.g. 'transcription' or 'language_identification'
+        seconds (float): Seconds of audio
+    """
+    increment('service_audio_seconds_total', (('service', service), ('operation', operation)), seconds)
+
+
+def instrument(service, stage=None):
+    """Decorates a service stage function to record its latency, calls and errors. Generator functions are timed
+    until they are exhausted or closed, and coroutine functions until they return
+
+    Args:
+        service (str): Service label, e.g. 'language', 'speech' or 'translator'
+        stage (str): Stage label. Defaults to the function name
+
+    Return:
+        (callable): Decorator
+    """
+    def decorator(fn):
+        labels = (('service', service), ('stage', stage or fn.__name__))
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def async_generator_wrapper(*args, **kwargs):
+                generator = fn(*args, **kwargs)
+                start = time.perf_counter()
+                exception = None
+                try:
+                    async for item in generator:
+                        yield item
+                except Exception as error:
+                    exception = error
+                    raise
+                finally:
+                    # Closed early by the consumer, the stage is closed too before it is timed
+                    await generator.aclose()
+                    if __is_enabled():
+                        __record_call(labels, start, exception)
+
+            return async_generator_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def coroutine_wrapper(*args, **kwargs):
+                if not __is_enabled():
+                    return await fn(*args, **kwargs)
+
+                start = time.perf_counter()
+                try:
+                    response = await fn(*args, **kwargs)
+                except Exception as exception:
+                    __record_call(labels, start, exception)
+                    raise
+
+                __record_call(labels, start, None)
+                return response
+
+            return coroutine_wrapper
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                if not __is_enabled():
+                    return (yield from fn(*args, **kwargs))
+
+                start = time.perf_counter()
+                try:
+                    response = yield from fn(*args, **kwargs)
+                except GeneratorExit:
+                    # Closed early by the consumer
+                    __record_call(labels, start, None)
+                    raise
+                except Exception as exception:
+                    __record_call(labels, start, exception)
+                    raise
+
+                __record_call(labels, start, None)
+                return response
+
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not __is_enabled():
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                response = fn(*args, **kwargs)
+            except Exception as exception:
+                __record_call(labels, start, exception)
+                raise
+
+            __record_call(labels, start, None)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot():
+    """Retrieves every metric
+
+    Return:
+        (dict): Counters and histograms keyed by metric name, each a list of labels and values
+    """
+    response = {}
+
+    with lock:
+        for (name, labels), value in sorted(counters.items()):
+            response.setdefault(f'{PREFIX}_{name}', []).append({"labels": dict(labels), "value": value})
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            response.setdefault(f'{PREFIX}_{name}', []).append({
+                "labels": dict(labels),
+                "buckets": dict(zip([str(bound) for bound in DEFAULT_BUCKETS], histogram['buckets'])),
+                "sum": histogram['sum'],
+                "count": histogram['count']
+            })
+
+    return response
+
+
+def render():
+    """Renders every metric in the Prometheus text exposition format
+
+    Return:
+        (str): Metrics
+    """
+    lines = []
+
+    with lock:
+        for name, (kind, description) in DESCRIPTIONS.items():
+            if kind == 'histogram':
+                series = sorted((labels, histogram) for (metric, labels), histogram in histograms.items()
+                                if metric == name)
+            else:
+                series = sorted((labels, value) for (metric, labels), value in counters.items() if metric == name)
+            if not series:
+                continue
+
+            lines.append(f'# HELP {PREFIX}_{name} {description}')
+            lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+            for labels, value in series:
+                if kind != 'histogram':
+                    lines.append(f'{PREFIX}_{name}{{{__format_labels(labels)}}} {value}')
+                    continue
+
+                for bound, count in zip(DEFAULT_BUCKETS, value['buckets']):
+                    bucket_labels = __format_labels(labels + (('le', str(bound)),))
+                    lines.append(f'{PREFIX}_{name}_bucket{{{bucket_labels}}} {count}')
+                lines.append(f'{PREFIX}_{name}_bucket{{{__format_labels(labels + (("le", "+Inf"),))}}} {value["count"]}')
+                lines.append(f'{PREFIX}_{name}_sum{{{__format_labels(labels)}}} {value["sum"]}')
+                lines.append(f'{PREFIX}_{name}_count{{{__format_labels(labels)}}} {value["count"]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def dump(filepath):
+    """Writes every metric to a file, as JSON if the path ends with .json, otherwise in the Prometheus text format
+
+    Args:
+        filepath (str): Path to metrics file
+    """
+    with open(filepath, 'w') as file:
+        if filepath.endswith('.json'):
+            json.dump(snapshot(), file, indent=2)
+        else:
+            file.write(render())
+
+
+def reset():
+    """Clears every metric
+    """
+    with lock:
+        histograms.clear()
+        counters.clear()
@@ -0,0 +1,388 @@
+"""This is a helper file that paces calls to each Azure service so bursts don't end in throttling storms
+
+Every service has one limiter shared by all threads of the process:
+    - A token bucket refilled at the transactions per second of the pricing tier. A throttled response pauses the
+      bucket for its Retry-After, so every caller backs off together instead of retrying on its own
+    - An AIMD concurrency limit. It grows by about one call per round trip while latency stays near the best seen
+      for the same operation, and is halved when the service throttles or latency rises, settling just under what
+      the service sustains. Operations are compared with themselves only, e.g. a large batch with other large
+      batches, so slow kinds of calls don't pass for congestion
+
+HTTP clients of chimerapulse.core.clients and chimerapulse.aio.clients go through the limiter in a pipeline policy.
+Speech SDK sessions acquire and release it around each recognition or synthesis. Coroutines wait with
+acquire_async, without blocking the event loop.
+
+Limits are per process. Processes sharing a subscription, e.g. the workers of 'chi batch', each take their share
+with divide().
+
+Configuration:
+    CHIMERAPULSE_RATE_LIMIT: Set to 0 to disable limiting (default: 1)
+    CHIMERAPULSE_<SERVICE>_TPS: Transactions per second of a service, e.g. CHIMERAPULSE_LANGUAGE_TPS
+    CHIMERAPULSE_<SERVICE>_CONCURRENCY: Maximum calls in flight to a service
+
+Example:
+    from chimerapulse.helpers import rate_limit
+
+    rate_limit.acquire('translator')
+    start = time.perf_counter()
+    succeeded = False
+    try:
+        response = ...
+        succeeded = True
+    finally:
+        rate_limit.release('translator', succeeded, time.perf_counter() - start)
+"""
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Transactions per second and maximum calls in flight of each service. Defaults follow the standard tiers
+SERVICES = {
+    'language': {'tps': 16, 'concurrency': 32},
+    'conversations': {'tps': 16, 'concurrency': 16},
+    'translator': {'tps': 10, 'concurrency': 16},
+    'speech': {'tps': 20, 'concurrency': 100},
+    'speech_synthesis': {'tps': 200, 'concurrency': 100},
+}
+
+# Calls in flight a service starts with before the limit adapts
+DEFAULT_INITIAL_CONCURRENCY = 4
+# Latency above this multiple of the best seen latency counts as congestion
+LATENCY_TOLERANCE = 2.0
+# Multiplier of the concurrency limit on congestion or throttling
+DECREASE_FACTOR = 0.5
+# Pause of a throttled service that didn't send Retry-After
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+# Weight of a new latency in the drifting best latency, so it follows the service when it slows down for good
+BASELINE_DRIFT = 0.01
+
+# Declare global variables
+config = None
+limiters = {}
+lock = threading.Lock()
+
+
+"""
+Private fxns
+"""
+def __get_config():
+    global config
+
+    if config is None:
+        config = {
+            'enabled': os.getenv('CHIMERAPULSE_RATE_LIMIT', '1') != '0',
+            'services': {
+                service: {
+                    'tps': float(os.getenv(f'CHIMERAPULSE_{service.upper()}_TPS', defaults['tps'])),
+                    'concurrency': int(os.getenv(f'CHIMERAPULSE_{service.upper()}_CONCURRENCY', defaults['concurrency'])),
+                } for service, defaults in SERVICES.items()
+            },
+        }
+
+    return config
+
+
+def __get_limiter(service):
+    """Retrieves limiter of a service, creating it on first use
+    """
+    limiter = limiters.get(service)
+    if limiter is not None:
+        return limiter
+
+    settings = __get_config()['services'].get(service)
+    if settings is None:
+        raise ValueError(f'ERROR: service value not allowed: {service}. Allowed values: {", ".join(SERVICES)}')
+    if settings['tps'] <= 0 or settings['concurrency'] < 1:
+        raise ValueError(f'ERROR: {service} rate limit must be positive: {settings}')
+
+    with lock:
+        limiter = limiters.get(service)
+        if limiter is None:
+            limiter = limiters[service] = {
+                'condition': threading.Condition(),
+                'tps': settings['tps'],
+                'max_concurrency': settings['concurrency'],
+                # A full bucket lets a burst of one second through
+                'tokens': max(1.0, settings['tps']),
+                'refilled': time.monotonic(),
+                'paused_until': 0.0,
+                'decreased': 0.0,
+                'concurrency': float(min(DEFAULT_INITIAL_CONCURRENCY, settings['concurrency'])),
+                'in_flight': 0,
+                # Best latency seen of each operation
+                'baselines': {},
+                # [loop, future] of coroutines waiting for a release
+                'waiters': [],
+                'counters': {'calls': 0, 'throttled': 0, 'waited_seconds': 0.0},
+            }
+
+    return limiter
+
+
+def __refill(limiter, now):
+    capacity = max(1.0, limiter['tps'])
+    limiter['tokens'] = min(capacity, limiter['tokens'] + (now - limiter['refilled']) * limiter['tps'])
+    limiter['refilled'] = now
+
+
+def __get_wait(limiter):
+    """Retrieves how long a call must wait before it may start
+
+    Return:
+        (float): Seconds to wait, 0 if it may start now, or None if it waits for a release
+    """
+    now = time.monotonic()
+    __refill(limiter, now)
+
+    if now < limiter['paused_until']:
+        return limiter['paused_until'] - now
+    if limiter['in_flight'] >= int(limiter['concurrency']):
+        return None
+    if limiter['tokens'] < 1:
+        return (1 - limiter['tokens']) / limiter['tps']
+
+    return 0
+
+
+def __take(limiter, start):
+    limiter['tokens'] -= 1
+    limiter['in_flight'] += 1
+    limiter['counters']['calls'] += 1
+    limiter['counters']['waited_seconds'] += time.monotonic() - start
+
+
+def __wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def __notify(limiter):
+    """Wakes every thread and coroutine waiting on a limiter
+    """
+    limiter['condition'].notify_all()
+
+    for [loop, waiter] in limiter['waiters']:
+        try:
+            loop.call_soon_threadsafe(__wake, waiter)
+        except RuntimeError:
+            # Loop closed
+            pass
+    limiter['waiters'].clear()
+
+
+def __decrease(limiter, started, now):
+    # Calls started before the last decrease ran under the old limit, so they don't decrease it again
+    if started < limiter['decreased']:
+        return
+
+    limiter['concurrency'] = max(1.0, limiter['concurrency'] * DECREASE_FACTOR)
+    limiter['decreased'] = now
+
+
+"""
+Limiter fxns
+"""
+def acquire(service):
+    """Waits until a call to a service may start, then takes a token and a slot of the concurrency limit. Every
+    acquire must be followed by a release
+
+    Args:
+        service (str): Service name, a key of SERVICES
+    """
+    if not __get_config()['enabled']:
+        return
+
+    limiter = __get_limiter(service)
+    start = time.monotonic()
+
+    with limiter['condition']:
+        wait = __get_wait(limiter)
+        while wait != 0:
+            # Woken by a release if None
+            limiter['condition'].wait(wait)
+            wait = __get_wait(limiter)
+
+        __take(limiter, start)
+
+
+async def acquire_async(service):
+    """Waits without blocking the event loop until a call to a service may start, then takes a token and a slot of
+    the concurrency limit. Shares the limiter of threads calling acquire. Every acquire must be followed by a
+    release
+
+    Args:
+        service (str): Service name, a key of SERVICES
+    """
+    if not __get_config()['enabled']:
+        return
+
+    limiter = __get_limiter(service)
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+
+    while True:
+        with limiter['condition']:
+            wait = __get_wait(limiter)
+            if wait == 0:
+                __take(limiter, start)
+                return
+
+            waiter = loop.create_future()
+            limiter['waiters'].append([loop, waiter])
+
+        try:
+            # Woken by a release if wait is None
+            await asyncio.wait([waiter], timeout=wait)
+        finally:
+            with limiter['condition']:
+                if [loop, waiter] in limiter['waiters']:
+                    limiter['waiters'].remove([loop, waiter])
+
+
+def release(service, succeeded=True, latency=None, operation=None):
+    """Frees the slot taken by acquire and adapts the concurrency limit to the outcome of the call
+
+    Args:
+        service (str): Service name
+        succeeded (bool): The call completed. False if it failed or was throttled
+        latency (float): Seconds the call took. None for a long-lived session, whose duration says nothing
+            about congestion
+        operation (Hashable): Kind of call, e.g. request path and size class. Latency is only compared with
+            earlier calls of the same operation
+    """
+    if not __get_config()['enabled']:
+        return
+
+    limiter = __get_limiter(service)
+
+    with limiter['condition']:
+        limiter['in_flight'] -= 1
+
+        if succeeded and latency is not None:
+            baseline = limiter['baselines'].get(operation)
+            if baseline is None or latency < baseline:
+                limiter['baselines'][operation] = latency
+            else:
+                limiter['baselines'][operation] = baseline + (latency - baseline) * BASELINE_DRIFT
+
+        if succeeded and latency is not None and latency > limiter['baselines'][operation] * LATENCY_TOLERANCE:
+            now = time.monotonic()
+            __decrease(limiter, now - latency, now)
+        elif succeeded:
+            # Additive increase, about one more call in flight per round trip of calls
+            limiter['concurrency'] = min(
+                limiter['max_concurrency'], limiter['concurrency'] + 1 / limiter['concurrency'])
+
+        __notify(limiter)
+
+
+def throttle(service, retry_after=None):
+    """Records a throttled call. Pauses the service for every caller and halves its concurrency limit
+
+    Args:
+        service (str): Service name
+        retry_after (float): Seconds the service asked to wait
+    """
+    if not __get_config()['enabled']:
+        return
+
+    limiter = __get_limiter(service)
+
+    with limiter['condition']:
+        pause = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER_SECONDS
+        now = time.monotonic()
+        # Calls throttled together only halve the limit once
+        if limiter['paused_until'] <= now:
+            __decrease(limiter, now, now)
+        limiter['paused_until'] = max(limiter['paused_until'], now + pause)
+        limiter['tokens'] = 0.0
+        limiter['counters']['throttled'] += 1
+
+        __notify(limiter)
+
+
+def parse_retry_after(headers):
+    """Reads the wait a throttled response asks for
+
+    Args:
+        headers (Mapping): Response headers, case insensitive
+
+    Return:
+        (float): Seconds to wait, or None if not sent
+    """
+    for name, scale in [('retry-after-ms', 1000), ('x-ms-retry-after-ms', 1000), ('retry-after', 1)]:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) / scale)
+        except ValueError:
+            # HTTP date
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+
+    return None
+
+
+def stats():
+    """Retrieves state of every limiter in use
+
+    Return:
+        (dict): Concurrency limit, calls in flight, best latency of the fastest operation and counters keyed by
+            service
+    """
+    response = {}
+
+    for service, limiter in list(limiters.items()):
+        with limiter['condition']:
+            response[service] = {
+                "tps": limiter['tps'],
+                "concurrency": int(limiter['concurrency']),
+                "max_concurrency": limiter['max_concurrency'],
+                "in_flight": limiter['in_flight'],
+                "baseline_latency": min(limiter['baselines'].values(), default=None),
+                "operations": len(limiter['baselines']),
+                **limiter['counters'],
+            }
+
+    return response
+
+
+def configure(enabled=None, services=None):
+    """Overrides configuration from env vars. Limiters in use are reset
+
+    Args:
+        enabled (bool): Enable limiting
+        services (dict): {'tps', 'concurrency'} keyed by service name, merged into the current settings
+    """
+    current = __get_config()
+
+    with lock:
+        if enabled is not None:
+            current['enabled'] = enabled
+        for service, settings in (services or {}).items():
+            current['services'].setdefault(service, dict(SERVICES.get(service, {}))).update(settings)
+        limiters.clear()
+
+
+def divide(parts):
+    """Divides the transactions per second and calls in flight of every service between processes calling it at the
+    same time, e.g. as the initializer of a process pool, so together they stay within the quota. Limiters in use
+    are reset
+
+    Args:
+        parts (int): Processes sharing the quota
+    """
+    if parts <= 1:
+        return
+
+    configure(services={
+        service: {
+            'tps': settings['tps'] / parts,
+            'concurrency': max(1, settings['concurrency'] // parts),
+        } for service, settings in __get_config()['services'].items()
+    })
@@ -0,0 +1,208 @@
+"""This is a helper file for core.speech.diarization capability that transcribes long audio in parallel segments
+
+Audio is split near evenly spaced points, at the quietest moment around each point, so no utterance is cut in half.
+Neighbouring segments overlap so both sessions transcribe the audio around a boundary. Utterances heard by both are
+used to map the speaker labels of a session onto the labels of the session before it.
+
+Offsets and durations are in ticks (100 nanoseconds), the unit of speech SDK results.
+"""
+import wave
+from array import array
+
+TICKS_PER_SECOND = 10000000
+
+# Length of the frames compared when looking for silence
+SILENCE_FRAME_SECONDS = 0.1
+
+# How far from an evenly spaced point a split may move to land on silence
+DEFAULT_SEARCH_SECONDS = 30
+
+# Speaker label of utterances the service couldn't attribute
+UNKNOWN_SPEAKER = 'Unknown'
+
+
+"""
+Private fxns
+"""
+def __frame_energy(samples):
+    return sum(map(abs, samples)) / len(samples) if samples else 0
+
+
+def __find_silence(samples, sample_rate, target, search_seconds):
+    """Finds the quietest frame around a target sample
+
+    Return:
+        (int): Sample in the middle of the quietest frame
+    """
+    frame_samples = max(1, int(sample_rate * SILENCE_FRAME_SECONDS))
+    search_samples = int(sample_rate * search_seconds)
+    start = max(0, target - search_samples)
+    end = min(len(samples), target + search_samples)
+
+    quietest = target
+    quietest_energy = None
+    for frame_start in range(start, max(start + 1, end - frame_samples), frame_samples):
+        energy = __frame_energy(samples[frame_start:frame_start + frame_samples])
+        if quietest_energy is None or energy < quietest_energy:
+            quietest = frame_start + frame_samples // 2
+            quietest_energy = energy
+
+    return quietest
+
+
+def __to_ticks(sample, sample_rate):
+    return sample * TICKS_PER_SECOND // sample_rate
+
+
+def __map_speakers(previous, current, region_start, region_end, used_labels, max_speakers=None):
+    """Maps the speaker labels of a segment onto global labels
+
+    Speakers are matched by how long their utterances overlap in time with utterances of the previous segment inside
+    the overlap region. Speakers left unmatched are new speakers and take a new global label. Only once the
+    max_speakers hint is reached do they take a global label not claimed in this segment instead.
+
+    Args:
+        previous ([dict]): Utterances of the previous segment, with global labels
+        current ([dict]): Utterances of the segment, with session labels
+        region_start (int): Start of the overlap region
+        region_end (int): End of the overlap region
+        used_labels ([str]): Global labels so far, in order of appearance
+        max_speakers (int): Speakers in the conversation, if known
+
+    Return:
+        (dict): Global label keyed by session label
+    """
+    scores = {}
+    for utterance in current:
+        for previous_utterance in previous:
+            start = max(utterance['offset'], previous_utterance['offset'], region_start)
+            end = min(utterance['offset'] + utterance['duration'],
+                      previous_utterance['offset'] + previous_utterance['duration'],
+                      region_end)
+            if end > start:
+                key = (utterance['speaker_id'], previous_utterance['speaker_id'])
+                scores[key] = scores.get(key, 0) + end - start
+
+    mapping = {UNKNOWN_SPEAKER: UNKNOWN_SPEAKER}
+    for (speaker_id, label), _ in sorted(scores.items(), key=lambda score: score[1], reverse=True):
+        if speaker_id not in mapping and label not in mapping.values():
+            mapping[speaker_id] = label
+
+    labels = list(used_labels)
+    for utterance in current:
+        speaker_id = utterance['speaker_id']
+        if speaker_id in mapping:
+            continue
+
+        free_labels = [label for label in labels if label not in mapping.values()]
+        if max_speakers is None or len(labels) < max_speakers or not free_labels:
+            free_labels = [f'Guest-{len(labels) + 1}']
+            labels.append(free_labels[0])
+        mapping[speaker_id] = free_labels[0]
+
+    return mapping
+
+
+"""
+Segmentation fxns
+"""
+def read_wav(filepath):
+    """Reads a 16-bit mono PCM WAV file
+
+    Args:
+        filepath (str): Path to audio file
+
+    Return:
+        (dict): Sample rate and samples
+    """
+    with wave.open(filepath, 'rb') as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+            raise ValueError(f'ERROR: Segmented diarization needs 16-bit mono audio: {filepath}. Exiting...')
+
+        samples = array('h')
+        samples.frombytes(wav.readframes(wav.getnframes()))
+
+    return {
+        "sample_rate": wav.getframerate(),
+        "samples": samples
+    }
+
+
+def split_segments(audio, segments, overlap_seconds, search_seconds=DEFAULT_SEARCH_SECONDS):
+    """Splits audio into segments at silence points
+
+    Args:
+        audio (dict): Audio returned by read_wav
+        segments (int): Number of segments
+        overlap_seconds (float): Audio shared by neighbouring segments on each side of a boundary
+        search_seconds (float): How far a boundary may move from an evenly spaced point
+
+    Return:
+        ([dict]): Segments in audio order. Each holds its PCM bytes, its start and the boundaries of the audio it owns
+    """
+    samples = audio['samples']
+    sample_rate = audio['sample_rate']
+    overlap_samples = int(sample_rate * overlap_seconds)
+
+    boundaries = [0]
+    for index in range(1, segments):
+        boundary = __find_silence(samples, sample_rate, len(samples) * index // segments, search_seconds)
+        if boundaries[-1] < boundary < len(samples):
+            boundaries.append(boundary)
+    boundaries.append(len(samples))
+
+    split = []
+    for boundary_start, boundary_end in zip(boundaries, boundaries[1:]):
+        start = max(0, boundary_start - overlap_samples)
+        end = min(len(samples), boundary_end + overlap_samples)
+        split.append({
+            "frames": samples[start:end].tobytes(),
+            "offset": __to_ticks(start, sample_rate),
+            "boundary_start": __to_ticks(boundary_start, sample_rate),
+            "boundary_end": __to_ticks(boundary_end, sample_rate),
+        })
+
+    return split
+
+
+def stitch_segments(split, segment_utterances, overlap_seconds, max_speakers=None):
+    """Stitches utterances of parallel sessions into one conversation
+
+    Args:
+        split ([dict]): Segments returned by split_segments
+        segment_utterances ([[dict]]): Utterances of each segment with 'offset' relative to the segment,
+            'duration' and session 'speaker_id'
+        overlap_seconds (float): Overlap passed to split_segments
+        max_speakers (int): Speakers in the conversation, if known. Speakers not heard in an overlap only take the
+            label of an earlier speaker once that many speakers were labelled
+
+    Return:
+        ([dict]): Utterances ordered by global 'offset', with global 'speaker_id'
+    """
+    overlap = int(overlap_seconds * TICKS_PER_SECOND)
+    stitched = []
+    previous = []
+    used_labels = []
+
+    for index, (segment, utterances) in enumerate(zip(split, segment_utterances)):
+        utterances = [{**utterance, "offset": segment['offset'] + utterance['offset']} for utterance in utterances]
+
+        boundary_start = segment['boundary_start']
+        mapping = __map_speakers(
+            previous, utterances, boundary_start - overlap, boundary_start + overlap, used_labels, max_speakers)
+
+        mapped = []
+        for utterance in utterances:
+            utterance['speaker_id'] = mapping.get(utterance['speaker_id'], utterance['speaker_id'])
+            if utterance['speaker_id'] not in used_labels and utterance['speaker_id'] != UNKNOWN_SPEAKER:
+                used_labels.append(utterance['speaker_id'])
+            mapped.append(utterance)
+
+        # Utterances in the overlap belong to the segment that owns their start
+        is_last = index == len(split) - 1
+        stitched.extend(utterance for utterance in mapped
+                        if utterance['offset'] >= boundary_start and
+                        (is_last or utterance['offset'] < segment['boundary_end']))
+        previous = mapped
+
+    return sorted(stitched, key=lambda utterance: utterance['offset'])
@@ -3,19 +3,33 @@
 Reference:
     Lists of conversation summarization tasks: https://learn.microsoft.com/en-us/rest/api/language/conversation-analysis-runtime/submit-job?view=rest-language-2023-04-01&tabs=HTTP#summaryaspect
 """
+from chimerapulse.helpers import batching
+
 convo_summarization_tasks = ['chapterTitle', 'issue', 'narrative', 'resolution']
 
+# Statuses of a task that holds results, of every conversation or only some
+RESULT_STATUSES = ['succeeded', 'partiallyCompleted']
+
 def __validate_tasks_type(tasks):
     if tasks == 'all':
         return convo_summarization_tasks
 
-    if type(tasks) is not bytearray:
+    if not isinstance(tasks, (list, tuple)):
         raise ValueError('ERROR: Parameter tasks datatype should be an array') 
 
     return tasks
 
 
-def create_tasks(tasks='all'):
+def create_tasks(tasks='all', grouped=False):
+    """Creates conversation summarization tasks
+
+    Args:
+        tasks (str|[str]): Summary aspects, or 'all'
+        grouped (bool): Request every aspect in a single task instead of one task per aspect
+
+    Return:
+        ([dict]): Tasks
+    """
     tasks_obj = []
 
     validated_tasks = __validate_tasks_type(tasks)
@@ -30,4 +44,62 @@ def create_tasks(tasks='all'):
             "parameters": {"summaryAspects": [task]}
         })
 
+    if grouped and tasks_obj:
+        return [{
+            "taskName": 'summary task',
+            "kind": "ConversationalSummarizationTask",
+            "parameters": {"summaryAspects": list(validated_tasks)}
+        }]
+
     return tasks_obj
+
+
+def __get_task_error(result, task=None):
+    """Creates the error of a job without tasks, or of a task that failed or holds no results, from the job errors
+    if there are any
+    """
+    job_errors = result.get("errors") or []
+    if job_errors:
+        return batching.error_result(job_errors[0].get("code", 'TaskFailed'), job_errors[0].get("message", ''))["error"]
+    if task is None:
+        return batching.error_result('TaskFailed', f'Job ended with status {result.get("status", "unknown")}.')["error"]
+
+    return batching.error_result(
+        'TaskFailed', f'Task {task.get("taskName", "")} ended with status {task.get("status", "unknown")}.')["error"]
+
+
+def parse_summaries(result, conversation_ids=('conversation1',)):
+    """Collects summaries of a conversation analysis job result
+
+    A task that failed, or holds no results, fails every conversation of the job with its error. So does a job
+    that holds no tasks.
+
+    Args:
+        result (dict): Conversation analysis job result
+        conversation_ids ([str]): Ids of the conversations sent in the job
+
+    Return:
+        (dict): Summary text keyed by aspect, keyed by conversation id. Failed conversations hold an 'error' entry
+    """
+    summaries = {}
+
+    tasks = (result.get("tasks") or {}).get("items")
+    if not tasks:
+        return {conversation_id: {"error": __get_task_error(result)} for conversation_id in conversation_ids}
+
+    for task in tasks:
+        task_result = task.get("results")
+        if task.get("status") not in RESULT_STATUSES or not task_result:
+            for conversation_id in conversation_ids:
+                summaries.setdefault(conversation_id, {})["error"] = __get_task_error(result, task)
+            continue
+
+        for error in task_result.get("errors", []):
+            summaries.setdefault(error["id"], {})["error"] = error["error"]
+
+        for conversation_result in task_result.get("conversations", []):
+            conversation_summaries = summaries.setdefault(conversation_result["id"], {})
+            for summary in conversation_result["summaries"]:
+                conversation_summaries[summary["aspect"]] = summary["text"]
+
+    return summaries
@@ -0,0 +1,317 @@
+"""This is a helper file for core.translator.text_translator capability that reuses earlier translations
+
+Every translated segment is stored in a local SQLite translation memory. Before a segment is sent to the translator,
+the memory is searched for the same segment (exact match) or a similar one (fuzzy match). Exact matches are looked up
+by hash on a unique index. Fuzzy candidates come from a full-text index scoped to the language pair, and only the
+few closest in length are scored, so lookups stay fast as the memory grows.
+
+A fuzzy match can differ from the segment in a word that flips its meaning ("I can't help" and "I can help" score
+0.96), so by default fuzzy matches are only flagged as suggestions next to a fresh translation. Serving them in place
+of a translation is an explicit opt-in.
+
+Configuration:
+    CHIMERAPULSE_TM: Set to 0 to disable the translation memory (default: 1)
+    CHIMERAPULSE_TM_PATH: Path of the memory (default: ~/.cache/chimerapulse/translation_memory.sqlite3)
+    CHIMERAPULSE_TM_THRESHOLD: Minimum similarity of a fuzzy match, 0 to 1 (default: 0.9). Set to 1 for exact matches only
+    CHIMERAPULSE_TM_FUZZY: 'flag' to still translate and attach fuzzy matches as suggestions, 'serve' to return them
+        in place of a translation (default: flag)
+
+Example:
+    from chimerapulse.helpers import translation_memory
+
+    match = translation_memory.lookup('en', 'fil', 'Thank you for calling')
+    if match is None:
+        ...
+        translation_memory.add('en', 'fil', 'Thank you for calling', text)
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from difflib import SequenceMatcher
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'chimerapulse', 'translation_memory.sqlite3')
+DEFAULT_THRESHOLD = 0.9
+DEFAULT_FUZZY_MODE = 'flag'
+FUZZY_MODES = ['flag', 'serve']
+
+# Fuzzy candidates scored per lookup, and words of a segment used to find them
+MAX_CANDIDATES = 10
+MAX_QUERY_WORDS = 32
+RARE_WORDS = 3
+
+WORD = re.compile(r'\w+')
+
+# Declare global variables
+config = None
+connection = None
+fuzzy_index = False
+counters = {
+    'exact_hits': 0,
+    'fuzzy_hits': 0,
+    'misses': 0,
+}
+lock = threading.RLock()
+
+
+"""
+Private fxns
+"""
+def __get_config():
+    global config
+
+    if config is None:
+        fuzzy_mode = os.getenv('CHIMERAPULSE_TM_FUZZY', DEFAULT_FUZZY_MODE)
+        if fuzzy_mode not in FUZZY_MODES:
+            raise ValueError(f'ERROR: CHIMERAPULSE_TM_FUZZY should be one of {FUZZY_MODES}')
+
+        config = {
+            'enabled': os.getenv('CHIMERAPULSE_TM', '1') != '0',
+            'path': os.getenv('CHIMERAPULSE_TM_PATH', DEFAULT_PATH),
+            'threshold': float(os.getenv('CHIMERAPULSE_TM_THRESHOLD', DEFAULT_THRESHOLD)),
+            'fuzzy_mode': fuzzy_mode,
+        }
+
+    return config
+
+
+def __get_connection():
+    """Opens the memory on first use
+
+    Return:
+        (sqlite3.Connection): Translation memory
+    """
+    global connection, fuzzy_index
+
+    if connection is None:
+        path = __get_config()['path']
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute('CREATE TABLE IF NOT EXISTS segments '
+                           '(id INTEGER PRIMARY KEY, pair TEXT, source_hash TEXT, source_text TEXT, target_text TEXT, '
+                           'UNIQUE (pair, source_hash))')
+        # Segments containing each word, per language pair, to pick the rarest words of a fuzzy lookup
+        connection.execute('CREATE TABLE IF NOT EXISTS terms '
+                           '(pair TEXT, term TEXT, segments INTEGER, PRIMARY KEY (pair, term)) WITHOUT ROWID')
+
+        # Fuzzy matching needs SQLite built with FTS5. Without it only exact matches are served
+        try:
+            connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS segments_index USING fts5 '
+                               "(pair, source_text, content='segments', content_rowid='id')")
+            fuzzy_index = True
+        except sqlite3.OperationalError:
+            fuzzy_index = False
+        connection.commit()
+
+    return connection
+
+
+def __normalize(text):
+    return ' '.join(text.split())
+
+
+def __get_pair(source_language, target_language):
+    """Language pair as a single full-text token
+    """
+    return hashlib.md5(f'{source_language}|{target_language}'.encode('utf-8')).hexdigest()
+
+
+def __get_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def __find_fuzzy(current, pair, text, threshold):
+    """Finds the most similar stored segment of a language pair
+
+    Candidates must share the rarest words of the segment, as a match above threshold shares nearly all of its
+    words. Rare words keep the candidate set small however many segments are stored. A segment whose length alone
+    keeps it below threshold is never a candidate, and the candidates closest in length are scored first, so a
+    common phrase stored in many longer segments doesn't crowd out the match.
+
+    Return:
+        (dict): Best match above threshold, or None
+    """
+    words = list(dict.fromkeys(WORD.findall(text.lower())))[:MAX_QUERY_WORDS]
+    if not words:
+        return None
+
+    frequencies = current.execute(
+        'SELECT term, segments FROM terms WHERE pair = ? AND term IN ({})'.format(', '.join('?' * len(words))),
+        [pair, *words]).fetchall()
+    rare_words = [term for term, _ in sorted(frequencies, key=lambda frequency: frequency[1])][:RARE_WORDS]
+    if not rare_words:
+        return None
+
+    # Similarity is at most 2 * shorter / (both lengths), which bounds the length of a match
+    length = len(text)
+    min_length = length * threshold / (2 - threshold)
+    max_length = length * (2 - threshold) / threshold if threshold > 0 else float('inf')
+
+    candidates = []
+    for operator in [' AND ', ' OR ']:
+        query = 'source_text : ({})'.format(operator.join(f'"{word}"' for word in rare_words))
+        candidates = current.execute(
+            'SELECT segments.source_text, segments.target_text FROM segments_index '
+            'CROSS JOIN segments ON segments.id = segments_index.rowid '
+            'WHERE segments_index MATCH ? AND segments.pair = ? '
+            'AND LENGTH(segments.source_text) BETWEEN ? AND ? '
+            'ORDER BY ABS(LENGTH(segments.source_text) - ?) LIMIT ?',
+            (query, pair, min_length, max_length, length, MAX_CANDIDATES)).fetchall()
+        if candidates:
+            break
+
+    best = None
+    for source_text, target_text in candidates:
+        score = SequenceMatcher(None, text.lower(), source_text.lower()).ratio()
+        if score >= threshold and (best is None or score > best['score']):
+            best = {
+                "text": target_text,
+                "score": score,
+                "source": source_text,
+                # Segments differing only in case score 1 too, so exactness is never read from the score
+                "exact": source_text == text
+            }
+
+    return best
+
+
+"""
+Memory fxns
+"""
+def configure(enabled=None, path=None, threshold=None, fuzzy_mode=None):
+    """Overrides env var configuration. Values left as None keep their current setting.
+
+    Args:
+        enabled (bool): Enable the translation memory
+        path (str): Path of the memory
+        threshold (float): Minimum similarity of a fuzzy match
+        fuzzy_mode (str): 'flag' to attach fuzzy matches as suggestions, or 'serve' to return them in place of a
+            translation
+    """
+    global connection
+
+    if fuzzy_mode is not None and fuzzy_mode not in FUZZY_MODES:
+        raise ValueError(f'ERROR: fuzzy_mode should be one of {FUZZY_MODES}')
+
+    with lock:
+        current = __get_config()
+        overrides = {
+            'enabled': enabled,
+            'path': path,
+            'threshold': threshold,
+            'fuzzy_mode': fuzzy_mode,
+        }
+        current.update({name: value for name, value in overrides.items() if value is not None})
+
+        if path is not None and connection is not None:
+            connection.close()
+            connection = None
+
+
+def is_enabled():
+    return __get_config()['enabled']
+
+
+def get_fuzzy_mode():
+    return __get_config()['fuzzy_mode']
+
+
+def lookup(source_language, target_language, text):
+    """Searches the memory for a translation of a segment
+
+    Args:
+        source_language (str): Source language
+        target_language (str): Target language
+        text (str): Segment
+
+    Return:
+        (dict): Translated text, similarity score, matched segment and whether it equals the normalized segment
+            (exact), or None
+    """
+    current_config = __get_config()
+    if not current_config['enabled']:
+        return None
+
+    text = __normalize(text)
+    pair = __get_pair(source_language, target_language)
+
+    with lock:
+        current = __get_connection()
+        row = current.execute('SELECT target_text FROM segments WHERE pair = ? AND source_hash = ?',
+                              (pair, __get_hash(text))).fetchone()
+        if row is not None:
+            counters['exact_hits'] += 1
+            return {
+                "text": row[0],
+                "score": 1.0,
+                "source": text,
+                "exact": True
+            }
+
+        match = None
+        if fuzzy_index and current_config['threshold'] < 1:
+            match = __find_fuzzy(current, pair, text, current_config['threshold'])
+
+        counters['fuzzy_hits' if match else 'misses'] += 1
+
+    return match
+
+
+def add(source_language, target_language, source_text, target_text):
+    """Stores a translated segment
+
+    Args:
+        source_language (str): Source language
+        target_language (str): Target language
+        source_text (str): Segment
+        target_text (str): Translation
+    """
+    add_many(source_language, target_language, [(source_text, target_text)])
+
+
+def add_many(source_language, target_language, segments):
+    """Stores translated segments of a language pair in one transaction
+
+    Args:
+        source_language (str): Source language
+        target_language (str): Target language
+        segments ([(str, str)]): Segment and its translation
+    """
+    if not __get_config()['enabled']:
+        return
+
+    pair = __get_pair(source_language, target_language)
+
+    with lock:
+        current = __get_connection()
+        for source_text, target_text in segments:
+            source_text = __normalize(source_text)
+            cursor = current.execute(
+                'INSERT OR IGNORE INTO segments (pair, source_hash, source_text, target_text) VALUES (?, ?, ?, ?)',
+                (pair, __get_hash(source_text), source_text, target_text))
+            if cursor.rowcount and fuzzy_index:
+                current.execute('INSERT INTO segments_index (rowid, pair, source_text) VALUES (?, ?, ?)',
+                                (cursor.lastrowid, pair, source_text))
+                current.executemany(
+                    'INSERT INTO terms (pair, term, segments) VALUES (?, ?, 1) '
+                    'ON CONFLICT (pair, term) DO UPDATE SET segments = segments + 1',
+                    [(pair, word) for word in dict.fromkeys(WORD.findall(source_text.lower()))])
+        current.commit()
+
+
+def stats():
+    """Retrieves exact hit, fuzzy hit and miss counters
+
+    Return:
+        (dict): Counters, hit rate and stored segments
+    """
+    with lock:
+        response = dict(counters)
+        if __get_config()['enabled']:
+            [response['segments']] = __get_connection().execute('SELECT COUNT(*) FROM segments').fetchone()
+
+    lookups = response['exact_hits'] + response['fuzzy_hits'] + response['misses']
+    response['hit_rate'] = (response['exact_hits'] + response['fuzzy_hits']) / lookups if lookups else 0.0
+
+    return response
@@ -28,7 +28,7 @@ setup(
     url='https://github.com/ccavales3/chimera-pulse',
     author='Caesar Cavales',
     author_email='c.cavales3@gmail.com',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks']),
     install_requires=[
         'azure-ai-language-conversations==1.1.0',   # https://learn.microsoft.com/en-us/azure/ai-services/language-service/summarization/quickstart?pivots=programming-language-python&tabs=conversation-summarization%2Cmacos
         'azure-ai-textanalytics==5.3.0',            # https://learn.microsoft.com/en-us/azure/ai-services/language-service/summarization/quickstart?pivots=programming-language-python&tabs=document-summarization%2Cmacos
@@ -39,7 +39,8 @@ setup(
         'playsound==1.3.0',                         # https://github.com/TaylorSMarks/playsound
         'python-dotenv==1.0.0',
         'PyObjC==10.1',
-        'moviepy==1.0.3'                            # https://pypi.org/project/moviepy/
+        'moviepy==1.0.3',                           # https://pypi.org/project/moviepy/
+        'aiohttp==3.9.1'                            # https://github.com/aio-libs/aiohttp
     ],
     zip_safe=False
 )
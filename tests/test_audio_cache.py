@@ -0,0 +1,40 @@
+"""Tests of helpers.audio_cache
+"""
+import os
+
+import pytest
+
+from chimerapulse.helpers import audio_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(audio_cache, 'config', None)
+    monkeypatch.setattr(audio_cache, 'cache_size', None)
+    audio_cache.configure(enabled=True, directory=str(tmp_path), max_bytes=100)
+
+
+def test_put_keeps_running_size_without_walking_directory(monkeypatch, tmp_path):
+    (tmp_path / 'seeded.wav').write_bytes(b'x' * 10)
+    scans = []
+    scan = getattr(audio_cache, '__scan')
+    monkeypatch.setattr(audio_cache, '__scan', lambda directory: scans.append(directory) or scan(directory))
+
+    for index in range(3):
+        audio_cache.put(f'key{index}', b'x' * 20, 'wav')
+    # Replacing an entry only counts the difference
+    audio_cache.put('key0', b'x' * 10, 'wav')
+
+    assert len(scans) == 1
+    assert audio_cache.cache_size == 60
+
+
+def test_put_evicts_least_recently_used_over_cap(tmp_path):
+    for index in range(3):
+        filepath = audio_cache.put(f'key{index}', b'x' * 40, 'wav')
+        os.utime(filepath, (index, index))
+
+    assert audio_cache.get('key0', 'wav') is None
+    assert audio_cache.get('key2', 'wav') is not None
+    assert audio_cache.cache_size == 80
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
@@ -0,0 +1,62 @@
+"""Tests of helpers.batching
+"""
+from chimerapulse.helpers import batching
+
+
+def __indexed(items):
+    return list(enumerate(items))
+
+
+def test_split_batches_caps_items():
+    batches = batching.split_batches(__indexed('abcde'), max_items=2)
+
+    assert batches == [[(0, 'a'), (1, 'b')], [(2, 'c'), (3, 'd')], [(4, 'e')]]
+
+
+def test_split_batches_caps_chars():
+    batches = batching.split_batches(__indexed(['aaa', 'bb', 'c', 'dddd']), max_items=10, max_chars=5)
+
+    assert [[item for _, item in batch] for batch in batches] == [['aaa', 'bb'], ['c', 'dddd']]
+
+
+def test_split_batches_oversized_item_gets_own_batch():
+    batches = batching.split_batches(__indexed(['a', 'bbbbbb', 'c']), max_items=10, max_chars=3)
+
+    assert [[item for _, item in batch] for batch in batches] == [['a'], ['bbbbbb'], ['c']]
+
+
+def test_split_batches_custom_size():
+    batches = batching.split_batches(__indexed(['ab', 'cd', 'ef']), max_items=10, max_chars=8,
+                                     size=lambda item: len(item) * 3)
+
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+
+
+def test_split_batches_empty():
+    assert batching.split_batches([], max_items=5, max_chars=10) == []
+
+
+def test_dispatch_keeps_batch_order_and_returns_exceptions():
+    def fn(items):
+        if 'fail' in items:
+            raise ValueError('rejected')
+        return [item.upper() for item in items]
+
+    batches = batching.split_batches(__indexed(['a', 'fail', 'b', 'c']), max_items=1)
+    responses = batching.dispatch(fn, batches, max_workers=4)
+
+    assert responses[0] == ['A']
+    assert isinstance(responses[1], ValueError)
+    assert responses[2:] == [['B'], ['C']]
+
+
+def test_split_documents_rejects_oversized_documents():
+    results, batches = batching.split_documents(['short', 'x' * 20, 'also short'], 10, 10, 100)
+
+    assert results[0] is None and results[2] is None
+    assert results[1]['error']['code'] == 'InvalidDocument'
+    assert batches == [[(0, 'short'), (2, 'also short')]]
+
+
+def test_exception_result():
+    assert batching.exception_result(ValueError('boom')) == {'error': {'code': 'ValueError', 'message': 'boom'}}
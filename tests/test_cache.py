@@ -0,0 +1,139 @@
+"""Tests of helpers.cache
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+
+import pytest
+
+from chimerapulse.helpers import cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    for name in ['CHIMERAPULSE_CACHE', 'CHIMERAPULSE_CACHE_SIZE', 'CHIMERAPULSE_CACHE_DIR',
+                 'CHIMERAPULSE_CACHE_MAX_BYTES', 'CHIMERAPULSE_CACHE_TTL']:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(cache, 'config', None)
+    monkeypatch.setattr(cache, 'memory', OrderedDict())
+    monkeypatch.setattr(cache, 'disk', None)
+    monkeypatch.setattr(cache, 'disk_size', 0)
+    monkeypatch.setattr(cache, 'counters', {name: 0 for name in cache.counters})
+
+    yield
+
+    if cache.disk is not None:
+        cache.disk.close()
+
+
+def __job(status='succeeded', task_status='succeeded', task_errors=None, errors=None):
+    return {
+        "status": status,
+        "errors": errors or [],
+        "tasks": {"items": [{"status": task_status, "results": {"conversations": [], "errors": task_errors or []}}]}
+    }
+
+
+@pytest.mark.parametrize('value', [
+    'text',
+    ['a', 'b'],
+    {'sentiment': 'positive'},
+    {'keyphrases': {'key_phrases': []}, 'sentiment': {'sentiment': 'neutral'}},
+    __job(),
+])
+def test_is_cacheable(value):
+    assert cache.is_cacheable(value)
+
+
+@pytest.mark.parametrize('value', [
+    {'error': {'code': 'InvalidDocument', 'message': 'Too long'}},
+    {'keyphrases': {'key_phrases': []}, 'sentiment': {'error': {'code': 'X', 'message': 'm'}}},
+    __job(status='failed'),
+    __job(status='partiallyCompleted'),
+    __job(task_status='failed'),
+    __job(task_errors=[{'id': 'conversation1', 'error': {'code': 'X'}}]),
+    __job(errors=[{'code': 'X'}]),
+])
+def test_errors_are_not_cacheable(value):
+    assert not cache.is_cacheable(value)
+
+
+def test_memoize_caches_results_but_not_errors():
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    assert cache.memoize('op', 'a', lambda: compute({'ok': True})) == {'ok': True}
+    assert cache.memoize('op', 'a', lambda: compute({'ok': False})) == {'ok': True}
+
+    cache.memoize('op', 'b', lambda: compute({'error': {'code': 'X', 'message': 'm'}}))
+    cache.memoize('op', 'b', lambda: compute({'error': {'code': 'X', 'message': 'm'}}))
+
+    assert len(calls) == 3
+
+
+def test_memoize_many_computes_missing_only():
+    cache.put(cache.make_key('op', 'a'), 'A')
+
+    results = cache.memoize_many('op', ['a', 'b'], lambda texts: [text.upper() for text in texts])
+
+    assert results == ['A', 'B']
+    assert cache.stats()['memory_hits'] == 1
+
+
+def test_disabled_cache_misses():
+    cache.configure(enabled=False)
+    cache.put('key', 'value')
+
+    assert cache.get('key') is cache.MISSING
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache.configure(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is cache.MISSING
+    assert cache.get('a') == 1
+    assert cache.stats()['memory_evictions'] == 1
+
+
+def test_disk_tier_survives_memory_and_stays_under_cap(tmp_path):
+    cache.configure(directory=str(tmp_path), max_bytes=100)
+    for index in range(10):
+        cache.put(f'key{index}', 'x' * 20)
+    cache.memory.clear()
+
+    stats = cache.stats()
+    [total] = cache.disk.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()
+    assert stats['disk_bytes'] == total <= 100
+    assert stats['disk_evictions'] > 0
+    assert cache.get('key9') == 'x' * 20
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_disk_tier_replacing_a_key_keeps_its_size(tmp_path):
+    cache.configure(directory=str(tmp_path))
+    cache.put('key', 'x' * 20)
+    cache.put('key', 'x' * 10)
+
+    [total] = cache.disk.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()
+    assert cache.disk_size == total
+
+
+def test_async_lookups_of_disk_tier_run_off_the_loop(monkeypatch, tmp_path):
+    cache.configure(directory=str(tmp_path))
+    threads = []
+    get = cache.get
+    monkeypatch.setattr(cache, 'get', lambda key: threads.append(threading.get_ident()) or get(key))
+
+    async def run():
+        await cache.put_many_async([('a', 1)])
+        return await cache.get_many_async(['a', 'b'])
+
+    assert asyncio.run(run()) == [1, cache.MISSING]
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,59 @@
+"""Tests of core.language.document_summarization against the client class of the pinned SDK, so a call to a method
+the client doesn't have fails
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+textanalytics = pytest.importorskip('azure.ai.textanalytics', minversion='5.3.0')
+
+
+def __summarize(text, action):
+    if isinstance(action, textanalytics.AbstractiveSummaryAction):
+        return SimpleNamespace(
+            is_error=False, kind='AbstractiveSummarization', summaries=[SimpleNamespace(text=f'About {text[:10]}')])
+
+    return SimpleNamespace(is_error=False, kind='ExtractiveSummarization', sentences=[SimpleNamespace(text=text[:10])])
+
+
+def __begin_analyze_actions(documents, actions, **_):
+    results = [[__summarize(document, action) for action in actions] for document in documents]
+
+    return SimpleNamespace(result=lambda: iter(results), add_done_callback=lambda callback: callback(None))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from chimerapulse.core import clients
+    from chimerapulse.helpers import cache
+
+    client = mock.create_autospec(textanalytics.TextAnalyticsClient, instance=True)
+    client.begin_analyze_actions.side_effect = __begin_analyze_actions
+    monkeypatch.setattr(clients, 'get_text_analytics_client', lambda: client)
+    cache.configure(enabled=False)
+
+    yield client
+
+    cache.configure(enabled=True)
+
+
+def test_document_is_summarized_at_polling_interval(client):
+    from chimerapulse.core.language import document_summarization
+    from chimerapulse.helpers import lro
+
+    summary = document_summarization.language_summarizedocument('Contoso shipped the order late.')
+
+    assert summary == {'abstractive_summary': 'About Contoso sh', 'extractive_summary': 'Contoso sh'}
+    assert client.begin_analyze_actions.call_args.kwargs['polling_interval'] == lro.get_polling_interval()
+
+
+def test_chunked_document_is_summarized(client):
+    from chimerapulse.core.language import document_summarization
+
+    document = '\n\n'.join(f'Paragraph {index} is about the Contoso order.' for index in range(200))
+
+    summary = document_summarization.language_summarizedocument_chunked(document, max_chunk_chars=1000)
+
+    assert summary['abstractive_summary'] and summary['extractive_summary']
+    assert client.begin_analyze_actions.call_count > 1
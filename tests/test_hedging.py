@@ -0,0 +1,102 @@
+"""Tests of helpers.hedging
+"""
+import threading
+import time
+
+import pytest
+
+from chimerapulse.helpers import hedging
+
+
+@pytest.fixture(autouse=True)
+def fresh_hedging(monkeypatch):
+    monkeypatch.delenv('CHIMERAPULSE_HEDGING', raising=False)
+    monkeypatch.setattr(hedging, 'config', None)
+    monkeypatch.setattr(hedging, 'operations', {})
+
+    yield
+
+    hedging.close_executor()
+
+
+def __learn(operation, latency=0.001):
+    for _ in range(hedging.MIN_SAMPLES):
+        hedging.hedge(operation, time.sleep, latency)
+
+
+def test_disabled_calls_in_place():
+    assert hedging.hedge('op', lambda value: value * 2, 21) == 42
+    assert hedging.stats() == {}
+
+
+def test_no_hedge_until_threshold_is_learned():
+    hedging.configure(enabled=True, max_ratio=1)
+    for _ in range(hedging.MIN_SAMPLES - 1):
+        hedging.hedge('op', lambda: None)
+
+    stats = hedging.stats()['op']
+    assert stats['threshold_seconds'] is None
+    assert stats['hedged'] == 0
+
+
+def test_slow_call_is_hedged_and_hedge_wins():
+    hedging.configure(enabled=True, max_ratio=1)
+    __learn('op')
+    calls = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            calls.append(None)
+            first = len(calls) == 1
+        # The first request is stuck, its hedge returns right away
+        time.sleep(1 if first else 0)
+        return 'first' if first else 'hedge'
+
+    start = time.perf_counter()
+    assert hedging.hedge('op', call) == 'hedge'
+    assert time.perf_counter() - start < 0.5
+
+    stats = hedging.stats()['op']
+    assert stats['hedged'] == 1
+    assert stats['hedge_wins'] == 1
+
+
+def test_budget_caps_hedges():
+    hedging.configure(enabled=True, max_ratio=0.05)
+    __learn('op')
+
+    for _ in range(5):
+        hedging.hedge('op', time.sleep, 0.05)
+
+    # 25 calls earned 1.25 hedges
+    assert hedging.stats()['op']['hedged'] <= 1
+
+
+def test_error_is_raised_when_every_call_fails():
+    hedging.configure(enabled=True)
+
+    def fail():
+        raise ValueError('rejected')
+
+    with pytest.raises(ValueError):
+        hedging.hedge('op', fail)
+
+
+def test_thresholds_are_learned_per_size_class():
+    hedging.configure(enabled=True, max_ratio=1)
+    for _ in range(hedging.MIN_SAMPLES):
+        hedging.hedge('op', lambda: None, size=100)
+    hedging.hedge('op', lambda: None, size=3000)
+
+    stats = hedging.stats()
+    assert stats['op/128']['threshold_seconds'] is not None
+    # A larger call isn't held to the threshold of small ones
+    assert stats['op/4096']['threshold_seconds'] is None
+
+
+def test_calls_above_max_chars_are_not_hedged():
+    hedging.configure(enabled=True, max_ratio=1, max_chars=1000)
+
+    assert hedging.hedge('op', lambda: 'done', size=1001) == 'done'
+    assert hedging.stats() == {}
@@ -0,0 +1,63 @@
+"""Tests of the detected language cache of core.speech.language_identification
+"""
+import os
+import shutil
+import wave
+
+import pytest
+
+pytest.importorskip('azure.cognitiveservices.speech')
+pytest.importorskip('click')
+
+
+def __write_wav(filepath, pcm):
+    with wave.open(str(filepath), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(pcm)
+
+
+@pytest.fixture
+def language_identification(monkeypatch):
+    from chimerapulse.core.speech import language_identification
+    from chimerapulse.helpers import cache
+
+    cache.clear()
+    detections = []
+
+    def detect_language(audio_configs, languages):
+        detections.append(len(audio_configs))
+        return {"language": 'en-US', "confidence": 1.0, "confidence_level": 'High'}
+
+    monkeypatch.setattr(language_identification, '__detect_language', detect_language)
+
+    yield [language_identification, detections]
+
+    cache.clear()
+
+
+def test_copy_of_recording_hits_cache(language_identification, tmp_path):
+    [identification, detections] = language_identification
+    __write_wav(tmp_path / 'call.wav', b'\x01\x00' * 16000)
+    shutil.copy(tmp_path / 'call.wav', tmp_path / 'copy.wav')
+
+    identification.speech_detectlanguage(str(tmp_path / 'call.wav'), window_seconds=0.5)
+    identification.speech_detectlanguage(str(tmp_path / 'copy.wav'), window_seconds=0.5)
+
+    assert len(detections) == 1
+
+
+def test_file_rewritten_in_place_misses_cache(language_identification, tmp_path):
+    [identification, detections] = language_identification
+    filepath = tmp_path / 'call.wav'
+    __write_wav(filepath, b'\x01\x00' * 16000)
+    stat = os.stat(filepath)
+
+    identification.speech_detectlanguage(str(filepath), window_seconds=0.5)
+    # Same size and modification time, different audio
+    __write_wav(filepath, b'\x02\x00' * 16000)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    identification.speech_detectlanguage(str(filepath), window_seconds=0.5)
+
+    assert len(detections) == 2
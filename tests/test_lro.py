@@ -0,0 +1,73 @@
+"""Tests of helpers.lro
+"""
+import time
+
+import pytest
+
+from chimerapulse.helpers import lro
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(lro, 'config', None)
+    lro.configure(initial_delay=0.01, max_delay=0.05, backoff=2)
+
+
+def __operation(polls_until_done, retry_after=None):
+    state = {'polls': 0, 'times': []}
+
+    def poll():
+        state['polls'] += 1
+        state['times'].append(time.monotonic())
+        return [state['polls'] >= polls_until_done, retry_after]
+
+    return [state, poll]
+
+
+def test_track_resolves_once_finished():
+    [state, poll] = __operation(3)
+
+    future = lro.track(poll, lambda: 'done')
+
+    assert future.result(timeout=5) == 'done'
+    assert state['polls'] == 3
+
+
+def test_track_fails_when_poll_raises():
+    def poll():
+        raise ValueError('job failed')
+
+    with pytest.raises(ValueError):
+        lro.track(poll, lambda: 'done').result(timeout=5)
+
+
+def test_track_fails_when_resolve_raises():
+    [_, poll] = __operation(1)
+
+    def resolve():
+        raise ValueError('no results')
+
+    with pytest.raises(ValueError):
+        lro.track(poll, resolve).result(timeout=5)
+
+
+def test_retry_after_delays_next_poll():
+    [state, poll] = __operation(2, retry_after=0.3)
+
+    lro.track(poll, lambda: None).result(timeout=5)
+
+    assert state['times'][1] - state['times'][0] >= 0.25
+
+
+def test_results_keeps_order_and_exceptions():
+    def fail():
+        raise ValueError('job failed')
+
+    futures = [lro.track(__operation(2)[1], lambda: 'a'), lro.track(fail, lambda: None),
+               lro.track(__operation(1)[1], lambda: 'c')]
+
+    responses = lro.results(futures)
+
+    assert responses[0] == 'a'
+    assert isinstance(responses[1], ValueError)
+    assert responses[2] == 'c'
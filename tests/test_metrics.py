@@ -0,0 +1,129 @@
+"""Tests of helpers.metrics and core.metering
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from chimerapulse.helpers import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', True)
+    monkeypatch.setattr(metrics, 'histograms', {})
+    monkeypatch.setattr(metrics, 'counters', {})
+
+
+def __get_calls(stage):
+    return {series['labels']['stage']: series['value']
+            for series in metrics.snapshot().get('chimerapulse_stage_calls_total', [])}.get(stage, 0)
+
+
+def test_instrument_records_calls_and_errors():
+    @metrics.instrument('language')
+    def language_stage(fail):
+        if fail:
+            raise ValueError('failed')
+        return 'done'
+
+    assert language_stage(False) == 'done'
+    with pytest.raises(ValueError):
+        language_stage(True)
+
+    assert __get_calls('language_stage') == 2
+    [errors] = metrics.snapshot()['chimerapulse_stage_errors_total']
+    assert errors['labels'] == {'service': 'language', 'stage': 'language_stage', 'error': 'ValueError'}
+
+
+def test_instrument_names_stage():
+    @metrics.instrument('language', stage='language_pii')
+    def __recognize():
+        return 'done'
+
+    __recognize()
+
+    assert __get_calls('language_pii') == 1
+
+
+def test_instrument_times_generator_closed_early():
+    @metrics.instrument('speech')
+    def speech_stage():
+        yield from range(10)
+
+    items = speech_stage()
+    next(items)
+    items.close()
+
+    assert __get_calls('speech_stage') == 1
+
+
+def test_instrument_times_coroutines_and_async_generators():
+    @metrics.instrument('translator')
+    async def translator_stage():
+        await asyncio.sleep(0)
+        return 'done'
+
+    @metrics.instrument('speech')
+    async def speech_stream():
+        for item in range(3):
+            yield item
+
+    async def run():
+        return [await translator_stage(), [item async for item in speech_stream()]]
+
+    assert asyncio.run(run()) == ['done', [0, 1, 2]]
+    assert __get_calls('translator_stage') == 1
+    assert __get_calls('speech_stream') == 1
+
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', False)
+
+    @metrics.instrument('language')
+    def language_stage():
+        return 'done'
+
+    language_stage()
+    metrics.record_characters('speech', 'synthesis', 10)
+
+    assert metrics.snapshot() == {}
+
+
+def test_volume_is_recorded_per_operation():
+    metrics.record_characters('speech', 'synthesis', 10)
+    metrics.record_characters('speech', 'synthesis', 5)
+    metrics.record_audio('speech', 'transcription', 1.5)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['chimerapulse_service_characters_total'] == [
+        {'labels': {'service': 'speech', 'operation': 'synthesis'}, 'value': 15}]
+    assert snapshot['chimerapulse_service_audio_seconds_total'] == [
+        {'labels': {'service': 'speech', 'operation': 'transcription'}, 'value': 1.5}]
+    assert 'chimerapulse_service_characters_total{service="speech",operation="synthesis"} 15' in metrics.render()
+
+
+def test_metering_counts_text_of_request_body():
+    pytest.importorskip('azure.core.pipeline.policies')
+    from chimerapulse.core import metering
+
+    body = {
+        'kind': 'SentimentAnalysis',
+        'analysisInput': {'documents': [{'id': '1', 'text': 'abc', 'language': 'en'}, {'id': '2', 'text': 'de'}]}
+    }
+    request = SimpleNamespace(http_request=SimpleNamespace(
+        body=json.dumps(body), url='https://example.com/language/:analyze-text'))
+    metering.MeteringPolicy('language').on_request(request)
+
+    translation = SimpleNamespace(http_request=SimpleNamespace(
+        body=json.dumps([{'Text': 'Hello'}]), url='https://example.com/translate?to=fil'))
+    metering.MeteringPolicy('translator').on_request(translation)
+
+    # Polling requests carry no body
+    metering.MeteringPolicy('language').on_request(
+        SimpleNamespace(http_request=SimpleNamespace(body=None, url='https://example.com/jobs/1')))
+
+    assert metrics.snapshot()['chimerapulse_service_characters_total'] == [
+        {'labels': {'service': 'language', 'operation': 'SentimentAnalysis'}, 'value': 5},
+        {'labels': {'service': 'translator', 'operation': '/translate'}, 'value': 5}]
@@ -0,0 +1,175 @@
+"""Tests of helpers.rate_limit and core.throttling
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from chimerapulse.helpers import rate_limit
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.delenv('CHIMERAPULSE_RATE_LIMIT', raising=False)
+    monkeypatch.setattr(rate_limit, 'config', None)
+    monkeypatch.setattr(rate_limit, 'limiters', {})
+
+
+def test_unknown_service_is_rejected():
+    with pytest.raises(ValueError):
+        rate_limit.acquire('unknown')
+
+
+def test_acquire_and_release_track_calls_in_flight():
+    rate_limit.acquire('language')
+    assert rate_limit.stats()['language']['in_flight'] == 1
+
+    rate_limit.release('language', True, 0.1)
+    stats = rate_limit.stats()['language']
+    assert stats['in_flight'] == 0
+    assert stats['calls'] == 1
+    assert stats['baseline_latency'] == 0.1
+
+
+def test_bucket_paces_calls_at_tps():
+    rate_limit.configure(services={'translator': {'tps': 20, 'concurrency': 16}})
+    start = time.monotonic()
+    for _ in range(25):
+        rate_limit.acquire('translator')
+        rate_limit.release('translator')
+
+    # A burst of one second goes through, the rest is paced
+    assert time.monotonic() - start >= 4 / 20
+
+
+def test_concurrency_limit_blocks_until_release():
+    rate_limit.configure(services={'language': {'tps': 1000, 'concurrency': 1}})
+    rate_limit.acquire('language')
+    acquired = threading.Event()
+
+    def acquire():
+        rate_limit.acquire('language')
+        acquired.set()
+
+    threading.Thread(target=acquire, daemon=True).start()
+    assert not acquired.wait(0.1)
+
+    rate_limit.release('language')
+    assert acquired.wait(1)
+    rate_limit.release('language')
+
+
+def test_throttle_pauses_and_halves_concurrency():
+    rate_limit.configure(services={'language': {'tps': 1000, 'concurrency': 32}})
+    rate_limit.acquire('language')
+    before = rate_limit.stats()['language']['concurrency']
+
+    rate_limit.throttle('language', retry_after=0.2)
+    rate_limit.release('language', succeeded=False)
+    start = time.monotonic()
+    rate_limit.acquire('language')
+
+    assert time.monotonic() - start >= 0.15
+    stats = rate_limit.stats()['language']
+    assert stats['concurrency'] == max(1, before // 2)
+    assert stats['throttled'] == 1
+    rate_limit.release('language')
+
+
+def test_latency_far_above_baseline_decreases_concurrency():
+    rate_limit.configure(services={'language': {'tps': 1000, 'concurrency': 32}})
+    for _ in range(40):
+        rate_limit.acquire('language')
+        rate_limit.release('language', True, 0.01)
+    grown = rate_limit.stats()['language']['concurrency']
+
+    rate_limit.acquire('language')
+    time.sleep(0.01)
+    rate_limit.release('language', True, 0.5)
+
+    assert rate_limit.stats()['language']['concurrency'] < grown
+
+
+def test_slow_operation_is_compared_with_itself():
+    rate_limit.configure(services={'language': {'tps': 1000, 'concurrency': 32}})
+    for _ in range(40):
+        rate_limit.acquire('language')
+        rate_limit.release('language', True, 0.01, 'small')
+    grown = rate_limit.stats()['language']['concurrency']
+
+    # A large batch is slower than small requests without any congestion
+    rate_limit.acquire('language')
+    rate_limit.release('language', True, 0.5, 'large')
+
+    stats = rate_limit.stats()['language']
+    assert stats['concurrency'] >= grown
+    assert stats['operations'] == 2
+    assert stats['baseline_latency'] == 0.01
+
+
+def test_acquire_async_waits_for_release_without_blocking_loop():
+    rate_limit.configure(services={'language': {'tps': 1000, 'concurrency': 1}})
+    rate_limit.acquire('language')
+
+    async def run():
+        waiting = asyncio.ensure_future(rate_limit.acquire_async('language'))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+
+        # Released from another thread
+        threading.Thread(target=rate_limit.release, args=('language',)).start()
+        await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(run())
+    assert rate_limit.stats()['language']['in_flight'] == 1
+    rate_limit.release('language')
+
+
+def test_divide_shares_quota_between_processes():
+    rate_limit.configure(services={'language': {'tps': 16, 'concurrency': 32}})
+    rate_limit.divide(4)
+    rate_limit.acquire('language')
+
+    stats = rate_limit.stats()['language']
+    assert stats['tps'] == 4
+    assert stats['max_concurrency'] == 8
+    rate_limit.release('language')
+
+
+def test_requests_are_classified_by_operation_and_size():
+    pytest.importorskip('azure.core.pipeline.policies')
+    from chimerapulse.core import throttling
+
+    def request(method, url, body=None):
+        return SimpleNamespace(method=method, url=url, body=body)
+
+    url = 'https://example.com/language/:analyze-text'
+    small = throttling.classify(request('POST', url, '{"kind": "KeyPhraseExtraction"}'))
+    large = throttling.classify(request('POST', url, '{"kind": "KeyPhraseExtraction", "text": "%s"}' % ('a' * 5000)))
+    first_poll = throttling.classify(request('GET', 'https://example.com/language/analyze-text/jobs/1?api-version=1'))
+    second_poll = throttling.classify(request('GET', 'https://example.com/language/analyze-text/jobs/2?api-version=1'))
+
+    assert small[:2] == large[:2] == ('POST', 'KeyPhraseExtraction')
+    assert small[2] < large[2]
+    assert first_poll == second_poll == ('GET', '/language/analyze-text/jobs', 0)
+
+
+def test_disabled_limiter_does_nothing():
+    rate_limit.configure(enabled=False)
+    rate_limit.acquire('unknown')
+    rate_limit.release('unknown')
+
+    assert rate_limit.stats() == {}
+
+
+@pytest.mark.parametrize('headers, expected', [
+    ({'retry-after-ms': '1500'}, 1.5),
+    ({'x-ms-retry-after-ms': '250'}, 0.25),
+    ({'retry-after': '3'}, 3.0),
+    ({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'}, 0.0),
+    ({}, None),
+])
+def test_parse_retry_after(headers, expected):
+    assert rate_limit.parse_retry_after(headers) == expected
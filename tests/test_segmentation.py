@@ -0,0 +1,37 @@
+"""Tests of speaker mapping of helpers.segmentation
+"""
+from chimerapulse.helpers import segmentation
+
+SECOND = segmentation.TICKS_PER_SECOND
+
+
+def __utterance(speaker_id, start, end):
+    return {"speaker_id": speaker_id, "offset": start * SECOND, "duration": (end - start) * SECOND}
+
+
+def __stitch(max_speakers=None):
+    split = [
+        {"offset": 0, "boundary_start": 0, "boundary_end": 60 * SECOND},
+        {"offset": 50 * SECOND, "boundary_start": 60 * SECOND, "boundary_end": 120 * SECOND},
+    ]
+    segment_utterances = [
+        [__utterance('Guest-1', 0, 20), __utterance('Guest-2', 20, 40), __utterance('Guest-1', 55, 65)],
+        # Offsets are relative to the segment. Guest-1 of this session is heard in the overlap, Guest-2 isn't
+        [__utterance('Guest-1', 5, 15), __utterance('Guest-2', 30, 40)],
+    ]
+
+    utterances = segmentation.stitch_segments(split, segment_utterances, 10, max_speakers)
+
+    return [utterance['speaker_id'] for utterance in utterances]
+
+
+def test_speaker_heard_in_overlap_keeps_its_label():
+    assert __stitch()[:3] == ['Guest-1', 'Guest-2', 'Guest-1']
+
+
+def test_new_speaker_takes_new_label():
+    assert __stitch()[-1] == 'Guest-3'
+
+
+def test_new_speaker_takes_free_label_once_max_speakers_reached():
+    assert __stitch(max_speakers=2)[-1] == 'Guest-2'
@@ -0,0 +1,64 @@
+"""Startup tests of the CLI. Each check runs in a fresh interpreter, so modules loaded by other tests don't count
+"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('click')
+
+# Packages that must only be imported by the subcommand that needs them
+HEAVY_PACKAGES = ['azure', 'moviepy', 'tkinter']
+
+# Seconds allowed to import the entry point and print help, generous so slow CI machines don't flake
+STARTUP_BUDGET_SECONDS = 2.0
+
+PROBE = '''
+import json
+import sys
+import time
+
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+'''
+
+
+def __probe(statement):
+    """Runs a statement in a fresh interpreter
+
+    Return:
+        (dict): Seconds the statement took and modules loaded once it finished
+    """
+    process = subprocess.run(
+        [sys.executable, '-c', PROBE.format(statement=statement)], capture_output=True, text=True, timeout=60)
+    assert process.returncode == 0, process.stderr
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def __heavy_modules(modules):
+    return [module for module in modules if module.split('.')[0] in HEAVY_PACKAGES]
+
+
+def test_import_commands_is_light():
+    probe = __probe('import chimerapulse.commands')
+
+    assert __heavy_modules(probe['modules']) == []
+    assert probe['seconds'] < STARTUP_BUDGET_SECONDS
+
+
+def test_help_is_light():
+    statement = '''
+from chimerapulse.commands import commands
+try:
+    commands(['--help'])
+except SystemExit as exit:
+    assert exit.code == 0
+'''
+    probe = __probe(statement)
+
+    assert __heavy_modules(probe['modules']) == []
+    assert probe['seconds'] < STARTUP_BUDGET_SECONDS
@@ -0,0 +1,53 @@
+"""Tests of helpers.summarization
+"""
+from chimerapulse.helpers import summarization
+
+
+def __task(status, conversations=None, errors=None):
+    task = {"taskName": 'summary task', "status": status}
+    if conversations is not None:
+        task["results"] = {"conversations": conversations, "errors": errors or []}
+
+    return task
+
+
+def test_summaries_are_keyed_by_conversation():
+    result = {"tasks": {"items": [__task('succeeded', [
+        {"id": 'conversation1', "summaries": [{"aspect": 'issue', "text": 'Late delivery'}]},
+        {"id": 'conversation2', "summaries": [{"aspect": 'issue', "text": 'Broken screen'}]},
+    ])]}}
+
+    assert summarization.parse_summaries(result, ['conversation1', 'conversation2']) == {
+        'conversation1': {'issue': 'Late delivery'},
+        'conversation2': {'issue': 'Broken screen'},
+    }
+
+
+def test_rejected_conversation_holds_its_error():
+    error = {"code": 'InvalidDocument', "message": 'Too long.'}
+    result = {"tasks": {"items": [__task('succeeded', [], [{"id": 'conversation1', "error": error}])]}}
+
+    assert summarization.parse_summaries(result) == {'conversation1': {'error': error}}
+
+
+def test_failed_task_fails_every_conversation():
+    result = {
+        "status": 'failed',
+        "errors": [{"code": 'InternalServerError', "message": 'Service failed.'}],
+        "tasks": {"items": [
+            __task('succeeded', [{"id": 'conversation1', "summaries": [{"aspect": 'issue', "text": 'Late'}]}]),
+            __task('failed'),
+        ]}
+    }
+
+    summaries = summarization.parse_summaries(result, ['conversation1', 'conversation2'])
+
+    assert summaries['conversation1']['issue'] == 'Late'
+    for conversation_id in ['conversation1', 'conversation2']:
+        assert summaries[conversation_id]['error'] == {"code": 'InternalServerError', "message": 'Service failed.'}
+
+
+def test_job_without_tasks_fails_every_conversation():
+    summaries = summarization.parse_summaries({"status": 'cancelled', "tasks": {}}, ['conversation1'])
+
+    assert summaries['conversation1']['error']['code'] == 'TaskFailed'
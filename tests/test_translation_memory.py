@@ -0,0 +1,151 @@
+"""Tests of helpers.translation_memory and how text_translator serves its matches
+"""
+import pytest
+
+from chimerapulse.helpers import translation_memory
+
+
+@pytest.fixture(autouse=True)
+def memory(tmp_path, monkeypatch):
+    monkeypatch.delenv('CHIMERAPULSE_TM_FUZZY', raising=False)
+    monkeypatch.delenv('CHIMERAPULSE_TM_THRESHOLD', raising=False)
+    monkeypatch.setattr(translation_memory, 'config', None)
+    monkeypatch.setattr(translation_memory, 'connection', None)
+    monkeypatch.setattr(translation_memory, 'counters', {'exact_hits': 0, 'fuzzy_hits': 0, 'misses': 0})
+    translation_memory.configure(enabled=True, path=str(tmp_path / 'tm.sqlite3'))
+
+    yield
+
+    if translation_memory.connection is not None:
+        translation_memory.connection.close()
+
+
+def test_fuzzy_matches_are_flagged_by_default():
+    assert translation_memory.get_fuzzy_mode() == 'flag'
+
+
+def test_unknown_fuzzy_mode_is_rejected():
+    with pytest.raises(ValueError):
+        translation_memory.configure(fuzzy_mode='always')
+
+
+def test_exact_match():
+    translation_memory.add('en', 'fil', 'Thank  you for calling', 'Salamat sa pagtawag')
+
+    match = translation_memory.lookup('en', 'fil', 'Thank you for calling')
+
+    assert match == {'text': 'Salamat sa pagtawag', 'score': 1.0, 'source': 'Thank you for calling', 'exact': True}
+    assert translation_memory.lookup('en', 'es', 'Thank you for calling') is None
+    assert translation_memory.stats()['exact_hits'] == 1
+
+
+def test_fuzzy_match_above_threshold():
+    translation_memory.add('en', 'fil', "I can't help you with that", 'Hindi kita matutulungan diyan')
+
+    match = translation_memory.lookup('en', 'fil', 'I can help you with that')
+
+    assert match is not None
+    assert 0.9 <= match['score'] < 1
+    assert match['source'] == "I can't help you with that"
+
+
+def test_match_differing_in_case_is_not_exact():
+    translation_memory.add('en', 'fil', 'Thank you for calling', 'Salamat sa pagtawag')
+
+    match = translation_memory.lookup('en', 'fil', 'THANK YOU FOR CALLING')
+
+    assert match['score'] == 1
+    assert match['exact'] is False
+
+
+def test_exact_only_threshold():
+    translation_memory.configure(threshold=1)
+    translation_memory.add('en', 'fil', "I can't help you with that", 'Hindi kita matutulungan diyan')
+
+    assert translation_memory.lookup('en', 'fil', 'I can help you with that') is None
+
+
+def test_candidate_limit_keeps_closest_lengths():
+    # More stored segments share the words of the lookup than are scored per lookup
+    segments = [(f'Please hold the line while I transfer your call to department number {number} of our offices',
+                 f'Long {number}') for number in range(translation_memory.MAX_CANDIDATES * 2)]
+    segments.append(('Please hold the line while I transfer your call', 'Pakihintay'))
+    translation_memory.add_many('en', 'fil', segments)
+
+    match = translation_memory.lookup('en', 'fil', 'Please hold the line while I transfer your calls')
+
+    assert match is not None
+    assert match['text'] == 'Pakihintay'
+
+
+def test_segment_too_long_to_match_is_not_a_candidate():
+    translation_memory.add_many('en', 'fil', [
+        (f'Please hold the line while I transfer your call to department number {number} of our offices',
+         f'Long {number}') for number in range(translation_memory.MAX_CANDIDATES * 2)])
+
+    assert translation_memory.lookup('en', 'fil', 'Please hold the line while I transfer your calls') is None
+
+
+"""
+Translator fxns
+"""
+@pytest.fixture
+def text_translator(monkeypatch):
+    pytest.importorskip('azure.ai.translation.text')
+    from chimerapulse.core.translator import text_translator
+    from chimerapulse.helpers import cache
+
+    cache.configure(enabled=False)
+    requests = []
+
+    def translate(source_language, target_languages, contents):
+        requests.append(contents)
+        return [[{'to': language, 'text': f'{language}:{content}'} for language in target_languages]
+                for content in contents]
+
+    monkeypatch.setattr(text_translator, '__translate', translate)
+    translation_memory.add('en', 'fil', "I can't help you with that", 'Hindi kita matutulungan diyan')
+
+    yield [text_translator, requests]
+
+    cache.configure(enabled=True)
+
+
+def test_translator_serves_exact_match(text_translator):
+    [translator, requests] = text_translator
+
+    [[translatedobj]] = translator.translator_translatetext_batch('en', ['fil'], ["I can't help you with that"])
+
+    assert translatedobj == {'to': 'fil', 'text': 'Hindi kita matutulungan diyan'}
+    assert requests == []
+
+
+def test_translator_flags_match_differing_in_case(text_translator):
+    [translator, requests] = text_translator
+
+    [[translatedobj]] = translator.translator_translatetext_batch('en', ['fil'], ["I CAN'T HELP YOU WITH THAT"])
+
+    assert translatedobj['text'] == "fil:I CAN'T HELP YOU WITH THAT"
+    assert translatedobj['suggestion']['score'] == 1
+    assert requests == [["I CAN'T HELP YOU WITH THAT"]]
+
+
+def test_translator_flags_fuzzy_match(text_translator):
+    [translator, requests] = text_translator
+
+    [[translatedobj]] = translator.translator_translatetext_batch('en', ['fil'], ['I can help you with that'])
+
+    assert translatedobj['text'] == 'fil:I can help you with that'
+    assert translatedobj['suggestion']['text'] == 'Hindi kita matutulungan diyan'
+    assert requests == [['I can help you with that']]
+
+
+def test_translator_serves_fuzzy_match_when_opted_in(text_translator):
+    [translator, requests] = text_translator
+    translation_memory.configure(fuzzy_mode='serve')
+
+    [[translatedobj]] = translator.translator_translatetext_batch('en', ['fil'], ['I can help you with that'])
+
+    assert translatedobj['text'] == 'Hindi kita matutulungan diyan'
+    assert translatedobj['match']['score'] < 1
+    assert requests == []